@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Поисковые структуры по артикулам Apple (article_search_lookup.json).
+
+Вместо линейного прохода по списку артикулов:
+  exact  — артикул → номера записей (O(1))
+  trie   — префиксное дерево по символам артикула ("661-5" → все 661-5xxxx)
+  tokens — инвертированный индекс: слово описания/модели → номера записей
+
+Все структуры ссылаются на записи по номеру в списке articles, поэтому
+файл самодостаточен: ArticleIndex.load() читает его без остального набора.
+"""
+import bisect
+import json
+import re
+
+TERMINAL = "$"
+
+_TOKEN = re.compile(r"[0-9a-zа-яё]+(?:\.[0-9]+)?")
+
+def normalize_article(article):
+    """Артикул в каноническом виде: "661 56049" / "661-56049 " → "661-56049" """
+    return re.sub(r"[\s\-]+", "-", str(article).strip().upper())
+
+def tokenize(text):
+    """Слова для инвертированного индекса (нижний регистр, без пунктуации)"""
+    return _TOKEN.findall(str(text).lower())
+
+def build(articles):
+    """Построить exact/trie/tokens для списка записей article_search_index"""
+    exact = {}
+    trie = {}
+    tokens = {}
+    for i, entry in enumerate(articles):
+        article = normalize_article(entry.get("article", ""))
+        if article:
+            exact.setdefault(article, []).append(i)
+            node = trie
+            for char in article:
+                node = node.setdefault(char, {})
+            node.setdefault(TERMINAL, []).append(i)
+        for token in set(tokenize(entry.get("description", "")) + tokenize(entry.get("model", ""))):
+            tokens.setdefault(token, []).append(i)
+    return {
+        "articles": list(articles),
+        "exact": exact,
+        "trie": trie,
+        "tokens": tokens
+    }
+
+class ArticleIndex:
+    """Запросы к поисковым структурам артикулов"""
+
+    def __init__(self, structures):
+        self.articles = structures["articles"]
+        self.exact = structures["exact"]
+        self.trie = structures["trie"]
+        self.tokens = structures["tokens"]
+        # Отсортированный словарь — для префиксного поиска по последнему слову
+        self.vocabulary = sorted(self.tokens)
+        self._sets = {}
+
+    @classmethod
+    def load(cls, filepath):
+        """Загрузить article_search_lookup.json"""
+        with open(filepath, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _entries(self, indices, limit=None):
+        indices = sorted(indices)
+        if limit is not None:
+            indices = indices[:limit]
+        return [self.articles[i] for i in indices]
+
+    def lookup(self, article):
+        """Записи с точно этим артикулом"""
+        return self._entries(self.exact.get(normalize_article(article), []))
+
+    def prefix(self, prefix, limit=50):
+        """Записи, артикул которых начинается с prefix (по возрастанию артикула)"""
+        node = self.trie
+        for char in normalize_article(prefix):
+            node = node.get(char)
+            if node is None:
+                return []
+        found = []
+        stack = [node]
+        while stack and (limit is None or len(found) < limit):
+            node = stack.pop()
+            found.extend(node.get(TERMINAL, ()))
+            # Дети в обратном порядке — со стека снимаются по возрастанию
+            stack.extend(node[char] for char in sorted(node, reverse=True) if char != TERMINAL)
+        if limit is not None:
+            found = found[:limit]
+        return [self.articles[i] for i in found]
+
+    def _postings(self, token):
+        postings = self._sets.get(token)
+        if postings is None:
+            postings = self._sets[token] = frozenset(self.tokens.get(token, ()))
+        return postings
+
+    def _token_postings(self, token, as_prefix):
+        if not as_prefix:
+            return self._postings(token)
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token + "\uffff")
+        if end - start == 1:
+            return self._postings(self.vocabulary[start])
+        postings = set()
+        for word in self.vocabulary[start:end]:
+            postings.update(self._postings(word))
+        return postings
+
+    def search(self, text, limit=50):
+        """Записи, содержащие все слова запроса (последнее — как префикс)"""
+        words = tokenize(text)
+        if not words:
+            return []
+        postings = [self._token_postings(w, i == len(words) - 1) for i, w in enumerate(words)]
+        postings.sort(key=len)
+        result = postings[0]
+        for other in postings[1:]:
+            result = [i for i in result if i in other]
+            if not result:
+                break
+        return self._entries(result, limit)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк сетевых сборщиков на локальном подставном сервере
+
+Запуск: python bench_collectors.py ifixit --latency 0.1 --levels 1,2,4,8,16
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import collect_ifixit
+
+GUIDE_TITLES = [
+    "Battery Replacement", "Screen Replacement", "Rear Camera Replacement",
+    "Loudspeaker Replacement", "Lightning Port Replacement", "SIM Card Tray Replacement"
+]
+
+class FakeIfixitHandler(BaseHTTPRequestHandler):
+    """Подставной iFixit API с фиксированной задержкой ответа"""
+
+    latency = 0.1
+    guides_per_model = 12
+    requests_served = 0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        type(self).requests_served += 1
+        url = urlparse(self.path)
+        if "/wikis/CATEGORY/" in url.path:
+            name = url.path.rsplit("/", 1)[-1]
+            body = {"image": {"standard": f"https://img.local/{name}.jpg"}, "summary": name, "repairability": 6}
+        elif url.path.endswith("/guides"):
+            query = parse_qs(url.query)
+            limit = int(query.get("limit", ["100"])[0])
+            offset = int(query.get("offset", ["0"])[0])
+            end = min(offset + limit, self.guides_per_model)
+            body = [{"guideid": i, "title": GUIDE_TITLES[i % len(GUIDE_TITLES)]} for i in range(offset, end)]
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = json.dumps(body).encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def start_server(latency, guides_per_model=12):
+    """Запустить подставной сервер в фоне, вернуть (сервер, базовый URL)"""
+    FakeIfixitHandler.latency = latency
+    FakeIfixitHandler.guides_per_model = guides_per_model
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeIfixitHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/2.0"
+
+def bench_ifixit(args):
+    """Время полного сбора iFixit в зависимости от числа одновременных запросов"""
+    server, base_url = start_server(args.latency, args.guides)
+    collect_ifixit.BASE_URL = base_url
+    runs = []
+    reference = None
+    try:
+        for level in [int(x) for x in args.levels.split(",")]:
+            FakeIfixitHandler.requests_served = 0
+            started = time.perf_counter()
+            result = asyncio.run(collect_ifixit.collect_all(concurrency=level, rate=args.rate))
+            elapsed = time.perf_counter() - started
+            if reference is None:
+                reference = result
+            runs.append({
+                "concurrency": level,
+                "seconds": round(elapsed, 3),
+                "requests": FakeIfixitHandler.requests_served,
+                "same_output": result == reference
+            })
+    finally:
+        server.shutdown()
+    return {"benchmark": "ifixit", "latency": args.latency, "rate": args.rate, "guides": args.guides, "runs": runs}
+
+BENCHMARKS = {
+    "ifixit": bench_ifixit,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки сетевых сборщиков")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--latency", type=float, default=0.1, help="задержка ответа сервера, с")
+    parser.add_argument("--rate", type=float, default=1000.0, help="лимит запросов в секунду")
+    parser.add_argument("--guides", type=int, default=12, help="гайдов на модель (больше 100 — несколько страниц)")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="уровни конкурентности через запятую")
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    args = parser.parse_args(argv)
+
+    # Вывод сборщика не нужен в отчёте бенчмарка
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = BENCHMARKS[args.benchmark](args)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(f"  latency: {result['latency']} s, rate: {result['rate']} req/s, guides: {result['guides']}")
+        for run in result["runs"]:
+            print(f"  concurrency {run['concurrency']:>3}: {run['seconds']:>7.3f} s, "
+                  f"{run['requests']} requests, same output: {run['same_output']}")
+    return result
+
+if __name__ == "__main__":
+    main()
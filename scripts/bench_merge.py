@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Бенчмарки этапов объединения данных на синтетических данных
+
+Запуск: python bench_merge.py device-index --devices 10000
+        python bench_merge.py device-pack --devices 10000
+        python bench_merge.py article-search --articles 100000
+        python bench_merge.py device-lookup --devices 100000
+        python bench_merge.py exchange-ua --rows 500000
+        python bench_merge.py price-matrix --devices 100000
+        python bench_merge.py records --devices 100000
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from xml.etree import ElementTree
+
+import article_index
+import device_keys
+import device_lookup
+import device_pack
+import exchange_prices
+import merge_all_data
+import price_matrix
+import synthetic_data
+
+SERIES = ["", " Plus", " Pro", " Pro Max", " mini"]
+
+def synthetic_iphone_boards(count, seed=42):
+    """Синтетические записи board_numbers.json (iphones)"""
+    rng = random.Random(seed)
+    boards = []
+    for i in range(count):
+        generation = 100 + i // len(SERIES)
+        boards.append({
+            "name": f"iPhone {generation}{SERIES[i % len(SERIES)]}",
+            "model": f"A{rng.randint(1000, 9999)}/A{rng.randint(1000, 9999)}",
+            "board": f"820-{i:05d}",
+            "year": 2000 + generation % 30
+        })
+    return boards
+
+PART_TYPES = ["battery", "display", "rear_camera", "front_camera", "speaker", "taptic_engine", "logic_board"]
+CONNECTORS = ["Lightning", "USB-C", "30-pin"]
+DIFFICULTIES = ["Средняя", "Сложная", "Очень сложная"]
+CHARGING_ICS = [("1610A3B", "Tristar"), ("SN2611A0", "Hydra"), ("SN2800", "USB-C Controller")]
+ISSUES = ["Разбитый экран", "Не заряжается", "Быстро разряжается батарея",
+          "Не работает микрофон", "Проблемы с динамиком", "Face ID не работает"]
+
+def synthetic_devices(count, seed=42):
+    """Синтетические записи devices.json той же формы, что выдаёт merge_devices"""
+    rng = random.Random(seed)
+    devices = []
+    for i, board in enumerate(synthetic_iphone_boards(count, seed)):
+        prices = {part: float(rng.choice([49, 59, 99, 169, 249, 399, 599])) for part in PART_TYPES}
+        main, designation = rng.choice(CHARGING_ICS)
+        devices.append({
+            "name": board["name"],
+            "category": "iPhone",
+            "model": board["model"],
+            "year": board["year"],
+            "ifixit_url": f"https://www.ifixit.com/Device/{board['name'].replace(' ', '_')}",
+            "ifixit_image": "",
+            "repairability": rng.randint(1, 10),
+            "guides_count": rng.randint(0, 40),
+            "available_repairs": rng.sample(PART_TYPES, 3),
+            "board_numbers": [board["board"]],
+            "processor": f"A{rng.randint(4, 18)}",
+            "charging_ic": {"main": main, "designation": designation},
+            "official_service_prices": prices,
+            "service_parts": {
+                part: {
+                    "article": f"661-{i * len(PART_TYPES) + n:05d}",
+                    "description": part.replace("_", " ").title(),
+                    "price_usd": price
+                }
+                for n, (part, price) in enumerate(prices.items())
+            },
+            "common_issues": rng.sample(ISSUES, 4),
+            "repair_difficulty": rng.choice(DIFFICULTIES),
+            "repair_time": rng.choice(["1-2 часа", "2-3 часа"]),
+            "connector_type": rng.choice(CONNECTORS)
+        })
+    return devices
+
+def synthetic_articles(count, seed=42):
+    """Синтетические записи article_search_index.json (661-/923- артикулы)"""
+    rng = random.Random(seed)
+    articles = []
+    for i in range(count):
+        part = PART_TYPES[i % len(PART_TYPES)]
+        is_tool = i % 50 == 0
+        articles.append({
+            "article": f"{'923' if is_tool else '661'}-{i:05d}" if i < 100000 else f"661-{i:06d}",
+            "model": "Apple Tool" if is_tool else f"iPhone {100 + i // 35}{SERIES[i // 7 % len(SERIES)]}",
+            "part_type": "tool" if is_tool else part,
+            "description": part.replace("_", " ").title(),
+            "price_usd": float(rng.choice([49, 59, 99, 169, 249, 399, 599]))
+        })
+    return articles
+
+def linear_article_lookup(articles, article):
+    return [a for a in articles if a["article"] == article]
+
+def linear_article_prefix(articles, prefix, limit=50):
+    return [a for a in articles if a["article"].startswith(prefix)][:limit]
+
+def linear_article_search(articles, text, limit=50):
+    words = text.lower().split()
+    found = []
+    for a in articles:
+        haystack = f"{a['description']} {a['model']}".lower()
+        if all(w in haystack for w in words):
+            found.append(a)
+    return found[:limit]
+
+def bench_article_search(args):
+    """Поиск артикулов: индекс (exact/trie/tokens) против линейного прохода"""
+    articles = synthetic_articles(args.articles)
+    rng = random.Random(7)
+    exact_queries = [rng.choice(articles)["article"] for _ in range(args.queries)]
+    prefix_queries = [q[:6] for q in exact_queries]
+    text_queries = [f"{rng.choice(articles)['description']} iphone {rng.randint(100, 100 + args.articles // 35)}"
+                    for _ in range(args.queries)]
+
+    structures, build_seconds = timed(article_index.build, articles)
+    index = article_index.ArticleIndex(structures)
+
+    result = {"benchmark": "article-search", "articles": args.articles, "queries": args.queries,
+              "build_seconds": round(build_seconds, 6)}
+    cases = [
+        ("exact", index.lookup, linear_article_lookup, exact_queries),
+        ("prefix", index.prefix, linear_article_prefix, prefix_queries),
+        ("tokens", index.search, linear_article_search, text_queries),
+    ]
+    for name, indexed, linear, queries in cases:
+        _, indexed_seconds = timed(lambda: [indexed(q) for q in queries])
+        sample = queries[:args.legacy_sample]
+        _, linear_seconds = timed(lambda: [linear(articles, q) for q in sample])
+        indexed_us = indexed_seconds / len(queries) * 1e6
+        linear_us = linear_seconds / max(len(sample), 1) * 1e6
+        result[f"{name}_index_us"] = round(indexed_us, 2)
+        result[f"{name}_linear_us"] = round(linear_us, 2)
+        result[f"{name}_speedup"] = round(linear_us / indexed_us, 1) if indexed_us else None
+    return result
+
+def typo(text, rng):
+    """Одна опечатка: пропущенная буква (цифры не трогаем — иначе это другая модель)"""
+    position = rng.choice([i for i, char in enumerate(text) if char.isalpha()])
+    return text[:position] + text[position + 1:]
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def bench_device_lookup(args):
+    """Нечёткий поиск устройства: задержка запроса и точность top-1"""
+    devices = synthetic_devices(args.devices)
+    for i, device in enumerate(devices):
+        # Уникальные A-номера: со случайными совпадениями top-1 не определён
+        device["model"] = f"A{10000 + 2 * i}/A{10001 + 2 * i}"
+        if i % 3 == 0:
+            device["emc"] = f"EMC {1000 + i}"
+    rng = random.Random(7)
+
+    lookup, build_seconds = timed(device_lookup.DeviceLookup, devices)
+
+    queries = []
+    for _ in range(args.queries):
+        index = rng.randrange(len(devices))
+        device = devices[index]
+        kind = rng.choice(["name", "model", "board", "emc" if "emc" in device else "name"])
+        if kind == "name":
+            query = typo(device["name"].lower(), rng)
+        elif kind == "model":
+            query = rng.choice(device["model"].split("/"))
+        elif kind == "board":
+            query = device["board_numbers"][0].replace("-", rng.choice(["-", "", " "]))
+        else:
+            query = device["emc"]
+        queries.append((kind, query, index))
+
+    latencies = []
+    hits = {}
+    for kind, query, index in queries:
+        started = time.perf_counter()
+        results = lookup.search(query, limit=5)
+        latencies.append(time.perf_counter() - started)
+        found = bool(results) and results[0]["device"] is devices[index]
+        total, correct = hits.get(kind, (0, 0))
+        hits[kind] = (total + 1, correct + found)
+
+    result = {
+        "benchmark": "device-lookup",
+        "devices": args.devices,
+        "queries": args.queries,
+        "build_seconds": round(build_seconds, 6),
+        "terms": len(lookup.terms),
+        "latency_mean_us": round(sum(latencies) / len(latencies) * 1e6, 1),
+        "latency_p50_us": round(percentile(latencies, 0.5) * 1e6, 1),
+        "latency_p95_us": round(percentile(latencies, 0.95) * 1e6, 1),
+        "latency_p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+    }
+    for kind, (total, correct) in sorted(hits.items()):
+        result[f"top1_{kind}"] = round(correct / total, 3)
+    return result
+
+def synthetic_price_list(filepath, rows, seed=42):
+    """Синтетический прайс Exchange UA той же структуры, что и настоящий .xlsx"""
+    rng = random.Random(seed)
+    price_rows = []
+    for i in range(rows):
+        stock = rng.randint(200, 40000) + 0.25
+        discount = rng.choice([0, 0, 0.124, 0.305])
+        part = PART_TYPES[i % len(PART_TYPES)].replace("_", " ").title()
+        price_rows.append((f"661-{i:06d}", f"{part}, iPhone {i // 7}", discount, stock))
+    synthetic_data.write_price_list(filepath, price_rows)
+
+def dom_price_rows(filepath):
+    """Для сравнения: весь лист в память одним деревом (как без потокового чтения)"""
+    with zipfile.ZipFile(filepath) as archive:
+        strings = [si.findtext(f"{{{synthetic_data.XLSX_NS}}}t") for si in
+                   ElementTree.fromstring(archive.read("xl/sharedStrings.xml"))]
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+        return strings, sheet
+
+def traced(func, *args):
+    """Результат, время и пик памяти (tracemalloc) вызова"""
+    tracemalloc.start()
+    try:
+        result, seconds = timed(func, *args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+def bench_exchange_ua(args):
+    """Потоковое чтение прайса .xlsx и хеш-соединение с service_parts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "synthetic_price_list.xlsx")
+        _, generate_seconds = timed(synthetic_price_list, filepath, args.rows)
+
+        (table, stats), read_seconds, read_peak = traced(exchange_prices.read_price_list, filepath)
+        _, dom_seconds, dom_peak = traced(dom_price_rows, filepath)
+
+        # Сторона зондирования: устройства, часть артикулов которых есть в прайсе
+        devices = synthetic_devices(args.devices)
+        for device in devices:
+            for part in device["service_parts"].values():
+                part["article"] = f"661-{random.randrange(args.rows * 2):06d}"
+        (joined, join_stats), join_seconds = timed(exchange_prices.join_service_parts, devices, table)
+
+        return {
+            "benchmark": "exchange-ua",
+            "rows": args.rows,
+            "xlsx_bytes": os.path.getsize(filepath),
+            "generate_seconds": round(generate_seconds, 3),
+            "stream_read_seconds": round(read_seconds, 3),
+            "stream_peak_mb": round(read_peak / 1024 / 1024, 1),
+            "dom_read_seconds": round(dom_seconds, 3),
+            "dom_peak_mb": round(dom_peak / 1024 / 1024, 1),
+            "articles": stats["articles"],
+            "join_parts": join_stats["matched"] + join_stats["missing"],
+            "join_matched": join_stats["matched"],
+            "join_seconds": round(join_seconds, 4)
+        }
+
+def scalar_price_matrix(devices, layers, rates):
+    """Для сравнения: та же матрица поячеечно, без numpy"""
+    rows = {}
+    for source, currency in price_matrix.SOURCES:
+        for model, parts in layers[source].items():
+            for part_type, price in parts.items():
+                cell = rows.setdefault(model, {})
+                if part_type not in cell:
+                    cell[part_type] = price / rates[currency]
+    return {
+        currency: {model: {t: round(usd * rate, 2) for t, usd in parts.items()} for model, parts in rows.items()}
+        for currency, rate in rates.items()
+    }
+
+def bench_price_matrix(args):
+    """Матрица цен по валютам: numpy против поячеечного пересчёта"""
+    if price_matrix.np is None:
+        raise SystemExit("numpy не установлен")
+    devices = synthetic_devices(args.devices)
+    rng = random.Random(7)
+    layers = {"sheet_ron": {}, "official_usd": {}, "exchange_uah": {}}
+    for device in devices:
+        name = device["name"]
+        layers["official_usd"][name] = {t: p["price_usd"] for t, p in device["service_parts"].items()}
+        if rng.random() < 0.2:
+            layers["sheet_ron"][name] = {t: rng.randint(200, 3000) for t in rng.sample(PART_TYPES, 3)}
+        if rng.random() < 0.3:
+            layers["exchange_uah"][name] = {t: rng.randint(1000, 40000) for t in PART_TYPES}
+    rates = dict(price_matrix.DEFAULT_RATES)
+
+    matrix, vector_seconds = timed(price_matrix.build, devices, layers, rates)
+    scalar, scalar_seconds = timed(scalar_price_matrix, devices, layers, rates)
+
+    # Выборочная сверка с поячеечным расчётом
+    mismatches = 0
+    for _ in range(1000):
+        row = rng.randrange(len(matrix["devices"]))
+        col = rng.randrange(len(matrix["part_types"]))
+        currency = rng.choice(matrix["currencies"])
+        expected = scalar[currency].get(matrix["devices"][row], {}).get(matrix["part_types"][col])
+        actual = matrix["prices"][currency][row][col]
+        mismatches += expected is None and actual is not None or expected is not None and abs(expected - actual) > 0.011
+
+    return {
+        "benchmark": "price-matrix",
+        "devices": len(matrix["devices"]),
+        "part_types": len(matrix["part_types"]),
+        "currencies": len(matrix["currencies"]),
+        "filled": matrix["stats"]["filled"],
+        "numpy_seconds": round(vector_seconds, 3),
+        "scalar_seconds": round(scalar_seconds, 3),
+        "sample_mismatches": mismatches
+    }
+
+def legacy_device(device):
+    """Для сравнения: устройство словарём, как его строил merge_devices до records"""
+    result = device.to_json()
+    for key in ("available_repairs", "board_numbers", "common_issues"):
+        if key in result:
+            result[key] = list(result[key])
+    return result
+
+def retained(func, *args):
+    """Результат, время и память, которая остаётся занятой после вызова"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result, seconds = timed(func, *args)
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return result, seconds, size
+
+def bench_records(args):
+    """Память merge_devices: записи со __slots__ против словарей"""
+    inputs = ["ifixit_data.json", "github_devices.json", "board_numbers.json",
+              "apple_parts_comprehensive.json", "ic_comprehensive.json"]
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w", encoding="utf-8") as devnull:
+        synthetic_data.generate(tmp, args.devices)
+        merge_all_data.OUTPUT_DIR = tmp
+        with contextlib.redirect_stdout(devnull):
+            # Входы разобраны заранее (json_cache) и в замер не попадают;
+            # лимит кэша снят, иначе на 100k устройств они вытесняются и разбираются заново
+            merge_all_data.json_cache.DOCUMENT_CACHE.max_bytes = float("inf")
+            for filename in inputs:
+                merge_all_data.load_json(filename)
+            devices, merge_seconds, records_bytes = retained(merge_all_data.merge_devices)
+        dicts, _, dicts_bytes = retained(lambda: [legacy_device(d) for d in devices])
+        text, encode_seconds = timed(json.dumps, devices, ensure_ascii=False,
+                                     default=merge_all_data.json_cache.json_default)
+        same_json = text == json.dumps(dicts, ensure_ascii=False)
+
+    return {
+        "benchmark": "records",
+        "devices": len(devices),
+        "merge_seconds": round(merge_seconds, 3),
+        "records_mb": round(records_bytes / 1024 / 1024, 1),
+        "dicts_mb": round(dicts_bytes / 1024 / 1024, 1),
+        "records_bytes_per_device": records_bytes // max(len(devices), 1),
+        "dicts_bytes_per_device": dicts_bytes // max(len(devices), 1),
+        "memory_ratio": round(records_bytes / dicts_bytes, 3) if dicts_bytes else None,
+        "encode_seconds": round(encode_seconds, 3),
+        "same_json": same_json
+    }
+
+def legacy_board_match(boards, name):
+    """Старый поиск платы: линейный проход с подстроками в обе стороны"""
+    for board_info in boards:
+        if board_info.get("name", "") in name or name in board_info.get("name", ""):
+            return board_info
+    return None
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def bench_device_index(args):
+    """Индекс плат по каноническому ключу против линейного поиска"""
+    boards = synthetic_iphone_boards(args.devices)
+    names = [b["name"] for b in boards]
+    rng = random.Random(7)
+    rng.shuffle(names)
+
+    (index, _), build_seconds = timed(device_keys.build_index, boards)
+    _, lookup_seconds = timed(lambda: [device_keys.lookup(index, n) for n in names])
+
+    # Старый алгоритм квадратичный — меряем на выборке и экстраполируем
+    sample = names[:args.legacy_sample]
+    _, legacy_sample_seconds = timed(lambda: [legacy_board_match(boards, n) for n in sample])
+    legacy_seconds = legacy_sample_seconds * len(names) / max(len(sample), 1)
+
+    indexed_seconds = build_seconds + lookup_seconds
+    return {
+        "benchmark": "device-index",
+        "devices": args.devices,
+        "index_build_seconds": round(build_seconds, 6),
+        "index_lookup_seconds": round(lookup_seconds, 6),
+        "legacy_sample": len(sample),
+        "legacy_seconds_extrapolated": round(legacy_seconds, 6),
+        "speedup": round(legacy_seconds / indexed_seconds, 1) if indexed_seconds else None
+    }
+
+def bench_device_pack(args):
+    """Размер и время разбора: devices.json против devices.bin"""
+    devices = synthetic_devices(args.devices)
+    text = json.dumps(devices, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    packed, pack_seconds = timed(device_pack.dumps, devices)
+
+    json_seconds = min(timed(json.loads, text)[1] for _ in range(3))
+    unpacked, bin_seconds = timed(device_pack.loads, packed)
+    bin_seconds = min([bin_seconds] + [timed(device_pack.loads, packed)[1] for _ in range(2)])
+
+    return {
+        "benchmark": "device-pack",
+        "devices": args.devices,
+        "json_bytes": len(text),
+        "bin_bytes": len(packed),
+        "size_ratio": round(len(packed) / len(text), 3),
+        "json_gz_bytes": len(gzip.compress(text, 9, mtime=0)),
+        "bin_gz_bytes": len(gzip.compress(packed, 9, mtime=0)),
+        "pack_seconds": round(pack_seconds, 6),
+        "json_parse_seconds": round(json_seconds, 6),
+        "bin_parse_seconds": round(bin_seconds, 6),
+        "round_trip_ok": unpacked == devices
+    }
+
+BENCHMARKS = {
+    "device-index": bench_device_index,
+    "device-pack": bench_device_pack,
+    "article-search": bench_article_search,
+    "device-lookup": bench_device_lookup,
+    "exchange-ua": bench_exchange_ua,
+    "price-matrix": bench_price_matrix,
+    "records": bench_records,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки merge_all_data")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--devices", type=int, default=10000, help="число синтетических устройств")
+    parser.add_argument("--articles", type=int, default=100000, help="число синтетических артикулов")
+    parser.add_argument("--rows", type=int, default=500000, help="строк в синтетическом прайсе .xlsx")
+    parser.add_argument("--queries", type=int, default=1000, help="число запросов в бенчмарке поиска")
+    parser.add_argument("--legacy-sample", type=int, default=1000,
+                        help="сколько запросов прогнать старым (линейным/квадратичным) алгоритмом")
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    args = parser.parse_args(argv)
+
+    result = BENCHMARKS[args.benchmark](args)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"  {key}: {value}")
+    return result
+
+if __name__ == "__main__":
+    main()
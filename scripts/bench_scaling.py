@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Масштабирование этапов merge_all_data.py на синтетических данных
+
+Для каждого размера генерируются входы (synthetic_data.py), затем этапы
+графа сборки выполняются по порядку, каждый в отдельном процессе: так
+пиковый RSS процесса — это пик именно этого этапа (плюс интерпретатор
+с импортами, он записан отдельно как baseline_rss_mb). Этапы читают
+результаты предыдущих с диска, как и при обычной сборке.
+Прайс Exchange UA, таблицы цен и master-db.json с курсами тоже
+синтетические, того же масштаба, — этапы не читают файлы репозитория.
+
+Запуск: python bench_scaling.py --sizes 1000,10000,100000
+        python bench_scaling.py --sizes 10000 --stages devices,article_search --report scaling.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: пиковый RSS не измеряется
+    resource = None
+
+import delta_patches
+import merge_all_data
+import synthetic_data
+
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_REPORT = "bench_scaling_report.json"
+
+def peak_rss_mb():
+    """Пиковый RSS текущего процесса в МБ.
+
+    На Linux — VmHWM из /proc: ru_maxrss наследуется от родителя через
+    fork/exec и показал бы пик процесса, сгенерировавшего данные.
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss: КБ на Linux, байты на macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+def _stage_worker(output_dir, name, queue):
+    """Выполнить один этап в чистом процессе и вернуть замеры"""
+    stages = dict(merge_all_data.STAGES)
+    merge_all_data.OUTPUT_DIR = output_dir
+    # Прайсы и курсы — синтетические того же масштаба, а не файлы репозитория
+    merge_all_data.EXCHANGE_DIR = os.path.join(output_dir, synthetic_data.EXCHANGE_DIR)
+    merge_all_data.SHEETS_DIR = os.path.join(output_dir, synthetic_data.SHEETS_DIR)
+    merge_all_data.MASTER_DB = os.path.join(output_dir, synthetic_data.MASTER_DB_FILE)
+    baseline = peak_rss_mb()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        _, record = merge_all_data.run_stage(name, stages[name])
+        seconds = time.perf_counter() - started
+        cpu_seconds = time.process_time() - cpu_started
+    outputs = sorted(record["outputs"])
+    queue.put({
+        "stage": name,
+        "seconds": round(seconds, 3),
+        "cpu_seconds": round(cpu_seconds, 3),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+        "outputs": len(outputs),
+        "output_bytes": sum(os.path.getsize(os.path.join(output_dir, f)) for f in outputs
+                            if os.path.exists(os.path.join(output_dir, f)))
+    })
+
+def run_stage(context, output_dir, name):
+    """Замеры этапа из отдельного процесса"""
+    queue = context.Queue()
+    process = context.Process(target=_stage_worker, args=(output_dir, name, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return {"stage": name, "error": f"exit code {process.exitcode}"}
+    return queue.get()
+
+def bench_size(context, devices, stages, seed, keep_dir=None):
+    """Сгенерировать входы на devices устройств и прогнать этапы"""
+    output_dir = keep_dir or tempfile.mkdtemp(prefix=f"nexx-bench-{devices}-")
+    try:
+        started = time.perf_counter()
+        inputs = synthetic_data.generate(output_dir, devices, seed)
+        generate_seconds = time.perf_counter() - started
+        print(f"\n📦 {devices} устройств: входы {sum(inputs.values()) / 1024 / 1024:.1f} МБ "
+              f"за {generate_seconds:.1f} с")
+
+        results = []
+        for name in stages:
+            result = run_stage(context, output_dir, name)
+            results.append(result)
+            if "error" in result:
+                print(f"  ❌ {name:<20} {result['error']}")
+            else:
+                peak = "—" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.0f} МБ"
+                print(f"  {name:<20} {result['seconds']:>9.3f} с  RSS {peak:>8}  "
+                      f"выход {result['output_bytes'] / 1024:>10.1f} КБ")
+        return {
+            "devices": devices,
+            "generate_seconds": round(generate_seconds, 3),
+            "input_bytes": inputs,
+            "total_seconds": round(sum(r.get("seconds", 0) for r in results), 3),
+            "stages": results
+        }
+    finally:
+        if keep_dir is None:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            shutil.rmtree(delta_patches.snapshot_dir(output_dir), ignore_errors=True)
+
+def main(argv=None):
+    stage_names = [name for name, _ in merge_all_data.STAGES]
+    parser = argparse.ArgumentParser(description="Масштабирование этапов merge_all_data.py")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="число устройств через запятую")
+    parser.add_argument("--stages", default=",".join(stage_names),
+                        help="этапы через запятую (по умолчанию все, в порядке графа)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="путь к JSON отчёту")
+    parser.add_argument("--keep", help="каталог для данных последнего размера (не удаляется)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(stage_names)
+    if unknown:
+        parser.error(f"неизвестные этапы: {', '.join(sorted(unknown))}")
+    # Этапы выполняются в порядке графа, даже если перечислены иначе
+    stages = [name for name in stage_names if name in stages]
+    if peak_rss_mb() is None:
+        print("⚠️ Пиковый RSS на этой платформе не измеряется")
+
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for i, devices in enumerate(sizes):
+        keep_dir = args.keep if args.keep and i == len(sizes) - 1 else None
+        runs.append(bench_size(context, devices, stages, args.seed, keep_dir))
+
+    report = {
+        "benchmark": "merge-scaling",
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "stages": stages,
+        "runs": runs
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Отчёт: {args.report}")
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Обратный индекс номеров плат (board_index.json).
+
+Номер платы (820-xxxxx) → все устройства, модельные номера, EMC и годы,
+где эта плата стоит. Одна плата бывает у нескольких моделей и лет
+(820-00165 — MacBook Air 13" Early 2015 и 2017, 820-01521 — 2018 и 2019),
+а у одного устройства бывает несколько плат (iPhone X: 820-00863/820-00864).
+Поиск — одно обращение к словарю по нормализованному номеру.
+"""
+import re
+
+import device_keys
+import records
+
+# Секции board_numbers.json и категории устройств
+SECTIONS = [
+    ("iphones", "iPhone"),
+    ("ipads", "iPad"),
+    ("macbooks", "Mac"),
+]
+
+_BOARD = re.compile(r"^(\d{3})\s*-?\s*(\d{4,5})$")
+
+def normalize_board(board):
+    """Номер платы в виде 820-xxxxx: "82000165", "820 00165" → "820-00165" """
+    text = str(board or "").strip().upper()
+    match = _BOARD.match(text)
+    if match:
+        return f"{match.group(1)}-{match.group(2)}"
+    return text
+
+def board_list(board):
+    """Поле board: строка или список плат"""
+    if isinstance(board, (list, tuple)):
+        return [b for b in board if b]
+    return [board] if board else []
+
+def _append_unique(values, value):
+    if value and value not in values:
+        values.append(value)
+
+def build(boards):
+    """Индекс {плата: {devices, models, emc, years, shared}} по board_numbers.json;
+    devices — записи records.BoardEntry"""
+    index = {}
+    for section, category in SECTIONS:
+        for entry in boards.get(section, []):
+            for board in board_list(entry.get("board")):
+                key = normalize_board(board)
+                record = index.setdefault(key, {
+                    "board": key,
+                    "devices": [],
+                    "models": [],
+                    "emc": [],
+                    "years": [],
+                })
+                record["devices"].append(records.BoardEntry(
+                    entry.get("name", ""),
+                    device_keys.canonical_key(entry.get("name", "")),
+                    category,
+                    entry.get("model", ""),
+                    entry.get("emc", ""),
+                    entry.get("year", 0)
+                ))
+                for model in str(entry.get("model", "")).split("/"):
+                    _append_unique(record["models"], model.strip())
+                _append_unique(record["emc"], entry.get("emc", ""))
+                _append_unique(record["years"], entry.get("year", 0))
+
+    for record in index.values():
+        record["years"].sort()
+        record["shared"] = len(record["devices"]) > 1
+    return index
+
+def lookup(index, board):
+    """Запись индекса по номеру платы (в любом написании) или None"""
+    return index.get(normalize_board(board))
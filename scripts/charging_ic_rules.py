@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Таблица контроллеров зарядки (Tristar/Hydra/Tigris/USB-C) по категориям и годам.
+
+Правила декларативные: новое поколение — это новая строка в CHARGING_IC_RULES,
+а не очередная ветка if/elif. При импорте таблица компилируется в индекс
+по категориям, поиск по году — bisect, O(log n).
+"""
+from bisect import bisect_right
+
+import device_keys
+
+OPEN_END = 9999
+
+# category — категория устройства (для iPad — линейка), years — включительно
+CHARGING_IC_RULES = [
+    # iPhone
+    {"category": "iPhone", "years": (0, 2013), "main": "1610A1", "designation": "Tristar U2", "connector": "Lightning"},
+    {"category": "iPhone", "years": (2014, 2014), "main": "1610A2", "designation": "Tristar U2", "connector": "Lightning"},
+    {"category": "iPhone", "years": (2015, 2015), "main": "1610A3", "designation": "Tristar U2", "connector": "Lightning"},
+    {"category": "iPhone", "years": (2016, 2016), "main": "1612A1", "designation": "Hydra", "connector": "Lightning"},
+    {"category": "iPhone", "years": (2017, 2017), "main": "SN2501", "designation": "Hydra U3300", "connector": "Lightning"},
+    {"category": "iPhone", "years": (2018, 2019), "main": "SN2600B1", "designation": "Tigris", "connector": "Lightning"},
+    {"category": "iPhone", "years": (2020, 2022), "main": "SN2611D0", "designation": "Tristar U3300", "connector": "Lightning"},
+    {"category": "iPhone", "years": (2023, OPEN_END), "main": "SN2800", "designation": "USB-C Controller", "connector": "USB-C"},
+
+    # iPad
+    {"category": "iPad Pro", "years": (0, 2017), "main": "SN2611D0", "designation": "Tristar", "connector": "Lightning"},
+    {"category": "iPad Pro", "years": (2018, OPEN_END), "main": "SN2800", "designation": "USB-C Controller", "connector": "USB-C"},
+    {"category": "iPad Air", "years": (0, 2019), "main": "SN2611D0", "designation": "Tristar", "connector": "Lightning"},
+    {"category": "iPad Air", "years": (2020, OPEN_END), "main": "SN2800", "designation": "USB-C Controller", "connector": "USB-C"},
+    {"category": "iPad mini", "years": (0, 2020), "main": "SN2611D0", "designation": "Tristar", "connector": "Lightning"},
+    {"category": "iPad mini", "years": (2021, OPEN_END), "main": "SN2800", "designation": "USB-C Controller", "connector": "USB-C"},
+    {"category": "iPad", "years": (0, OPEN_END), "main": "SN2611D0", "designation": "Tristar", "connector": "Lightning"},
+
+    # Mac — PD контроллер, не входит в каталог CHARGING_ICS
+    {"category": "Mac", "years": (0, OPEN_END), "main": "USB-C PD Controller", "designation": "CD3217", "connector": "USB-C", "catalog": False},
+]
+
+# Линейки iPad с собственными правилами
+IPAD_LINES = {"ipad pro": "iPad Pro", "ipad air": "iPad Air", "ipad mini": "iPad mini"}
+
+def compile_rules(rules):
+    """Скомпилировать таблицу в {категория: (начала интервалов, правила)}"""
+    by_category = {}
+    for rule in rules:
+        by_category.setdefault(rule["category"], []).append(rule)
+
+    index = {}
+    for category, category_rules in by_category.items():
+        category_rules.sort(key=lambda r: r["years"][0])
+        for prev, rule in zip(category_rules, category_rules[1:]):
+            if rule["years"][0] <= prev["years"][1]:
+                raise ValueError(f"Пересекаются правила {category}: {prev['years']} и {rule['years']}")
+        index[category] = ([r["years"][0] for r in category_rules], category_rules)
+    return index
+
+CHARGING_IC_INDEX = compile_rules(CHARGING_IC_RULES)
+
+def rule_category(category, name=""):
+    """Категория правила: для iPad уточняется линейка по имени"""
+    if category == "iPad":
+        family = device_keys.model_signature(name)["family"]
+        return IPAD_LINES.get(family, "iPad")
+    return category
+
+def find_rule(category, year, name=""):
+    """Правило для устройства или None"""
+    compiled = CHARGING_IC_INDEX.get(rule_category(category, name))
+    if not compiled:
+        return None
+    starts, rules = compiled
+    position = bisect_right(starts, year or 0) - 1
+    if position < 0:
+        return None
+    rule = rules[position]
+    return rule if (year or 0) <= rule["years"][1] else None
+
+def resolve_charging_ic(category, year, name=""):
+    """(charging_ic, connector_type) для устройства или (None, None)"""
+    rule = find_rule(category, year, name)
+    if not rule:
+        return None, None
+    return {"main": rule["main"], "designation": rule["designation"]}, rule["connector"]
+
+def base_part_number(ic_name):
+    """Базовый номер IC: "SN2600B1/B2" -> "SN2600B1", "1612A1 (Hydra)" -> "1612A1" """
+    return ic_name.split(" ")[0].split("/")[0]
+
+def validate_rules(charging_ics, rules=CHARGING_IC_RULES):
+    """Проверить, что все IC из таблицы есть в каталоге CHARGING_ICS"""
+    known = {base_part_number(ic.get("name", "")) for ic in charging_ics}
+    problems = []
+    for rule in rules:
+        if rule.get("catalog", True) and rule["main"] not in known:
+            problems.append(f"{rule['category']} {rule['years']}: {rule['main']} нет в CHARGING_ICS")
+    return problems
+
+def generations_table(rules=CHARGING_IC_RULES):
+    """Таблица поколений для выгрузки (без служебных полей)"""
+    return [
+        {
+            "category": rule["category"],
+            "year_from": rule["years"][0] or None,
+            "year_to": None if rule["years"][1] == OPEN_END else rule["years"][1],
+            "ic": rule["main"],
+            "designation": rule["designation"],
+            "connector": rule["connector"]
+        }
+        for rule in rules
+    ]
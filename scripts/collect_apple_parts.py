@@ -3,8 +3,11 @@
 База артикулов Apple Self Service Repair и официальных запчастей
 Данные собраны из публичных источников
 """
-import json
 import os
+import time
+
+import json_writer
+import run_manifest
 
 OUTPUT_DIR = "/home/user/webapp/public/data"
 
@@ -334,6 +337,7 @@ APPLE_TOOLS = {
 }
 
 def main():
+    started = time.perf_counter()
     print("=" * 60)
     print("📱 Генерация базы артикулов Apple")
     print("=" * 60)
@@ -348,7 +352,7 @@ def main():
     
     result = {
         "source": "Apple Self Service Repair + AASP",
-        "collected_at": __import__("time").strftime("%Y-%m-%d %H:%M:%S"),
+        "collected_at": time.strftime("%Y-%m-%d %H:%M:%S"),
         "currency": "USD",
         "parts_by_model": APPLE_PARTS,
         "tools": APPLE_TOOLS,
@@ -360,16 +364,16 @@ def main():
     }
     
     output_file = os.path.join(OUTPUT_DIR, "apple_parts_comprehensive.json")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    json_writer.write_json(result, output_file, compress=())
     
     print(f"\n✅ Сохранено в {output_file}")
     print(f"📊 Моделей: {models_count}")
     print(f"📊 Всего артикулов: {total_parts}")
     print(f"📊 Инструментов: {len(APPLE_TOOLS)}")
     
+    run_manifest.record("collect_apple_parts", "collector", result["stats"], time.perf_counter() - started,
+                        OUTPUT_DIR, artifacts=[output_file])
+    
     return result
 
 if __name__ == "__main__":
@@ -2,8 +2,11 @@
 """
 Полная база кодов ошибок iTunes/Finder и Mac диагностики
 """
-import json
 import os
+import time
+
+import json_writer
+import run_manifest
 
 OUTPUT_DIR = "/home/user/webapp/public/data"
 
@@ -209,13 +212,14 @@ MAC_DIAGNOSTICS = [
 ]
 
 def main():
+    started = time.perf_counter()
     print("=" * 60)
     print("🚨 Генерация полной базы кодов ошибок")
     print("=" * 60)
     
     result = {
         "source": "Apple Support + Community Knowledge",
-        "collected_at": __import__("time").strftime("%Y-%m-%d %H:%M:%S"),
+        "collected_at": time.strftime("%Y-%m-%d %H:%M:%S"),
         "itunes_restore_errors": ITUNES_ERRORS,
         "mac_diagnostics": MAC_DIAGNOSTICS,
         "stats": {
@@ -226,16 +230,16 @@ def main():
     }
     
     output_file = os.path.join(OUTPUT_DIR, "error_codes_comprehensive.json")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    json_writer.write_json(result, output_file, compress=())
     
     print(f"\n✅ Сохранено в {output_file}")
     print(f"📊 iTunes ошибок: {len(ITUNES_ERRORS)}")
     print(f"📊 Mac диагностика: {len(MAC_DIAGNOSTICS)}")
     print(f"📊 Всего: {result['stats']['total']}")
     
+    run_manifest.record("collect_error_codes", "collector", result["stats"], time.perf_counter() - started,
+                        OUTPUT_DIR, artifacts=[output_file])
+    
     return result
 
 if __name__ == "__main__":
@@ -2,29 +2,45 @@
 """
 Сбор данных Apple устройств с GitHub репозиториев
 """
-import json
-import requests
+import argparse
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_cache
+import http_client
+import json_writer
+import run_manifest
 
 OUTPUT_DIR = "/home/user/webapp/public/data"
 
-def collect_device_identifiers():
+def fetch_device_identifiers(platform):
+    """Список идентификаторов одной платформы"""
+    url = f"https://raw.githubusercontent.com/kyle-seongwoo-jun/apple-device-identifiers/main/{platform}/device-identifiers.json"
+    try:
+        resp = http_client.get(url)
+        if resp.status_code == 200:
+            data = resp.json()
+            print(f"  ✅ {platform}: {len(data)} устройств")
+            return data
+    except Exception as e:
+        print(f"  ❌ {platform}: {e}")
+    return None
+
+def collect_device_identifiers(executor=None):
     """Собрать данные с kyle-seongwoo-jun/apple-device-identifiers"""
     print("📱 Сбор apple-device-identifiers...")
     
-    devices = {}
     platforms = ["ios", "watchos", "tvos"]
+    if executor:
+        results = list(executor.map(fetch_device_identifiers, platforms))
+    else:
+        results = [fetch_device_identifiers(p) for p in platforms]
     
-    for platform in platforms:
-        url = f"https://raw.githubusercontent.com/kyle-seongwoo-jun/apple-device-identifiers/main/{platform}/device-identifiers.json"
-        try:
-            resp = requests.get(url, timeout=30)
-            if resp.status_code == 200:
-                data = resp.json()
-                devices[platform] = data
-                print(f"  ✅ {platform}: {len(data)} устройств")
-        except Exception as e:
-            print(f"  ❌ {platform}: {e}")
+    devices = {}
+    for platform, data in zip(platforms, results):
+        if data is not None:
+            devices[platform] = data
     
     return devices
 
@@ -34,7 +50,7 @@ def collect_ios_device_list():
     
     url = "https://raw.githubusercontent.com/pbakondy/ios-device-list/master/devices.json"
     try:
-        resp = requests.get(url, timeout=30)
+        resp = http_client.get(url)
         if resp.status_code == 200:
             data = resp.json()
             print(f"  ✅ {len(data)} устройств")
@@ -50,7 +66,7 @@ def collect_adamawolf_list():
     
     url = "https://gist.githubusercontent.com/adamawolf/3048717/raw/apple-machine-identifiers.txt"
     try:
-        resp = requests.get(url, timeout=30)
+        resp = http_client.get(url)
         if resp.status_code == 200:
             lines = resp.text.strip().split("\n")
             devices = []
@@ -171,15 +187,27 @@ def process_and_normalize(device_identifiers, ios_list, adamawolf):
         "total": len(all_devices)
     }
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сбор данных Apple устройств с GitHub")
+    parser.add_argument("--offline", action="store_true",
+                        help="не ходить в сеть, отдавать ответы только из HTTP кэша")
+    args = parser.parse_args(argv)
+    
+    started = time.perf_counter()
+    if args.offline:
+        http_cache.set_offline()
+    
     print("=" * 60)
     print("📱 Сбор данных Apple устройств с GitHub")
     print("=" * 60)
     
-    # Сбор из разных источников
-    device_identifiers = collect_device_identifiers()
-    ios_list = collect_ios_device_list()
-    adamawolf = collect_adamawolf_list()
+    # Сбор из разных источников — все запросы параллельно
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        ios_future = executor.submit(collect_ios_device_list)
+        adamawolf_future = executor.submit(collect_adamawolf_list)
+        device_identifiers = collect_device_identifiers(executor)
+        ios_list = ios_future.result()
+        adamawolf = adamawolf_future.result()
     
     # Нормализация
     normalized = process_and_normalize(device_identifiers, ios_list, adamawolf)
@@ -192,18 +220,23 @@ def main():
             "pbakondy/ios-device-list",
             "adamawolf/apple-machine-identifiers"
         ],
-        "collected_at": __import__("time").strftime("%Y-%m-%d %H:%M:%S"),
+        "collected_at": time.strftime("%Y-%m-%d %H:%M:%S"),
         "devices": normalized
     }
     
     output_file = os.path.join(OUTPUT_DIR, "github_devices.json")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    json_writer.write_json(result, output_file, compress=())
     
     print(f"\n✅ Сохранено в {output_file}")
     print(f"📊 Всего: {normalized['total']} устройств")
+    http_cache.flush()
+    net = http_client.stats()
+    print(f"📦 HTTP: {net['requests_sent']} запросов, {net['revalidated']} не изменились (304), "
+          f"{net['offline_hits']} offline, {net['coalesced']} объединено")
+    
+    counts = {key: len(value) if isinstance(value, list) else value for key, value in normalized.items()}
+    run_manifest.record("collect_github_devices", "collector", counts, time.perf_counter() - started,
+                        OUTPUT_DIR, http=net, artifacts=[output_file])
     
     return result
 
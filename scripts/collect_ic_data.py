@@ -2,8 +2,11 @@
 """
 Сбор данных по микросхемам Apple устройств (Tristar, Hydra, Power ICs и др.)
 """
-import json
 import os
+import time
+
+import json_writer
+import run_manifest
 
 OUTPUT_DIR = "/home/user/webapp/public/data"
 
@@ -506,13 +509,14 @@ BIOMETRIC_ICS = [
 ]
 
 def main():
+    started = time.perf_counter()
     print("=" * 60)
     print("🔌 Сбор данных по микросхемам Apple")
     print("=" * 60)
     
     result = {
         "source": "Compiled from repair community knowledge",
-        "collected_at": __import__("time").strftime("%Y-%m-%d %H:%M:%S"),
+        "collected_at": time.strftime("%Y-%m-%d %H:%M:%S"),
         "charging_ics": CHARGING_ICS,
         "power_ics": POWER_ICS,
         "audio_ics": AUDIO_ICS,
@@ -534,10 +538,7 @@ def main():
     }
     
     output_file = os.path.join(OUTPUT_DIR, "ic_comprehensive.json")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    json_writer.write_json(result, output_file, compress=())
     
     print(f"\n✅ Сохранено в {output_file}")
     print(f"📊 Charging: {len(CHARGING_ICS)}, Power: {len(POWER_ICS)}, Audio: {len(AUDIO_ICS)}")
@@ -545,6 +546,9 @@ def main():
     print(f"📊 Biometric: {len(BIOMETRIC_ICS)}")
     print(f"📊 Всего: {result['stats']['total']} микросхем")
     
+    run_manifest.record("collect_ic_data", "collector", result["stats"], time.perf_counter() - started,
+                        OUTPUT_DIR, artifacts=[output_file])
+    
     return result
 
 if __name__ == "__main__":
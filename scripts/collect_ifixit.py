@@ -3,14 +3,81 @@
 Сбор данных с iFixit API
 https://www.ifixit.com/api/2.0/
 """
-import json
-import requests
-import time
+import argparse
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-BASE_URL = "https://www.ifixit.com/api/2.0"
+import http_cache
+import http_client
+import json_writer
+import run_manifest
+
+BASE_URL = os.environ.get("IFIXIT_API_URL", "https://www.ifixit.com/api/2.0")
 OUTPUT_DIR = "/home/user/webapp/public/data"
 
+# Конкурентный сбор: запросов одновременно и лимит запросов в секунду
+DEFAULT_CONCURRENCY = 6
+DEFAULT_RATE = 5.0
+
+# Гайды читаются страницами: размер страницы и сколько страниц запрашивать разом
+GUIDES_PAGE_SIZE = 100
+GUIDES_PAGE_WINDOW = 3
+
+# Список всех моделей iPhone
+IPHONE_MODELS = [
+    "iPhone 16 Pro Max", "iPhone 16 Pro", "iPhone 16 Plus", "iPhone 16",
+    "iPhone 15 Pro Max", "iPhone 15 Pro", "iPhone 15 Plus", "iPhone 15",
+    "iPhone 14 Pro Max", "iPhone 14 Pro", "iPhone 14 Plus", "iPhone 14",
+    "iPhone 13 Pro Max", "iPhone 13 Pro", "iPhone 13 mini", "iPhone 13",
+    "iPhone 12 Pro Max", "iPhone 12 Pro", "iPhone 12 mini", "iPhone 12",
+    "iPhone 11 Pro Max", "iPhone 11 Pro", "iPhone 11",
+    "iPhone XS Max", "iPhone XS", "iPhone XR", "iPhone X",
+    "iPhone 8 Plus", "iPhone 8", "iPhone 7 Plus", "iPhone 7",
+    "iPhone 6s Plus", "iPhone 6s", "iPhone 6 Plus", "iPhone 6",
+    "iPhone SE 3rd Generation", "iPhone SE 2nd Generation", "iPhone SE"
+]
+
+IPAD_MODELS = [
+    "iPad Pro 12.9\" 6th Gen", "iPad Pro 11\" 4th Gen",
+    "iPad Pro 12.9\" 5th Gen", "iPad Pro 11\" 3rd Gen",
+    "iPad Air 5", "iPad Air 4",
+    "iPad 10", "iPad 9",
+    "iPad mini 6", "iPad mini 5"
+]
+
+MAC_MODELS = [
+    "MacBook Pro 16\" 2023", "MacBook Pro 14\" 2023",
+    "MacBook Pro 16\" 2021", "MacBook Pro 14\" 2021",
+    "MacBook Air M3", "MacBook Air M2", "MacBook Air M1",
+    "iMac 24\" M3", "iMac 24\" M1",
+    "Mac mini M2", "Mac mini M1",
+    "Mac Studio M2", "Mac Studio M1",
+    "Mac Pro 2023"
+]
+
+class TokenBucket:
+    """Ограничитель частоты запросов (token bucket) для asyncio"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 def get_categories():
     """Получить все категории Apple устройств"""
     categories = []
@@ -19,7 +86,7 @@ def get_categories():
     for cat in apple_categories:
         try:
             url = f"{BASE_URL}/categories/{cat}"
-            resp = requests.get(url, timeout=30)
+            resp = http_client.get(url)
             if resp.status_code == 200:
                 data = resp.json()
                 categories.append({
@@ -33,186 +100,204 @@ def get_categories():
     
     return categories
 
+def wiki_url(name):
+    """URL wiki категории устройства"""
+    return f"{BASE_URL}/wikis/CATEGORY/{name}"
+
+def guides_url(category, limit=GUIDES_PAGE_SIZE, offset=0):
+    """URL страницы списка гайдов категории"""
+    url = f"{BASE_URL}/guides?category={category}&limit={limit}"
+    if offset:
+        url += f"&offset={offset}"
+    return url
+
 def get_device_info(device_name):
     """Получить информацию об устройстве"""
     try:
-        url = f"{BASE_URL}/wikis/CATEGORY/{device_name}"
-        resp = requests.get(url, timeout=30)
-        if resp.status_code == 200:
-            return resp.json()
-    except:
-        pass
-    return None
+        return http_client.get_json(wiki_url(device_name))
+    except Exception:
+        return None
 
 def get_guides(category):
     """Получить гайды для категории"""
     try:
-        url = f"{BASE_URL}/guides?category={category}&limit=50"
-        resp = requests.get(url, timeout=30)
-        if resp.status_code == 200:
-            return resp.json()
-    except:
-        pass
-    return []
-
-def collect_iphone_data():
+        return http_client.get_json(guides_url(category, limit=50)) or []
+    except Exception:
+        return []
+
+def encode_model(model):
+    """Имя модели в формате URL iFixit"""
+    return model.replace(" ", "_").replace('"', "")
+
+def classify_guide(guide, repair_types):
+    """Добавить вид ремонта по заголовку гайда"""
+    title = guide.get("title", "").lower()
+    if "battery" in title:
+        repair_types.add("battery")
+    if "screen" in title or "display" in title:
+        repair_types.add("display")
+    if "camera" in title:
+        repair_types.add("camera")
+    if "speaker" in title:
+        repair_types.add("speaker")
+    if "charging" in title or "port" in title:
+        repair_types.add("charging_port")
+
+def classify_guides(guides):
+    """Извлечь виды ремонта из заголовков гайдов"""
+    repair_types = set()
+    for guide in guides:
+        classify_guide(guide, repair_types)
+    return list(repair_types)
+
+def use_request_threads(concurrency):
+    """Пул потоков под блокирующие HTTP запросы — по потоку на запрос в полёте"""
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+async def fetch_json(url, limiter, semaphore):
+    """GET с ограничением частоты и числа одновременных запросов"""
+    async with semaphore:
+        await limiter.acquire()
+        return await asyncio.to_thread(http_client.get_json, url)
+
+class GuidesUnavailable(Exception):
+    """Первая страница гайдов не получена"""
+
+async def iter_guides(encoded, limiter, semaphore, page_size=GUIDES_PAGE_SIZE, window=GUIDES_PAGE_WINDOW):
+    """Гайды категории по мере прихода страниц (offset/limit).
+
+    Первая страница запрашивается одна — у большинства моделей гайдов меньше
+    страницы. Если она полная, следующие страницы идут окнами по window штук
+    одновременно (в рамках общего лимита частоты). Короткая страница — конец.
+    """
+    first = await fetch_json(guides_url(encoded, page_size), limiter, semaphore)
+    if first is None:
+        raise GuidesUnavailable(encoded)
+    for guide in first:
+        yield guide
+    if len(first) < page_size:
+        return
+
+    offset = page_size
+    while True:
+        pages = await asyncio.gather(*(
+            fetch_json(guides_url(encoded, page_size, offset + i * page_size), limiter, semaphore)
+            for i in range(window)
+        ))
+        for i, page in enumerate(pages):
+            if page is None:
+                raise GuidesUnavailable(f"{encoded} offset={offset + i * page_size}")
+            for guide in page:
+                yield guide
+            if len(page) < page_size:
+                return
+        offset += window * page_size
+
+async def summarize_guides(encoded, limiter, semaphore):
+    """Число гайдов и виды ремонта — классификация на потоке, без списка гайдов.
+
+    None — не получена первая страница; если оборвалась одна из следующих,
+    возвращается то, что успели прочитать.
+    """
+    count = 0
+    repair_types = set()
+    try:
+        async for guide in iter_guides(encoded, limiter, semaphore):
+            count += 1
+            classify_guide(guide, repair_types)
+    except GuidesUnavailable as e:
+        if not count:
+            return None
+        # Следующая страница не пришла: уже учтённые гайды не отбрасываются
+        print(f"⚠️ {e}: список гайдов неполный, учтено {count}")
+    return count, list(repair_types)
+
+async def collect_model(model, with_guides, limiter, semaphore):
+    """Wiki и гайды модели запрашиваются одновременно"""
+    encoded = encode_model(model)
+    try:
+        fetches = [fetch_json(wiki_url(encoded), limiter, semaphore)]
+        if with_guides:
+            fetches.append(summarize_guides(encoded, limiter, semaphore))
+        data, *guides = await asyncio.gather(*fetches)
+        if data is None:
+            return None
+        # Битый ответ ("image": null, не объект) пропускает только эту модель
+        device = {
+            "name": model,
+            "ifixit_url": f"https://www.ifixit.com/Device/{encoded}",
+            "image": (data.get("image") or {}).get("standard"),
+            "summary": data.get("summary"),
+            "repairability": data.get("repairability")
+        }
+    except Exception as e:
+        print(f"❌ {model}: {e}")
+        return None
+
+    if with_guides:
+        device["parts"] = []
+        device["guides_count"] = 0
+        if guides[0] is not None:
+            device["guides_count"], device["available_repairs"] = guides[0]
+        print(f"✅ {model}: {device['guides_count']} guides")
+    else:
+        print(f"✅ {model}")
+
+    return device
+
+async def collect_models(models, with_guides, limiter, semaphore):
+    """Собрать модели конкурентно, сохранив исходный порядок"""
+    devices = await asyncio.gather(*(collect_model(m, with_guides, limiter, semaphore) for m in models))
+    return [d for d in devices if d]
+
+async def collect_all(concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE):
+    """Собрать iPhone, iPad и Mac в одном цикле событий"""
+    limiter = TokenBucket(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    use_request_threads(concurrency)
+    return await asyncio.gather(
+        collect_models(IPHONE_MODELS, True, limiter, semaphore),
+        collect_models(IPAD_MODELS, False, limiter, semaphore),
+        collect_models(MAC_MODELS, False, limiter, semaphore)
+    )
+
+def collect_iphone_data(concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE):
     """Собрать данные по iPhone"""
-    iphones = []
-    
-    # Список всех моделей iPhone
-    models = [
-        "iPhone 16 Pro Max", "iPhone 16 Pro", "iPhone 16 Plus", "iPhone 16",
-        "iPhone 15 Pro Max", "iPhone 15 Pro", "iPhone 15 Plus", "iPhone 15",
-        "iPhone 14 Pro Max", "iPhone 14 Pro", "iPhone 14 Plus", "iPhone 14",
-        "iPhone 13 Pro Max", "iPhone 13 Pro", "iPhone 13 mini", "iPhone 13",
-        "iPhone 12 Pro Max", "iPhone 12 Pro", "iPhone 12 mini", "iPhone 12",
-        "iPhone 11 Pro Max", "iPhone 11 Pro", "iPhone 11",
-        "iPhone XS Max", "iPhone XS", "iPhone XR", "iPhone X",
-        "iPhone 8 Plus", "iPhone 8", "iPhone 7 Plus", "iPhone 7",
-        "iPhone 6s Plus", "iPhone 6s", "iPhone 6 Plus", "iPhone 6",
-        "iPhone SE 3rd Generation", "iPhone SE 2nd Generation", "iPhone SE"
-    ]
-    
-    for model in models:
-        try:
-            encoded = model.replace(" ", "_")
-            url = f"{BASE_URL}/wikis/CATEGORY/{encoded}"
-            resp = requests.get(url, timeout=30)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                device = {
-                    "name": model,
-                    "ifixit_url": f"https://www.ifixit.com/Device/{encoded}",
-                    "image": data.get("image", {}).get("standard"),
-                    "summary": data.get("summary"),
-                    "repairability": data.get("repairability"),
-                    "parts": [],
-                    "guides_count": 0
-                }
-                
-                # Получить гайды
-                guides_url = f"{BASE_URL}/guides?category={encoded}&limit=100"
-                guides_resp = requests.get(guides_url, timeout=30)
-                if guides_resp.status_code == 200:
-                    guides = guides_resp.json()
-                    device["guides_count"] = len(guides)
-                    
-                    # Извлечь виды ремонта из гайдов
-                    repair_types = set()
-                    for guide in guides:
-                        title = guide.get("title", "").lower()
-                        if "battery" in title:
-                            repair_types.add("battery")
-                        if "screen" in title or "display" in title:
-                            repair_types.add("display")
-                        if "camera" in title:
-                            repair_types.add("camera")
-                        if "speaker" in title:
-                            repair_types.add("speaker")
-                        if "charging" in title or "port" in title:
-                            repair_types.add("charging_port")
-                    
-                    device["available_repairs"] = list(repair_types)
-                
-                iphones.append(device)
-                print(f"✅ {model}: {device['guides_count']} guides")
-            
-            time.sleep(0.3)
-            
-        except Exception as e:
-            print(f"❌ {model}: {e}")
-    
-    return iphones
+    return asyncio.run(_collect_single(IPHONE_MODELS, True, concurrency, rate))
 
-def collect_ipad_data():
+def collect_ipad_data(concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE):
     """Собрать данные по iPad"""
-    ipads = []
-    
-    models = [
-        "iPad Pro 12.9\" 6th Gen", "iPad Pro 11\" 4th Gen",
-        "iPad Pro 12.9\" 5th Gen", "iPad Pro 11\" 3rd Gen",
-        "iPad Air 5", "iPad Air 4",
-        "iPad 10", "iPad 9",
-        "iPad mini 6", "iPad mini 5"
-    ]
-    
-    for model in models:
-        try:
-            encoded = model.replace(" ", "_").replace('"', "")
-            url = f"{BASE_URL}/wikis/CATEGORY/{encoded}"
-            resp = requests.get(url, timeout=30)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                ipads.append({
-                    "name": model,
-                    "ifixit_url": f"https://www.ifixit.com/Device/{encoded}",
-                    "image": data.get("image", {}).get("standard"),
-                    "summary": data.get("summary"),
-                    "repairability": data.get("repairability")
-                })
-                print(f"✅ {model}")
-            
-            time.sleep(0.3)
-            
-        except Exception as e:
-            print(f"❌ {model}: {e}")
-    
-    return ipads
+    return asyncio.run(_collect_single(IPAD_MODELS, False, concurrency, rate))
 
-def collect_mac_data():
+def collect_mac_data(concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE):
     """Собрать данные по Mac"""
-    macs = []
+    return asyncio.run(_collect_single(MAC_MODELS, False, concurrency, rate))
+
+async def _collect_single(models, with_guides, concurrency, rate):
+    use_request_threads(concurrency)
+    return await collect_models(models, with_guides, TokenBucket(rate), asyncio.Semaphore(concurrency))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сбор данных с iFixit API")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="запросов одновременно")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="лимит запросов в секунду")
+    parser.add_argument("--offline", action="store_true",
+                        help="не ходить в сеть, отдавать ответы только из HTTP кэша")
+    args = parser.parse_args(argv)
     
-    models = [
-        "MacBook Pro 16\" 2023", "MacBook Pro 14\" 2023",
-        "MacBook Pro 16\" 2021", "MacBook Pro 14\" 2021",
-        "MacBook Air M3", "MacBook Air M2", "MacBook Air M1",
-        "iMac 24\" M3", "iMac 24\" M1",
-        "Mac mini M2", "Mac mini M1",
-        "Mac Studio M2", "Mac Studio M1",
-        "Mac Pro 2023"
-    ]
+    started = time.perf_counter()
+    if args.offline:
+        http_cache.set_offline()
     
-    for model in models:
-        try:
-            encoded = model.replace(" ", "_").replace('"', "")
-            url = f"{BASE_URL}/wikis/CATEGORY/{encoded}"
-            resp = requests.get(url, timeout=30)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                macs.append({
-                    "name": model,
-                    "ifixit_url": f"https://www.ifixit.com/Device/{encoded}",
-                    "image": data.get("image", {}).get("standard"),
-                    "summary": data.get("summary"),
-                    "repairability": data.get("repairability")
-                })
-                print(f"✅ {model}")
-            
-            time.sleep(0.3)
-            
-        except Exception as e:
-            print(f"❌ {model}: {e}")
-    
-    return macs
-
-def main():
     print("=" * 60)
     print("📱 Сбор данных с iFixit API")
     print("=" * 60)
     
-    # Собираем данные
-    print("\n📱 Сбор iPhone...")
-    iphones = collect_iphone_data()
-    
-    print("\n📱 Сбор iPad...")
-    ipads = collect_ipad_data()
-    
-    print("\n💻 Сбор Mac...")
-    macs = collect_mac_data()
+    # Собираем iPhone, iPad и Mac одновременно
+    print(f"\n📱 Сбор iPhone, iPad, Mac (одновременно {args.concurrency}, {args.rate} запр/с)...")
+    iphones, ipads, macs = asyncio.run(collect_all(args.concurrency, args.rate))
     
     # Сохраняем
     result = {
@@ -230,13 +315,23 @@ def main():
     }
     
     output_file = os.path.join(OUTPUT_DIR, "ifixit_data.json")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    json_writer.write_json(result, output_file, compress=())
     
     print(f"\n✅ Сохранено в {output_file}")
     print(f"📊 iPhone: {len(iphones)}, iPad: {len(ipads)}, Mac: {len(macs)}")
+    http_cache.flush()
+    net = http_client.stats()
+    print(f"📦 HTTP: {net['requests_sent']} запросов, {net['revalidated']} не изменились (304), "
+          f"{net['offline_hits']} offline, {net['coalesced']} объединено")
+    
+    # Гайды считаются отдельно: 0 гайдов при прежнем числе моделей — признак сбоя API
+    counts = {
+        **result["stats"],
+        "guides": sum(d.get("guides_count", 0) for d in iphones + ipads + macs),
+        "with_image": sum(1 for d in iphones + ipads + macs if d.get("image"))
+    }
+    run_manifest.record("collect_ifixit", "collector", counts, time.perf_counter() - started,
+                        OUTPUT_DIR, http=net, artifacts=[output_file])
     
     return result
 
@@ -2,9 +2,12 @@
 """
 Сбор данных с repair.wiki и других источников по платам MacBook
 """
-import json
 import os
 import re
+import time
+
+import json_writer
+import run_manifest
 
 OUTPUT_DIR = "/home/user/webapp/public/data"
 
@@ -135,6 +138,7 @@ IPAD_BOARDS = {
 }
 
 def main():
+    started = time.perf_counter()
     print("=" * 60)
     print("📱 Сбор данных по платам Apple устройств")
     print("=" * 60)
@@ -163,7 +167,7 @@ def main():
     
     result = {
         "source": "repair.wiki + collected data",
-        "collected_at": __import__("time").strftime("%Y-%m-%d %H:%M:%S"),
+        "collected_at": time.strftime("%Y-%m-%d %H:%M:%S"),
         "macbooks": macbook_list,
         "iphones": iphone_list,
         "ipads": ipad_list,
@@ -176,14 +180,14 @@ def main():
     }
     
     output_file = os.path.join(OUTPUT_DIR, "board_numbers.json")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    json_writer.write_json(result, output_file, compress=())
     
     print(f"\n✅ Сохранено в {output_file}")
     print(f"📊 MacBook: {len(macbook_list)}, iPhone: {len(iphone_list)}, iPad: {len(ipad_list)}")
     
+    run_manifest.record("collect_repair_wiki", "collector", result["stats"], time.perf_counter() - started,
+                        OUTPUT_DIR, artifacts=[output_file])
+    
     return result
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Версии и дельта-патчи данных устройств и цен.
+
+Каждая сборка с изменившимся содержимым получает новый номер версии.
+Документ версии — устройства по каноническому ключу и официальные цены по
+модели. Для каждой из последних N версий k пишется патч k→latest в стиле
+JSON Patch (RFC 6902: add/remove/replace, пути JSON Pointer), так что
+клиенту на версии k достаточно одного маленького файла. Клиенту старше окна
+(или без версии) нужен полный devices.json. version.json хранит цепочку
+версий, список патчей и статистику размеров дельт по релизам.
+
+Снимки прошлых версий (полные документы) нужны только для вычисления
+патчей и лежат вне публикуемого каталога — в ~/.cache/nexx/snapshots,
+отдельно для каждого каталога данных.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import device_keys
+import json_writer
+
+VERSION_FILE = "version.json"
+PATCH_DIR = "patches"
+
+# Снимки прошлых версий — только для вычисления патчей, клиентам не нужны
+DEFAULT_SNAPSHOT_DIR = os.environ.get(
+    "NEXX_DELTA_SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "nexx", "snapshots")
+)
+
+# Сколько прошлых версий получают патч до последней
+DEFAULT_WINDOW = int(os.environ.get("NEXX_DELTA_WINDOW", "10"))
+
+def build_document(devices, prices):
+    """Версионируемый документ: устройства по ключу + цены по модели.
+
+    Возвращает (документ, коллизии): при совпадении канонических ключей
+    остаётся первое устройство, остальные — в списке коллизий (как в
+    device_keys.build_index).
+    """
+    index, collisions = device_keys.build_index(devices or [])
+    document = {
+        "devices": index,
+        "prices": dict((prices or {}).get("prices", {}))
+    }
+    return document, collisions
+
+def content_hash(document):
+    """Хеш содержимого документа (не зависит от порядка ключей)"""
+    raw = json.dumps(document, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _escape(key):
+    # JSON Pointer: "~" → "~0", "/" → "~1" (модели вида "A2172/A2402")
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+def diff(old, new, path=""):
+    """Операции, превращающие old в new. Объекты сравниваются по ключам
+    рекурсивно, списки и значения заменяются целиком."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            elif old[key] != value:
+                ops.extend(diff(old[key], value, child))
+        return ops
+    if old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+def apply_patch(document, ops):
+    """Применить операции к документу (на месте); так же делает клиент"""
+    for op in ops:
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        if not tokens:
+            document = op["value"]
+            continue
+        target = document
+        for token in tokens[:-1]:
+            target = target[token]
+        if op["op"] == "remove":
+            del target[tokens[-1]]
+        else:
+            target[tokens[-1]] = op["value"]
+    return document
+
+def load_versions(output_dir):
+    """version.json предыдущей сборки или пустая цепочка"""
+    try:
+        with open(os.path.join(output_dir, VERSION_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": 0, "chain": [], "patches": {}, "stats": []}
+
+def snapshot_dir(output_dir, root=DEFAULT_SNAPSHOT_DIR):
+    """Каталог снимков для каталога данных (вне публикуемого output_dir)"""
+    digest = hashlib.sha256(os.path.abspath(output_dir).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(root, digest)
+
+def _snapshot_path(directory, version):
+    return os.path.join(directory, f"{version}.json")
+
+def load_snapshot(directory, version):
+    """Документ прошлой версии или None (снимок вышел из окна)"""
+    try:
+        with open(_snapshot_path(directory, version), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def patch_filename(from_version, to_version):
+    return f"{PATCH_DIR}/{from_version}-{to_version}.json"
+
+def publish(document, output_dir, window=DEFAULT_WINDOW, compact=None, compress=None,
+            gzip_level=None, brotli_level=None, snapshots=None):
+    """Выпустить новую версию, если содержимое изменилось.
+
+    Возвращает (version.json, записанные файлы). Если содержимое то же,
+    версия не меняется и ничего не пишется. snapshots — каталог снимков
+    (по умолчанию snapshot_dir(output_dir)).
+    """
+    snapshots = snapshot_dir(output_dir) if snapshots is None else snapshots
+    versions = load_versions(output_dir)
+    digest = content_hash(document)
+    if versions["chain"] and versions["chain"][-1]["sha256"] == digest:
+        return versions, []
+
+    latest = versions["version"] + 1
+    written = []
+
+    # Снимок новой версии — для будущих патчей
+    raw = json_writer.encode_json(document, compact=True)
+    full_bytes = len(raw)
+    json_writer.atomic_write(_snapshot_path(snapshots, latest), lambda f: f.write(raw))
+
+    chain = (versions["chain"] + [{
+        "version": latest,
+        "sha256": digest,
+        "built_at": datetime.now().isoformat()
+    }])[-(window + 1):]
+
+    patches = {}
+    release_stats = {"version": latest, "full_bytes": full_bytes}
+    for entry in chain[:-1]:
+        base = load_snapshot(snapshots, entry["version"])
+        if base is None:
+            continue
+        ops = diff(base, document)
+        if apply_patch(json.loads(json.dumps(base)), ops) != document:
+            raise ValueError(f"Патч {entry['version']}→{latest} не воспроизводит документ")
+        filename = patch_filename(entry["version"], latest)
+        report = json_writer.write_json(
+            {"from": entry["version"], "to": latest, "ops": ops},
+            os.path.join(output_dir, filename),
+            compact=compact, compress=compress, gzip_level=gzip_level, brotli_level=brotli_level
+        )
+        patches[str(entry["version"])] = {"file": filename, "ops": len(ops), "bytes": report["bytes"]}
+        written.append(filename)
+        if entry["version"] == latest - 1:
+            release_stats.update(
+                patch_ops=len(ops),
+                patch_bytes=report["bytes"],
+                ratio=round(report["bytes"] / full_bytes, 4) if full_bytes else None
+            )
+
+    result = {
+        "version": latest,
+        "sha256": digest,
+        "full": ["devices.json", "official_service_prices.json"],
+        "chain": chain,
+        "patches": patches,
+        "stats": (versions.get("stats", []) + [release_stats])[-window:]
+    }
+    _remove_stale(output_dir, snapshots, chain, patches)
+    return result, written
+
+def _remove_stale(output_dir, snapshots, chain, patches):
+    """Удалить патчи не до последней версии и снимки вне окна"""
+    keep_patches = {os.path.basename(p["file"]) for p in patches.values()}
+    directory = os.path.join(output_dir, PATCH_DIR)
+    # Каталога нет, пока не выпущен первый патч
+    filenames = os.listdir(directory) if os.path.isdir(directory) else []
+    for filename in filenames:
+        base = filename
+        for fmt in json_writer.SUPPORTED_FORMATS:
+            if base.endswith("." + fmt):
+                base = base[:-len(fmt) - 1]
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path) and not filename.startswith(".") and base not in keep_patches:
+            os.remove(path)
+
+    keep_snapshots = {f"{entry['version']}.json" for entry in chain}
+    for filename in os.listdir(snapshots):
+        if filename.endswith(".json") and filename not in keep_snapshots:
+            os.remove(os.path.join(snapshots, filename))
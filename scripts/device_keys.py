@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Канонические ключи устройств и индексы по ним.
+
+Разные источники называют одно устройство по-разному: "iPhone SE 2nd Generation"
+(iFixit), "iPhone SE 2nd Gen" (repair.wiki), "iPhone SE (2nd Gen)" (IC база).
+Канонический ключ сводит эти варианты к одной строке, чтобы соединять
+источники поиском в словаре, а не подстроками.
+"""
+import re
+
+_ORDINAL_GEN = re.compile(r"\b(\d+)(?:st|nd|rd|th)\s*gen(?:eration)?\b")
+_INCH = re.compile(r"(\d+(?:\.\d+)?)\s*(?:\"|”|''|-?\s*inch\b)")
+_PUNCT = re.compile(r"[()\[\],]")
+_SPACES = re.compile(r"\s+")
+
+def canonical_key(name):
+    """Канонический ключ: нижний регистр, поколения и дюймы без суффиксов"""
+    key = (name or "").lower()
+    key = _INCH.sub(r"\1in", key)
+    key = _ORDINAL_GEN.sub(r"\1", key)
+    key = _PUNCT.sub(" ", key)
+    return _SPACES.sub(" ", key).strip()
+
+def build_index(entries, name_field="name"):
+    """Индекс ключ -> запись.
+
+    При совпадении ключей побеждает первая запись в порядке источника,
+    остальные попадают в список коллизий — результат детерминирован.
+    """
+    index = {}
+    collisions = []
+    for entry in entries:
+        key = canonical_key(entry.get(name_field, ""))
+        if not key:
+            continue
+        if key in index:
+            collisions.append({"key": key, "kept": index[key].get(name_field), "dropped": entry.get(name_field)})
+            continue
+        index[key] = entry
+    return index, collisions
+
+def lookup(index, name):
+    """Найти запись по имени устройства (O(1))"""
+    return index.get(canonical_key(name))
+
+# Семейства моделей для индекса запчастей (длинные названия проверяются первыми)
+MODEL_FAMILIES = [
+    "macbook pro", "macbook air", "macbook", "imac", "mac mini", "mac studio", "mac pro",
+    "ipad pro", "ipad air", "ipad mini", "ipad"
+]
+
+# Комбинации признаков для поиска — от самой точной к самой общей
+KEY_SHAPES = [
+    ("size", "chip", "year"),
+    ("size", "chip"),
+    ("gen", "size"),
+    ("chip", "year"),
+    ("size", "year"),
+    ("gen",),
+    ("chip",),
+]
+
+_CHIP = re.compile(r"\b(m\d)(?:\s+(pro|max|ultra))?\b|\b(intel)\b")
+_SIZE = re.compile(r"\b(\d+(?:\.\d+)?in)\b")
+_YEAR = re.compile(r"\b(20\d\d)\b")
+
+def model_signature(name, year=None):
+    """Признаки модели: семейство, диагональ, чип, поколение, год"""
+    key = canonical_key(name)
+    family = next((f for f in MODEL_FAMILIES if key == f or key.startswith(f + " ")), None)
+    signature = {"key": key, "family": family}
+
+    size = _SIZE.search(key)
+    if size:
+        signature["size"] = size.group(1)
+
+    chip = _CHIP.search(key)
+    if chip:
+        signature["chip"] = chip.group(3) or " ".join(filter(None, chip.group(1, 2)))
+
+    found_year = _YEAR.search(key)
+    if found_year:
+        signature["year"] = int(found_year.group(1))
+    elif year:
+        signature["year"] = int(year)
+
+    # Поколение — число сразу после семейства ("ipad air 5", "ipad 10", "ipad mini 6")
+    if family:
+        gen = re.match(re.escape(family) + r" (\d{1,2})(?:\s|$)", key)
+        if gen:
+            signature["gen"] = int(gen.group(1))
+
+    return signature
+
+def _shape_key(signature, shape):
+    if not all(field in signature for field in shape):
+        return None
+    return (signature["family"],) + tuple((field, signature[field]) for field in shape)
+
+def describe_key(key):
+    """Читаемое представление ключа индекса для отчётов"""
+    if key[0] == "exact":
+        return key[1]
+    return " ".join([key[0]] + [f"{field}={value}" for field, value in key[1:]])
+
+def _compatible(a, b):
+    """Признаки, известные для обеих моделей, не противоречат друг другу"""
+    for field in ("family", "size", "chip", "gen", "year"):
+        if field in a and field in b and a[field] != b[field]:
+            return False
+    return True
+
+class ModelIndex:
+    """Индекс parts_by_model по нормализованным признакам модели.
+
+    Каждая модель регистрируется под фиксированным набором ключей (KEY_SHAPES),
+    поэтому поиск — несколько обращений к словарю. Ключ, под которым оказались
+    разные модели, помечается неоднозначным и не используется.
+    """
+
+    AMBIGUOUS = object()
+
+    def __init__(self, model_names):
+        self.signatures = {}
+        self.keys = {}
+        self.ambiguous = set()
+        for model_name in model_names:
+            signature = model_signature(model_name)
+            if not signature["family"]:
+                continue
+            self.signatures[model_name] = signature
+            for key in [("exact", signature["key"])] + [_shape_key(signature, s) for s in KEY_SHAPES]:
+                if key is None:
+                    continue
+                if key in self.keys and self.keys[key] != model_name:
+                    self.keys[key] = self.AMBIGUOUS
+                    self.ambiguous.add(key)
+                else:
+                    self.keys[key] = model_name
+
+    def lookup(self, name, year=None):
+        """Имя модели из parts_by_model для устройства или None"""
+        signature = model_signature(name, year)
+        if not signature["family"]:
+            return None
+        for key in [("exact", signature["key"])] + [_shape_key(signature, s) for s in KEY_SHAPES]:
+            model_name = self.keys.get(key) if key else None
+            if model_name is None or model_name is self.AMBIGUOUS:
+                continue
+            if _compatible(signature, self.signatures[model_name]):
+                return model_name
+        return None
+
+def build_model_index(model_names):
+    """Построить индекс моделей (один раз на запуск)"""
+    return ModelIndex(model_names)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Нечёткий поиск устройства по тому, что есть под рукой у мастера:
+"A2337", "820-02016", "EMC 3598", "iphone 13 pro mx".
+
+Индекс строится по результату merge_devices (devices.json): name, model
+(разбитый по "/"), board_numbers и emc. Каждое значение приводится к
+компактной форме (нижний регистр, только буквы и цифры) и режется на
+символьные триграммы с метками начала/конца. Запрос:
+  1. точное совпадение компактной формы — сразу лучший результат;
+  2. кандидаты по самым редким триграммам запроса (частые вроде "iph"
+     почти не сужают выбор и пропускаются по бюджету);
+  3. ранжирование кандидатов по индексу Тверски по всем триграммам:
+     пропущенные триграммы запроса штрафуются сильнее, чем лишние
+     триграммы значения ("iphone 13 pro mx" ближе к "Pro Max", чем к "Pro").
+
+Запуск: python device_lookup.py "iphone 13 pro mx"
+"""
+import argparse
+import json
+import os
+import re
+from collections import Counter
+
+import device_keys
+
+OUTPUT_DIR = "/home/user/webapp/public/data"
+
+N = 3
+
+# Поля устройства в порядке приоритета при равной оценке
+FIELDS = ("name", "model", "board_numbers", "emc")
+
+# Сколько записей постингов просматривается при отборе кандидатов
+POSTINGS_BUDGET = 4000
+
+# Сколько кандидатов ранжируется точно
+CANDIDATES = 64
+
+# Веса индекса Тверски: за триграммы запроса, которых нет в значении,
+# и за лишние триграммы значения
+MISSING_WEIGHT = 1.0
+EXTRA_WEIGHT = 0.2
+
+_NON_ALNUM = re.compile(r"[^0-9a-zа-яё]+")
+
+def compact(text):
+    """Компактная форма: "820-02016" → "82002016", "EMC 3598" → "emc3598" """
+    return _NON_ALNUM.sub("", str(text).lower())
+
+def ngrams(term, n=N):
+    """Триграммы с метками начала и конца ("^a2", "a23", ..., "37$")"""
+    padded = f"^{term}$"
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+def device_terms(device):
+    """Пары (поле, значение) для индексации устройства"""
+    name = device.get("name", "")
+    terms = [("name", name)]
+    # Каноническая форма имени: "iPad Air 5th Gen M1" → "ipad air 5 m1"
+    key = device_keys.canonical_key(name)
+    if compact(key) != compact(name):
+        terms.append(("name", key))
+    terms += [("model", m) for m in str(device.get("model", "") or "").split("/")]
+    terms += [("board_numbers", b) for b in device.get("board_numbers", []) or []]
+    emc = device.get("emc", "")
+    if emc:
+        terms.append(("emc", emc))
+        # Номер EMC без префикса: мастер часто вводит просто "3598"
+        terms.append(("emc", re.sub(r"(?i)^\s*emc\s*", "", emc)))
+    return [(field, value) for field, value in terms if compact(value)]
+
+class DeviceLookup:
+    """Индекс триграмм по name/model/board_numbers/emc"""
+
+    def __init__(self, devices):
+        self.devices = list(devices)
+        self.terms = []           # term_id → компактная форма
+        self.term_grams = []      # term_id → множество триграмм
+        self.term_owners = []     # term_id → [(номер устройства, поле, исходное значение)]
+        self.exact = {}           # компактная форма → term_id
+        self.postings = {}        # триграмма → [term_id]
+
+        for index, device in enumerate(self.devices):
+            for field, value in device_terms(device):
+                term = compact(value)
+                term_id = self.exact.get(term)
+                if term_id is None:
+                    term_id = self.exact[term] = len(self.terms)
+                    grams = ngrams(term)
+                    self.terms.append(term)
+                    self.term_grams.append(grams)
+                    self.term_owners.append([])
+                    for gram in grams:
+                        self.postings.setdefault(gram, []).append(term_id)
+                self.term_owners[term_id].append((index, field, value))
+
+    @classmethod
+    def from_file(cls, filepath):
+        """Построить индекс по devices.json"""
+        with open(filepath, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _candidates(self, grams):
+        """term_id кандидатов по самым редким триграммам запроса"""
+        lists = sorted((self.postings.get(g, ()) for g in grams), key=len)
+        counts = Counter()
+        seen = 0
+        for used, postings in enumerate(lists):
+            if used >= 2 and seen + len(postings) > POSTINGS_BUDGET:
+                break
+            seen += len(postings)
+            counts.update(postings)
+        return [term_id for term_id, _ in counts.most_common(CANDIDATES)]
+
+    def search(self, query, limit=5):
+        """Ранжированные кандидаты: [{"device", "score", "field", "matched"}]"""
+        term = compact(query)
+        if not term:
+            return []
+        grams = ngrams(term)
+        scored = {}
+        exact_id = self.exact.get(term)
+        term_ids = self._candidates(grams)
+        if exact_id is not None and exact_id not in term_ids:
+            term_ids.append(exact_id)
+
+        for term_id in term_ids:
+            if term_id == exact_id:
+                score = 1.0
+            else:
+                other = self.term_grams[term_id]
+                shared = len(grams & other)
+                score = shared / (shared + MISSING_WEIGHT * (len(grams) - shared)
+                                  + EXTRA_WEIGHT * (len(other) - shared))
+            for index, field, value in self.term_owners[term_id]:
+                best = scored.get(index)
+                if best is None or score > best[0]:
+                    scored[index] = (score, field, value)
+
+        ranked = sorted(scored.items(), key=lambda item: (-item[1][0], FIELDS.index(item[1][1]), item[0]))
+        return [
+            {"device": self.devices[index], "score": round(score, 3), "field": field, "matched": value}
+            for index, (score, field, value) in ranked[:limit]
+        ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Поиск устройства по имени, A-номеру, плате или EMC")
+    parser.add_argument("query", help='например "A2337", "820-02016", "EMC 3598", "iphone 13 pro mx"')
+    parser.add_argument("--devices", default=os.path.join(OUTPUT_DIR, "devices.json"),
+                        help="путь к devices.json")
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.devices):
+        parser.error(f"нет файла {args.devices} — сначала запустите merge_all_data.py")
+    lookup = DeviceLookup.from_file(args.devices)
+    results = lookup.search(args.query, limit=args.limit)
+    if not results:
+        print("❌ Ничего не найдено")
+    for r in results:
+        print(f"  {r['score']:.3f}  {r['device']['name']:<40} {r['field']}: {r['matched']}")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Компактный бинарный формат для объединённых данных (devices.bin).
+
+Структура файла:
+    magic "NXPK", версия (u16), флаги (u16)
+    таблица строк: число строк (varint), затем для каждой длина (varint) + UTF-8
+    значение корня (тегированное)
+
+Каждое значение начинается с байта-тега. Все строки — и ключи объектов, и
+значения (category, connector_type, repair_difficulty, имена IC) — хранятся
+в таблице один раз, в теле лежат только их номера. Целые числа — zigzag
+varint, дробные с целым значением (99.0) — тоже varint с отдельным тегом.
+Формат без схемы снаружи: любой JSON документ проходит туда и обратно без потерь.
+"""
+import os
+import struct
+import time
+
+import json_writer
+
+MAGIC = b"NXPK"
+VERSION = 1
+
+TAG_NULL = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STR = 5
+TAG_LIST = 6
+TAG_DICT = 7
+TAG_INT_FLOAT = 8
+
+_F64 = struct.Struct("<d")
+_HEADER = struct.Struct("<4sHH")
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+class _Encoder:
+    def __init__(self):
+        self.strings = {}
+        self.body = bytearray()
+
+    def intern(self, text):
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def encode(self, value):
+        out = self.body
+        if value is None:
+            out.append(TAG_NULL)
+        elif value is True:
+            out.append(TAG_TRUE)
+        elif value is False:
+            out.append(TAG_FALSE)
+        elif isinstance(value, int):
+            out.append(TAG_INT)
+            _write_varint(out, _zigzag(value))
+        elif isinstance(value, float):
+            if value.is_integer() and abs(value) < 2 ** 53:
+                out.append(TAG_INT_FLOAT)
+                _write_varint(out, _zigzag(int(value)))
+            else:
+                out.append(TAG_FLOAT)
+                out.extend(_F64.pack(value))
+        elif isinstance(value, str):
+            out.append(TAG_STR)
+            _write_varint(out, self.intern(value))
+        elif isinstance(value, (list, tuple)):
+            out.append(TAG_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self.encode(item)
+        elif hasattr(value, "items"):
+            out.append(TAG_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                _write_varint(out, self.intern(str(key)))
+                self.encode(item)
+        else:
+            raise TypeError(f"Тип {type(value).__name__} не поддерживается")
+
+def dumps(data):
+    """Упаковать JSON-совместимые данные в байты"""
+    encoder = _Encoder()
+    encoder.encode(data)
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, 0))
+    _write_varint(out, len(encoder.strings))
+    for text in encoder.strings:
+        raw = text.encode("utf-8")
+        _write_varint(out, len(raw))
+        out.extend(raw)
+    out.extend(encoder.body)
+    return bytes(out)
+
+def loads(raw):
+    """Распаковать байты обратно в dict/list"""
+    raw = memoryview(raw)
+    magic, version, _flags = _HEADER.unpack_from(raw, 0)
+    if magic != MAGIC:
+        raise ValueError("Не devices.bin: неверная сигнатура")
+    if version != VERSION:
+        raise ValueError(f"Неподдерживаемая версия формата: {version}")
+    pos = _HEADER.size
+
+    def varint():
+        nonlocal pos
+        shift = result = 0
+        while True:
+            byte = raw[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    strings = []
+    for _ in range(varint()):
+        length = varint()
+        strings.append(str(raw[pos:pos + length], "utf-8"))
+        pos += length
+
+    def value():
+        nonlocal pos
+        tag = raw[pos]
+        pos += 1
+        if tag == TAG_STR:
+            return strings[varint()]
+        if tag == TAG_DICT:
+            return {strings[varint()]: value() for _ in range(varint())}
+        if tag == TAG_LIST:
+            return [value() for _ in range(varint())]
+        if tag == TAG_INT:
+            return _unzigzag(varint())
+        if tag == TAG_INT_FLOAT:
+            return float(_unzigzag(varint()))
+        if tag == TAG_FLOAT:
+            result = _F64.unpack_from(raw, pos)[0]
+            pos += 8
+            return result
+        if tag == TAG_NULL:
+            return None
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_FALSE:
+            return False
+        raise ValueError(f"Неизвестный тег {tag} на позиции {pos - 1}")
+
+    return value()
+
+def dump(data, filepath):
+    """Атомарно записать файл формата NXPK, вернуть отчёт (как json_writer)"""
+    started = time.perf_counter()
+    raw = dumps(data)
+    json_writer.atomic_write(filepath, lambda f: f.write(raw))
+    report = {
+        "file": os.path.basename(filepath),
+        "bytes": len(raw),
+        "seconds": round(time.perf_counter() - started, 6)
+    }
+    json_writer.REPORTS.append(report)
+    return report
+
+def load(filepath):
+    """Прочитать файл формата NXPK"""
+    with open(filepath, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Шарды devices.json по категориям и семействам моделей.
+
+Клиенту, открывшему один iPhone, не нужно качать все Mac и iPad: устройства
+раскладываются в шарды по категории (iphone, ipad, mac) и по семейству
+(iphone-16, ipad-pro, macbook-air). Имя файла шарда содержит хеш содержимого,
+поэтому шард можно кэшировать навсегда (immutable). Манифест перечисляет
+шарды с хешами и размерами. Шард с неизменённым содержимым не перезаписывается.
+"""
+import hashlib
+import json
+import os
+import re
+
+import device_keys
+import json_writer
+
+SHARD_DIR = "shards"
+MANIFEST_FILE = "devices_manifest.json"
+MANIFEST_VERSION = 1
+
+# Длина хеша в имени файла (12 hex = 48 бит, коллизии не грозят)
+NAME_HASH_LENGTH = 12
+
+# Модификаторы iPhone, которые не меняют семейство ("iPhone 16 Pro Max" → iphone-16)
+_IPHONE_VARIANT = re.compile(r"\s+(pro max|pro|plus|max|mini)$")
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+def slug(text):
+    """Безопасная для имени файла форма: "iPhone 16" → "iphone-16" """
+    return _SLUG.sub("-", text.lower()).strip("-")
+
+def model_family(device):
+    """Семейство модели устройства для шарда"""
+    key = device_keys.canonical_key(device.get("name", ""))
+    if key.startswith("iphone"):
+        return _IPHONE_VARIANT.sub("", key)
+    family = device_keys.model_signature(key)["family"]
+    return family or slug(device.get("category", "")) or "other"
+
+def group_shards(devices):
+    """Шарды: {("category"|"family", имя): [устройства]} в исходном порядке"""
+    shards = {}
+    for device in devices:
+        for kind, name in (("category", slug(device.get("category", "")) or "other"),
+                           ("family", slug(model_family(device)))):
+            shards.setdefault((kind, name), []).append(device)
+    return shards
+
+def shard_filename(kind, name, digest):
+    """Относительный путь шарда с хешем содержимого в имени"""
+    prefix = "devices" if kind == "category" else "family"
+    return f"{SHARD_DIR}/{prefix}.{name}.{digest[:NAME_HASH_LENGTH]}.json"
+
+def _unchanged(filepath, digest, compress):
+    """Шард уже записан с тем же содержимым и тем же набором сжатых копий"""
+    if not os.path.exists(filepath):
+        return False
+    compress = json_writer.DEFAULT_COMPRESS if compress is None else tuple(compress)
+    for fmt in json_writer.SUPPORTED_FORMATS:
+        wanted = fmt in compress and (fmt != "br" or json_writer.brotli is not None)
+        if os.path.exists(f"{filepath}.{fmt}") != wanted:
+            return False
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest() == digest
+
+def load_manifest(output_dir):
+    """Манифест предыдущей сборки или None"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_shards(devices, output_dir, previous=None, compact=None, compress=None,
+                 gzip_level=None, brotli_level=None, default=None):
+    """Записать изменившиеся шарды и вернуть (манифест, записанные, пропущенные).
+
+    Старые версии шардов из предыдущего манифеста остаются на диске, чтобы
+    клиенты со старым манифестом не получили 404; всё, что старше, удаляется.
+    """
+    manifest = {"version": MANIFEST_VERSION, "total_devices": len(devices), "shards": {}}
+    written, unchanged = [], []
+
+    for (kind, name), shard_devices in sorted(group_shards(devices).items()):
+        raw = json_writer.encode_json(shard_devices, compact=compact, default=default)
+        digest = hashlib.sha256(raw).hexdigest()
+        filename = shard_filename(kind, name, digest)
+        filepath = os.path.join(output_dir, filename)
+
+        if _unchanged(filepath, digest, compress):
+            unchanged.append(filename)
+        else:
+            json_writer.write_bytes(raw, filepath, compress=compress,
+                                    gzip_level=gzip_level, brotli_level=brotli_level)
+            written.append(filename)
+
+        manifest["shards"].setdefault(kind, {})[name] = {
+            "file": filename,
+            "sha256": digest,
+            "bytes": len(raw),
+            "devices": len(shard_devices)
+        }
+
+    keep = set(shard_files(manifest)) | set(shard_files(previous or {}))
+    remove_stale(output_dir, keep)
+    return manifest, written, unchanged
+
+def shard_files(manifest):
+    """Все файлы шардов, перечисленные в манифесте"""
+    return [entry["file"] for shards in manifest.get("shards", {}).values() for entry in shards.values()]
+
+def remove_stale(output_dir, keep):
+    """Удалить шарды (и их сжатые копии), которых нет в keep"""
+    directory = os.path.join(output_dir, SHARD_DIR)
+    if not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        base = filename
+        for fmt in json_writer.SUPPORTED_FORMATS:
+            if base.endswith("." + fmt):
+                base = base[:-len(fmt) - 1]
+        if f"{SHARD_DIR}/{base}" not in keep and not filename.startswith("."):
+            os.remove(os.path.join(directory, filename))
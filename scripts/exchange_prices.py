@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Потоковое чтение прайса Apple Exchange UA (.xlsx) и соединение с запчастями.
+
+XLSX — zip с XML. Лист подаётся XMLParser кусками, а строки собирает
+цель парсера (start/data/end) без построения дерева элементов, поэтому
+весь лист в памяти не строится. Держится только таблица общих строк (sharedStrings) —
+на неё ссылаются ячейки — и сама итоговая таблица по артикулу.
+openpyxl не нужен: хватает zipfile и xml.etree.
+
+Колонки ищутся по заголовкам так же, как в import-exchange-ua-xlsx.cjs.
+"""
+import math
+import os
+import posixpath
+import re
+import zipfile
+from xml.etree.ElementTree import XMLParser, iterparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(SCRIPT_DIR, "..", "data", "exchange-ua")
+
+# Варианты заголовков (нижний регистр) → поле
+ARTICLE_KEYS = ["артикул", "art", "article", "код", "part"]
+DESC_KEYS = ["опис", "description", "описание", "назва", "наименование", "name"]
+STOCK_KEYS = ["цена склада", "price stock", "ціна складу", "склад", "stock", "закуп"]
+EXCHANGE_KEYS = ["цена обмена", "price exchange", "ціна обміну", "обмін", "exchange", "обмен"]
+FULL_KEYS = ["полная", "полная цена", "розница", "price full", "ціна повна", "retail"]
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_ROW = f"{_NS}row"
+_CELL = f"{_NS}c"
+_VALUE = f"{_NS}v"
+_TEXT = f"{_NS}t"
+_SHARED = f"{_NS}si"
+
+# Размер куска листа, который подаётся парсеру за раз
+CHUNK_SIZE = 1 << 16
+
+_DIGITS = "0123456789"
+_columns = {}
+
+def column_index(ref):
+    """Номер колонки по ссылке ячейки: "A5" → 0, "AB12" → 27"""
+    letters = ref.rstrip(_DIGITS)
+    index = _columns.get(letters)
+    if index is None:
+        index = 0
+        for char in letters:
+            index = index * 26 + ord(char) - 64
+        index = _columns[letters] = index - 1
+    return index
+
+def _first_sheet_path(archive):
+    """Путь первого листа книги (через workbook.xml и его связи)"""
+    with archive.open("xl/workbook.xml") as f:
+        for _, elem in iterparse(f):
+            if elem.tag == f"{_NS}sheet":
+                rel_id = elem.get(f"{_REL_NS}id")
+                break
+        else:
+            raise ValueError("В книге нет листов")
+    with archive.open("xl/_rels/workbook.xml.rels") as f:
+        for _, elem in iterparse(f):
+            if elem.tag == f"{_PKG_REL_NS}Relationship" and elem.get("Id") == rel_id:
+                target = elem.get("Target")
+                if target.startswith("/"):
+                    return target.lstrip("/")
+                return posixpath.normpath(posixpath.join("xl", target))
+    raise ValueError(f"Не найден лист {rel_id}")
+
+class _SharedStrings:
+    """Цель XMLParser для sharedStrings.xml: одна строка на <si>,
+    форматированные куски (<r><t>) склеиваются"""
+
+    def __init__(self):
+        self.strings = []
+        self.parts = None
+        self.text = None
+
+    def start(self, tag, attrs):
+        if tag == _SHARED:
+            self.parts = []
+        elif tag == _TEXT and self.parts is not None:
+            self.text = []
+
+    def data(self, text):
+        if self.text is not None:
+            self.text.append(text)
+
+    def end(self, tag):
+        if tag == _TEXT and self.text is not None:
+            self.parts.append("".join(self.text))
+            self.text = None
+        elif tag == _SHARED:
+            self.strings.append("".join(self.parts))
+            self.parts = None
+
+    def close(self):
+        return self.strings
+
+def _parse(f, target):
+    """Скормить файл парсеру кусками по CHUNK_SIZE"""
+    parser = XMLParser(target=target)
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        yield
+    parser.close()
+
+def _shared_strings(archive):
+    """Таблица общих строк (на неё ссылаются ячейки с t="s")"""
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    target = _SharedStrings()
+    with archive.open("xl/sharedStrings.xml") as f:
+        for _ in _parse(f, target):
+            pass
+    return target.strings
+
+class _SheetRows:
+    """Цель XMLParser: собирает готовые строки листа без построения дерева.
+
+    Парсер вызывает start/data/end напрямую, элементы не создаются —
+    память не зависит от размера листа.
+    """
+
+    def __init__(self, strings):
+        self.strings = strings
+        self.rows = []
+        self.row = None
+        self.cell = None
+        self.text = None
+        self.value = None
+
+    def start(self, tag, attrs):
+        if tag == _ROW:
+            self.row = []
+        elif tag == _CELL:
+            self.cell = (attrs.get("r"), attrs.get("t"))
+            self.text = None
+        elif tag == _VALUE or (tag == _TEXT and self.cell is not None):
+            self.text = []
+
+    def data(self, text):
+        if self.text is not None:
+            self.text.append(text)
+
+    def end(self, tag):
+        if tag == _CELL:
+            self._append_cell()
+            self.cell = None
+        elif tag == _ROW:
+            self.rows.append(self.row)
+            self.row = None
+        elif tag == _VALUE and self.text is not None:
+            self.value = "".join(self.text)
+            self.text = None
+        elif tag == _TEXT and self.text is not None:
+            # Строка в ячейке (inlineStr) может быть разбита на куски <r><t>
+            self.value = (self.value or "") + "".join(self.text)
+            self.text = None
+
+    def _append_cell(self):
+        ref, kind = self.cell
+        raw = self.value
+        self.value = None
+        if raw is None:
+            value = ""
+        elif kind == "s":
+            value = self.strings[int(raw)]
+        elif kind in ("str", "e", "inlineStr"):
+            value = raw
+        elif kind == "b":
+            value = raw == "1"
+        else:
+            value = float(raw)
+        row = self.row
+        index = column_index(ref) if ref else len(row)
+        if index > len(row):
+            row.extend([""] * (index - len(row)))
+        row.append(value)
+
+    def close(self):
+        return None
+
+def iter_rows(filepath):
+    """Строки первого листа: списки значений (str или float), пустые — "" """
+    with zipfile.ZipFile(filepath) as archive:
+        strings = _shared_strings(archive)
+        target = _SheetRows(strings)
+        with archive.open(_first_sheet_path(archive)) as f:
+            for _ in _parse(f, target):
+                # Готовые строки отдаются сразу — в памяти только текущий кусок
+                rows, target.rows = target.rows, []
+                yield from rows
+        yield from target.rows
+
+def find_column(headers, patterns):
+    """Номер колонки, заголовок которой похож на один из вариантов, или -1"""
+    cells = [str(h or "").lower().strip() for h in headers]
+    for i, cell in enumerate(cells):
+        if not cell:
+            continue
+        for pattern in patterns:
+            if pattern in cell or cell in pattern:
+                return i
+    return -1
+
+def js_round(value):
+    """Math.round из JS: половины — вверх (556.5 → 557), а не к чётному, как round()"""
+    return math.floor(value + 0.5)
+
+def parse_number(value):
+    """Цена в гривнах, округлённая до целого (пусто/мусор → 0)"""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, float):
+        return js_round(value)
+    text = re.sub(r"\s", "", str(value)).replace(",", ".")
+    try:
+        return js_round(float(text))
+    except (ValueError, OverflowError):
+        return 0
+
+def _cell(row, index):
+    return row[index] if 0 <= index < len(row) else ""
+
+def read_price_list(filepath):
+    """Таблица {артикул: цены} из .xlsx и статистика чтения"""
+    rows = iter_rows(filepath)
+    headers = next(rows, [])
+    col_article = find_column(headers, ARTICLE_KEYS)
+    col_desc = find_column(headers, DESC_KEYS)
+    col_stock = find_column(headers, STOCK_KEYS)
+    col_exchange = find_column(headers, EXCHANGE_KEYS)
+    col_full = find_column(headers, FULL_KEYS)
+    if col_article < 0:
+        raise ValueError(f"Нет колонки артикула. Заголовки: {' | '.join(map(str, headers))}")
+
+    table = {}
+    total = 0
+    for row in rows:
+        total += 1
+        article = _cell(row, col_article)
+        if isinstance(article, float) and article.is_integer():
+            article = int(article)
+        article = re.sub(r"\s+", " ", str(article).strip())
+        if not article:
+            continue
+        stock = parse_number(_cell(row, col_stock)) if col_stock >= 0 else 0
+        entry = {
+            "description": str(_cell(row, col_desc)).strip() or article,
+            "price_stock_uah": stock,
+            "price_exchange_uah": parse_number(_cell(row, col_exchange)) if col_exchange >= 0 else stock
+        }
+        full = parse_number(_cell(row, col_full)) if col_full >= 0 else 0
+        if full > 0:
+            entry["price_full_uah"] = full
+        table[article] = entry
+
+    return table, {"rows": total, "articles": len(table)}
+
+def find_price_list(directory=DEFAULT_DIR):
+    """Самый свежий .xlsx прайс в каталоге (образцы sample-* — только если других нет)"""
+    if not os.path.isdir(directory):
+        return None
+    files = [os.path.join(directory, f) for f in os.listdir(directory) if f.lower().endswith(".xlsx")]
+    files.sort(key=lambda p: (not os.path.basename(p).startswith("sample"), os.path.getmtime(p)), reverse=True)
+    return files[0] if files else None
+
+def join_service_parts(devices, table):
+    """Хеш-соединение: service_parts[*].article устройств × таблица прайса.
+
+    Таблица прайса — сторона построения (словарь по артикулу), запчасти
+    устройств — сторона зондирования: одно обращение к словарю на запчасть.
+    """
+    joined = {}
+    matched = 0
+    missing = []
+    for device in devices:
+        for part_type, part in (device.get("service_parts") or {}).items():
+            article = str(part.get("article", "")).strip()
+            if not article:
+                continue
+            price = table.get(article)
+            if price is None:
+                missing.append(article)
+                continue
+            matched += 1
+            joined.setdefault(device.get("name", ""), {})[part_type] = {
+                "article": article,
+                "price_usd": part.get("price_usd"),
+                **price
+            }
+    return joined, {"matched": matched, "missing": len(missing), "missing_articles": sorted(set(missing))}
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Дисковый HTTP кэш с условными запросами для сборщиков.
+
+Ответ хранится по URL вместе с ETag/Last-Modified. Повторный запрос уходит
+с If-None-Match/If-Modified-Since, и на 304 тело берётся с диска. Размер
+кэша ограничен, вытесняются давно не использованные записи (LRU).
+В offline режиме сеть не используется вообще — только кэш.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "NEXX_HTTP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "nexx", "http")
+)
+DEFAULT_MAX_MB = int(os.environ.get("NEXX_HTTP_CACHE_MB", "200"))
+DEFAULT_OFFLINE = os.environ.get("NEXX_OFFLINE", "") not in ("", "0")
+
+INDEX_FILE = "index.json"
+
+# Заголовки, которые сохраняются вместе с телом ответа
+VALIDATOR_HEADERS = {"etag": "ETag", "last-modified": "Last-Modified", "content-type": "Content-Type"}
+
+class OfflineCacheMiss(Exception):
+    """В offline режиме запрошен URL, которого нет в кэше"""
+
+class CachedResponse:
+    """Ответ из кэша с интерфейсом requests.Response (то, что нужно сборщикам)"""
+
+    def __init__(self, url, content, headers):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.headers = headers
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+class HttpCache:
+    """Кэш ответов по URL с условными GET и LRU вытеснением"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 offline=DEFAULT_OFFLINE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.index = None
+        self.dirty = False
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+    def _load_index(self):
+        if self.index is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            try:
+                with open(os.path.join(self.cache_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}
+        return self.index
+
+    def _save_index(self):
+        # Индекс пишется на диск один раз в flush(), а не на каждый запрос
+        self.dirty = True
+
+    def flush(self):
+        """Записать индекс на диск, если он менялся"""
+        with self.lock:
+            if not self.dirty or self.index is None:
+                return
+            self.dirty = False
+            self._write_index()
+
+    def _write_index(self):
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _body_path(self, entry):
+        return os.path.join(self.cache_dir, entry["file"])
+
+    def _read(self, url, entry):
+        """Прочитать тело из кэша и отметить использование"""
+        with open(self._body_path(entry), "rb") as f:
+            content = f.read()
+        entry["used"] = time.time()
+        return CachedResponse(url, content, entry.get("headers", {}))
+
+    def _store(self, url, resp):
+        headers = {}
+        for name, value in resp.headers.items():
+            canonical = VALIDATOR_HEADERS.get(name.lower())
+            if canonical:
+                headers[canonical] = value
+        entry = {
+            "file": hashlib.sha1(url.encode("utf-8")).hexdigest(),
+            "headers": headers,
+            "size": len(resp.content),
+            "stored": time.time(),
+            "used": time.time()
+        }
+        with open(self._body_path(entry), "wb") as f:
+            f.write(resp.content)
+        self.index[url] = entry
+        self._evict()
+        self._save_index()
+
+    def _evict(self):
+        total = sum(e["size"] for e in self.index.values())
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            del self.index[url]
+            self.evictions += 1
+            try:
+                os.remove(self._body_path(entry))
+            except OSError:
+                pass
+
+    def get(self, url, timeout=30, fetch=None, headers=None):
+        """GET через кэш. fetch — функция запроса (по умолчанию requests.get)"""
+        with self.lock:
+            entry = self._load_index().get(url)
+            if entry and not os.path.exists(self._body_path(entry)):
+                entry = None
+            if self.offline:
+                if not entry:
+                    raise OfflineCacheMiss(f"нет в HTTP кэше (offline режим): {url}")
+                self.hits += 1
+                response = self._read(url, entry)
+                self._save_index()
+                return response
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry["headers"].get("ETag"):
+                request_headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                request_headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        resp = (fetch or requests.get)(url, timeout=timeout, headers=request_headers)
+
+        with self.lock:
+            self._load_index()
+            if resp.status_code == 304 and entry:
+                self.revalidated += 1
+                self.bytes_saved += entry["size"]
+                response = self._read(url, entry)
+                self._save_index()
+                return response
+            self.misses += 1
+            if resp.status_code == 200:
+                self._store(url, resp)
+        return resp
+
+    def stats(self):
+        """Счётчики кэша"""
+        return {
+            "offline_hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes_saved": self.bytes_saved
+        }
+
+# Общий кэш процесса; индекс сохраняется при выходе
+HTTP_CACHE = HttpCache()
+atexit.register(HTTP_CACHE.flush)
+
+def get(url, timeout=30, fetch=None, headers=None):
+    """GET через общий кэш"""
+    return HTTP_CACHE.get(url, timeout=timeout, fetch=fetch, headers=headers)
+
+def flush():
+    """Сохранить индекс общего кэша"""
+    HTTP_CACHE.flush()
+
+def set_offline(offline=True):
+    """Включить/выключить offline режим (только кэш)"""
+    HTTP_CACHE.offline = offline
+
+def stats():
+    """Счётчики общего кэша"""
+    return HTTP_CACHE.stats()
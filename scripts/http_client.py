@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Общий HTTP клиент сетевых сборщиков.
+
+Один requests.Session на процесс: пул keep-alive соединений, повторы с
+экспоненциальной задержкой на сетевых ошибках и 429/5xx, лимит
+одновременных запросов на хост. Одинаковые запросы, уже находящиеся
+в полёте, объединяются — второй вызов ждёт ответ первого. Ответы идут
+через дисковый кэш http_cache (условные GET, offline режим).
+"""
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import http_cache
+
+DEFAULT_TIMEOUT = 30
+
+# Повторы: 3 попытки, задержка 0.5, 1, 2 с
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Размер пула соединений и лимиты одновременных запросов на хост
+POOL_SIZE = 16
+DEFAULT_HOST_LIMIT = 8
+HOST_LIMITS = {
+    "www.ifixit.com": 6,
+    "raw.githubusercontent.com": 8,
+    "gist.githubusercontent.com": 4,
+}
+
+class HttpClient:
+    """Пул соединений + повторы + лимиты на хост + объединение запросов"""
+
+    def __init__(self, pool_size=POOL_SIZE, host_limits=None, cache=None):
+        self.session = requests.Session()
+        retry = Retry(
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.cache = cache or http_cache.HTTP_CACHE
+        self.lock = threading.Lock()
+        self.host_semaphores = {}
+        self.in_flight = {}
+        self.requests_sent = 0
+        self.coalesced = 0
+
+    def _host_semaphore(self, url):
+        host = urlsplit(url).hostname or ""
+        with self.lock:
+            semaphore = self.host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.host_limits.get(host, DEFAULT_HOST_LIMIT))
+                self.host_semaphores[host] = semaphore
+            return semaphore
+
+    def _fetch(self, url, timeout=DEFAULT_TIMEOUT, headers=None):
+        with self._host_semaphore(url):
+            with self.lock:
+                self.requests_sent += 1
+            return self.session.get(url, timeout=timeout, headers=headers)
+
+    def get(self, url, timeout=DEFAULT_TIMEOUT):
+        """GET (с кэшем); одинаковые одновременные запросы выполняются один раз"""
+        with self.lock:
+            future = self.in_flight.get(url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[url] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            resp = self.cache.get(url, timeout=timeout, fetch=self._fetch)
+            future.set_result(resp)
+            return resp
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(url, None)
+
+    def get_json(self, url, timeout=DEFAULT_TIMEOUT):
+        """JSON ответа или None, если статус не 200"""
+        resp = self.get(url, timeout=timeout)
+        if resp.status_code == 200:
+            return resp.json()
+        return None
+
+    def stats(self):
+        """Счётчики клиента"""
+        return {"requests_sent": self.requests_sent, "coalesced": self.coalesced}
+
+_client = None
+_client_lock = threading.Lock()
+
+def client():
+    """Общий клиент процесса (создаётся при первом обращении)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+def get(url, timeout=DEFAULT_TIMEOUT):
+    """GET через общий клиент"""
+    return client().get(url, timeout=timeout)
+
+def get_json(url, timeout=DEFAULT_TIMEOUT):
+    """JSON через общий клиент или None"""
+    return client().get_json(url, timeout=timeout)
+
+def stats():
+    """Счётчики общего клиента и HTTP кэша"""
+    return {**client().stats(), **http_cache.stats()}
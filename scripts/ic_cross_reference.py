@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Перекрёстный индекс микросхем и устройств (ic_cross_reference.json).
+
+В collect_ic_data.py совместимость записана свободным текстом:
+"iPhone SE (1st Gen)", "iPhone 12 series", "iPhone 14 series (non-Pro)",
+"iPhone 5s - iPhone 8", "iPhone 7 (Qualcomm)". Здесь каждая запись
+раскрывается в канонические ключи устройств (device_keys.canonical_key),
+и строятся две карты: IC → устройства и устройство → IC по семействам.
+"Какие устройства используют 1610A3" — одно обращение к словарю.
+
+Серии и диапазоны раскрываются по каталогу устройств (devices.json).
+Порядок выпуска — по году, внутри года — от базовой модели к старшей
+(каталог перечисляет модели от новых к старым). Устройства вне каталога
+(iPhone 5s, iPad Air) остаются ключами и попадают в отчёт "uncatalogued".
+iPhone SE считается отдельной линейкой и в диапазоны основной не входит.
+
+Проверка известных связей: python ic_cross_reference.py --check
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+import charging_ic_rules
+import device_keys
+
+OUTPUT_DIR = "/home/user/webapp/public/data"
+
+# Семейства IC: (название семейства, ключ в ic_comprehensive.json)
+IC_FAMILIES = [
+    ("charging", "charging_ics"),
+    ("power", "power_ics"),
+    ("audio", "audio_ics"),
+    ("baseband", "baseband_ics"),
+    ("nand", "nand_ics"),
+    ("wifi_bt", "wifi_bt_ics"),
+    ("biometric", "biometric_ics"),
+]
+
+# Годы моделей старше каталога — нужны только как границы диапазонов
+LEGACY_YEARS = {
+    "iphone 5c": 2013,
+    "iphone 5s": 2013,
+}
+
+# Известные связи для проверки (--check): IC → устройства, которые
+# обязаны попасть в её список (диапазоны, заканчивающиеся серией)
+EXPECTED_DEVICES = {
+    "Kioxia/Sandisk NAND": ["iphone 6", "iphone 14", "iphone 14 plus", "iphone 14 pro", "iphone 14 pro max"],
+    "SK Hynix NAND": ["iphone 11", "iphone 15", "iphone 15 plus", "iphone 15 pro", "iphone 15 pro max"],
+}
+
+# Разные написания одной модели
+ALIASES = {
+    "iphone se 1": "iphone se",
+}
+
+_PAREN = re.compile(r"\(([^)]*)\)")
+_GENERATION = re.compile(r"^\d+(?:st|nd|rd|th)\s*gen(?:eration)?$", re.IGNORECASE)
+_RANGE = re.compile(r"\s+-\s+")
+_SERIES = re.compile(r"\s+series$", re.IGNORECASE)
+_IPHONE_VARIANT = re.compile(r"\s+(pro max|pro|plus|max|mini)$")
+
+def family_key(key):
+    """Серия iPhone по ключу: "iphone 13 pro max" → "iphone 13" """
+    return _IPHONE_VARIANT.sub("", key)
+
+def ic_aliases(ic_name):
+    """Написания IC для поиска: полное имя, базовый номер и варианты
+    ("SN2600B1/B2" → SN2600B1, SN2600B2; "1612A1 (Hydra)" → 1612A1)"""
+    aliases = {ic_name.upper()}
+    base = charging_ic_rules.base_part_number(ic_name).upper()
+    # Только номера деталей: "Qualcomm X55" не должен откликаться на "QUALCOMM"
+    if any(char.isdigit() for char in base):
+        aliases.add(base)
+        variants = ic_name.split(" ")[0].upper().split("/")
+        for variant in variants[1:]:
+            if variant and len(variant) < len(variants[0]):
+                aliases.add(variants[0][:-len(variant)] + variant)
+    return sorted(a for a in aliases if a)
+
+def product_line(key):
+    """Линейка для диапазонов: iPhone SE — отдельная линейка, не входит в "iPhone 6 - iPhone 14" """
+    words = key.split(" ")
+    return " ".join(words[:2]) if words[1:2] == ["se"] else words[0]
+
+class DeviceCatalog:
+    """Каталог ключей устройств в порядке выпуска"""
+
+    def __init__(self, devices):
+        self.names = {}
+        ordered = []
+        for position, device in enumerate(devices):
+            key = device_keys.canonical_key(device.get("name", ""))
+            if key and key not in self.names:
+                self.names[key] = device.get("name", "")
+                ordered.append((device.get("year") or 0, -position, key))
+        self.order = [key for _, _, key in sorted(ordered)]
+        self.position = {key: i for i, key in enumerate(self.order)}
+        self.years = {key: year for year, _, key in ordered}
+
+    def series(self, key):
+        """Все модели серии ("iphone 12" → 12 mini/12/12 Pro/12 Pro Max)"""
+        return [k for k in self.order if family_key(k) == key]
+
+    def _bounds(self, key):
+        """Позиции первой и последней модели для границы диапазона"""
+        members = [key] if key in self.position else self.series(key)
+        if members:
+            return self.position[members[0]], self.position[members[-1]]
+        year = LEGACY_YEARS.get(key)
+        if year is None:
+            return None
+        # Модель старше каталога: граница — первая модель того же года или новее
+        start = next((i for i, k in enumerate(self.order) if self.years[k] >= year), len(self.order))
+        return start, start - 1
+
+    def between(self, start, end):
+        """Модели той же линейки от start до end включительно"""
+        low, high = self._bounds(start), self._bounds(end)
+        if low is None or high is None:
+            return None
+        line = product_line(start)
+        return [k for k in self.order[low[0]:high[1] + 1] if product_line(k) == line]
+
+def _parse(entry):
+    """Текст записи → (текст без пометок, фильтры, пометки)"""
+    filters, notes = [], []
+
+    def qualifier(match):
+        text = match.group(1).strip()
+        if _GENERATION.match(text):
+            return " " + text
+        if text.lower().startswith("non-"):
+            filters.append(text[4:].lower())
+        else:
+            notes.append(text)
+        return " "
+
+    return _PAREN.sub(qualifier, entry).strip(), filters, notes
+
+def resolve_entry(entry, catalog):
+    """Запись compatible_devices → (ключи, пометки, ключи вне каталога)"""
+    text, filters, notes = _parse(entry)
+    parts = _RANGE.split(text)
+
+    if len(parts) == 2:
+        start, end = (ALIASES.get(k, k) for k in (device_keys.canonical_key(_SERIES.sub("", p)) for p in parts))
+        # "iPhone 6 - iPhone 14 series" — до последней модели серии, а не до базовой
+        if _SERIES.search(parts[1]):
+            end = (catalog.series(end) or [end])[-1]
+        keys = catalog.between(start, end)
+        if keys is None:
+            return [], notes, [entry]
+        if start not in catalog.position and start in LEGACY_YEARS:
+            keys = [start] + keys
+    elif _SERIES.search(text):
+        keys = catalog.series(device_keys.canonical_key(_SERIES.sub("", text)))
+        if not keys:
+            return [], notes, [entry]
+    else:
+        key = device_keys.canonical_key(text)
+        keys = [ALIASES.get(key, key)]
+
+    for word in filters:
+        keys = [k for k in keys if word not in k.split(" ")]
+    uncatalogued = [k for k in keys if k not in catalog.position]
+    return keys, notes, uncatalogued
+
+def build(ic_data, devices):
+    """Построить обе карты по ic_comprehensive.json и devices.json"""
+    catalog = DeviceCatalog(devices)
+    ic_to_devices = {}
+    device_to_ics = {}
+    aliases = {}
+    uncatalogued = {}
+    unresolved = []
+
+    for family, section in IC_FAMILIES:
+        for ic in ic_data.get(section, []):
+            ic_name = ic.get("name", "")
+            entry = ic_to_devices.setdefault(ic_name, {
+                "family": family,
+                "designation": ic.get("designation", ""),
+                "devices": [],
+                "notes": {}
+            })
+            for text in ic.get("compatible_devices", []):
+                keys, notes, missing = resolve_entry(text, catalog)
+                if not keys:
+                    unresolved.append({"ic": ic_name, "entry": text})
+                    continue
+                for key in missing:
+                    uncatalogued.setdefault(key, []).append(ic_name)
+                for key in keys:
+                    if key not in entry["devices"]:
+                        entry["devices"].append(key)
+                    if notes:
+                        entry["notes"][key] = notes
+                    ics = device_to_ics.setdefault(key, {}).setdefault(family, [])
+                    if ic_name not in ics:
+                        ics.append(ic_name)
+            for alias in ic_aliases(ic_name):
+                aliases.setdefault(alias, ic_name)
+
+    for entry in ic_to_devices.values():
+        if not entry["notes"]:
+            del entry["notes"]
+
+    return {
+        "source": "collect_ic_data.py + devices.json",
+        "ic_to_devices": ic_to_devices,
+        "device_to_ics": device_to_ics,
+        "ic_aliases": aliases,
+        "device_names": {key: catalog.names.get(key, key) for key in device_to_ics},
+        "uncatalogued": uncatalogued,
+        "unresolved": unresolved,
+        "stats": {
+            "ics": len(ic_to_devices),
+            "devices": len(device_to_ics),
+            "links": sum(len(e["devices"]) for e in ic_to_devices.values()),
+            "uncatalogued": len(uncatalogued),
+            "unresolved": len(unresolved)
+        }
+    }
+
+def devices_for_ic(xref, ic_name):
+    """Ключи устройств с данной IC (по полному имени или базовому номеру)"""
+    name = xref["ic_aliases"].get(ic_name.upper(), ic_name)
+    entry = xref["ic_to_devices"].get(name)
+    return entry["devices"] if entry else []
+
+def ics_for_device(xref, device_name):
+    """IC устройства по семействам"""
+    return xref["device_to_ics"].get(device_keys.canonical_key(device_name), {})
+
+def check(xref, expected=EXPECTED_DEVICES):
+    """Ошибки ["IC: нет устройства"] по известным связям (пусто — всё на месте)"""
+    errors = []
+    for ic_name, keys in expected.items():
+        entry = xref["ic_to_devices"].get(ic_name)
+        if entry is None:
+            errors.append(f"{ic_name}: нет в индексе")
+            continue
+        errors.extend(f"{ic_name}: нет {key}" for key in keys if key not in entry["devices"])
+    return errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перекрёстный индекс IC ↔ устройства")
+    parser.add_argument("--data-dir", default=OUTPUT_DIR,
+                        help="каталог с ic_comprehensive.json и devices.json")
+    parser.add_argument("--check", action="store_true",
+                        help="проверить известные связи (EXPECTED_DEVICES), код 1 при ошибках")
+    args = parser.parse_args(argv)
+
+    documents = []
+    for filename in ("ic_comprehensive.json", "devices.json"):
+        filepath = os.path.join(args.data_dir, filename)
+        if not os.path.exists(filepath):
+            parser.error(f"нет файла {filepath} — сначала запустите сборщики и merge_all_data.py")
+        with open(filepath, "r", encoding="utf-8") as f:
+            documents.append(json.load(f))
+    xref = build(*documents)
+
+    stats = xref["stats"]
+    print(f"📊 IC: {stats['ics']}, устройств: {stats['devices']}, связей: {stats['links']}")
+    if args.check:
+        errors = check(xref)
+        for error in errors:
+            print(f"  ❌ {error}")
+        if errors:
+            sys.exit(1)
+        print(f"✅ Известные связи на месте: {len(EXPECTED_DEVICES)} IC")
+    return xref
+
+if __name__ == "__main__":
+    main()
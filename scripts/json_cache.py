@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Общий для процесса кэш JSON документов.
+
+Документ разбирается один раз и переиспользуется всеми этапами, пока у файла
+не изменились mtime и размер. Возвращаются неизменяемые представления
+(MappingProxyType вместо dict, tuple вместо list), поэтому этап не может
+случайно испортить данные соседнего этапа.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+# Лимит памяти кэша (МБ), можно переопределить переменной окружения
+DEFAULT_MAX_MB = int(os.environ.get("NEXX_JSON_CACHE_MB", "256"))
+
+# Во сколько раз разобранный документ больше файла на диске (оценка для лимита)
+PARSED_SIZE_FACTOR = 6
+
+def freeze(value):
+    """Рекурсивно превратить разобранный JSON в неизменяемое представление"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def thaw(value):
+    """Обратное преобразование — для json.dump(default=...) и правок копии"""
+    if isinstance(value, MappingProxyType):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+def json_default(obj):
+    """default для json.dump: сериализует неизменяемые представления и записи (records)"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    to_json = getattr(obj, "to_json", None)
+    if to_json is not None:
+        return to_json()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class DocumentCache:
+    """LRU кэш документов с ключом путь + (mtime, size)"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.parse_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def load(self, filepath):
+        """Вернуть (документ, sha256) или (None, None), если файла нет"""
+        filepath = os.path.abspath(filepath)
+        try:
+            st = os.stat(filepath)
+        except FileNotFoundError:
+            self.invalidate(filepath)
+            return None, None
+
+        signature = (st.st_mtime_ns, st.st_size)
+        entry = self.entries.get(filepath)
+        if entry and entry["signature"] == signature:
+            self.entries.move_to_end(filepath)
+            self.hits += 1
+            self.saved_seconds += entry["parse_seconds"]
+            return entry["document"], entry["sha256"]
+
+        self.misses += 1
+        started = time.perf_counter()
+        with open(filepath, "rb") as f:
+            raw = f.read()
+        document = freeze(json.loads(raw))
+        elapsed = time.perf_counter() - started
+        self.parse_seconds += elapsed
+
+        self.invalidate(filepath)
+        entry = {
+            "signature": signature,
+            "document": document,
+            "sha256": hashlib.sha256(raw).hexdigest(),
+            "parse_seconds": elapsed,
+            "bytes": len(raw) * PARSED_SIZE_FACTOR
+        }
+        self.entries[filepath] = entry
+        self.total_bytes += entry["bytes"]
+        self._evict()
+        return document, entry["sha256"]
+
+    def invalidate(self, filepath):
+        """Удалить документ из кэша (например, после перезаписи файла)"""
+        entry = self.entries.pop(os.path.abspath(filepath), None)
+        if entry:
+            self.total_bytes -= entry["bytes"]
+
+    def _evict(self):
+        # Самый свежий документ остаётся, даже если один превышает лимит
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry["bytes"]
+            self.evictions += 1
+
+    def stats(self):
+        """Счётчики кэша"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "documents": len(self.entries),
+            "bytes": self.total_bytes,
+            "parse_seconds": round(self.parse_seconds, 6),
+            "saved_seconds": round(self.saved_seconds, 6)
+        }
+
+# Единственный экземпляр на процесс
+DOCUMENT_CACHE = DocumentCache()
+
+def load(filepath):
+    """Загрузить документ через общий кэш"""
+    return DOCUMENT_CACHE.load(filepath)
+
+def stats():
+    """Счётчики общего кэша"""
+    return DOCUMENT_CACHE.stats()
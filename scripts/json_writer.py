@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Атомарная запись JSON артефактов.
+
+JSON потоково пишется во временный файл рядом с целевым, затем fsync и
+os.replace — читатель видит либо старый файл, либо новый целиком, но не
+половину. Компактный режим убирает отступы (production), рядом можно
+положить предсжатые .gz/.br копии. По каждому артефакту собирается отчёт:
+размеры и время записи/сжатия.
+"""
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него .br не создаётся
+    brotli = None
+
+DEFAULT_COMPACT = os.environ.get("NEXX_JSON_COMPACT", "") not in ("", "0")
+DEFAULT_COMPRESS = tuple(f for f in os.environ.get("NEXX_JSON_COMPRESS", "").split(",") if f)
+DEFAULT_GZIP_LEVEL = int(os.environ.get("NEXX_GZIP_LEVEL", "9"))
+DEFAULT_BROTLI_LEVEL = int(os.environ.get("NEXX_BROTLI_LEVEL", "11"))
+
+SUPPORTED_FORMATS = ("gz", "br")
+CHUNK_SIZE = 1024 * 1024
+
+# Отчёты по записанным в этом процессе артефактам
+REPORTS = []
+
+# mkstemp создаёт файлы 0600 — артефакты должны читаться веб-сервером
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+def _atomic_target(filepath):
+    """Временный файл в том же каталоге (os.replace атомарен в пределах ФС)"""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix=".tmp")
+    return fd, tmp
+
+def _fsync_dir(filepath):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(filepath)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _replace(tmp, filepath):
+    os.replace(tmp, filepath)
+    _fsync_dir(filepath)
+
+def atomic_write(filepath, write, before_replace=None):
+    """Вызвать write(f) для временного файла и атомарно заменить целевой.
+
+    before_replace() вызывается, когда временный файл записан, но ещё не
+    на месте: исключение из него отменяет запись, прежний файл остаётся.
+    """
+    fd, tmp = _atomic_target(filepath)
+    try:
+        os.chmod(tmp, FILE_MODE)
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if before_replace is not None:
+            before_replace()
+        _replace(tmp, filepath)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _write_gzip(source, level):
+    def write(f):
+        # mtime=0 — одинаковый вход даёт байт-в-байт одинаковый .gz
+        with open(source, "rb") as src, gzip.GzipFile(fileobj=f, mode="wb", compresslevel=level, mtime=0) as gz:
+            shutil.copyfileobj(src, gz, CHUNK_SIZE)
+    atomic_write(source + ".gz", write)
+
+def _write_brotli(source, level):
+    def write(f):
+        compressor = brotli.Compressor(quality=level)
+        with open(source, "rb") as src:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                f.write(compressor.process(chunk))
+        f.write(compressor.finish())
+    atomic_write(source + ".br", write)
+
+def encode_json(data, compact=None, default=None):
+    """JSON в байтах с теми же настройками, что и write_json"""
+    compact = DEFAULT_COMPACT if compact is None else compact
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=default)
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=2, default=default)
+    return text.encode("utf-8")
+
+def _write_siblings(filepath, report, compress, gzip_level, brotli_level):
+    """Сжатые копии рядом с файлом; устаревшие копии удаляются"""
+    compress = DEFAULT_COMPRESS if compress is None else tuple(compress)
+    gzip_level = DEFAULT_GZIP_LEVEL if gzip_level is None else gzip_level
+    brotli_level = DEFAULT_BROTLI_LEVEL if brotli_level is None else brotli_level
+
+    for fmt in SUPPORTED_FORMATS:
+        sibling = f"{filepath}.{fmt}"
+        if fmt in compress and (fmt != "br" or brotli is not None):
+            started = time.perf_counter()
+            if fmt == "gz":
+                _write_gzip(filepath, gzip_level)
+            else:
+                _write_brotli(filepath, brotli_level)
+            report[f"{fmt}_bytes"] = os.path.getsize(sibling)
+            report[f"{fmt}_seconds"] = round(time.perf_counter() - started, 6)
+        elif os.path.exists(sibling):
+            # Старая сжатая копия не должна расходиться с новым файлом
+            os.remove(sibling)
+
+def write_json(data, filepath, compact=None, compress=None, gzip_level=None, brotli_level=None, default=None,
+               before_replace=None, track=True):
+    """Атомарно записать JSON и (по настройке) сжатые копии, вернуть отчёт.
+
+    track=False — служебный файл (состояние сборки, манифест): отчёт
+    возвращается, но в REPORTS не попадает.
+    """
+    compact = DEFAULT_COMPACT if compact is None else compact
+
+    def write(f):
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        if compact:
+            json.dump(data, text, ensure_ascii=False, separators=(",", ":"), default=default)
+        else:
+            json.dump(data, text, ensure_ascii=False, indent=2, default=default)
+        text.flush()
+        text.detach()
+
+    started = time.perf_counter()
+    atomic_write(filepath, write, before_replace)
+
+    report = {
+        "file": os.path.basename(filepath),
+        "bytes": os.path.getsize(filepath),
+        "seconds": round(time.perf_counter() - started, 6),
+        "compact": compact
+    }
+    _write_siblings(filepath, report, compress, gzip_level, brotli_level)
+
+    if track:
+        REPORTS.append(report)
+    return report
+
+def write_bytes(raw, filepath, compress=None, gzip_level=None, brotli_level=None):
+    """Атомарно записать готовые байты (например, из encode_json) и сжатые копии"""
+    started = time.perf_counter()
+    atomic_write(filepath, lambda f: f.write(raw))
+
+    report = {
+        "file": os.path.basename(filepath),
+        "bytes": len(raw),
+        "seconds": round(time.perf_counter() - started, 6)
+    }
+    _write_siblings(filepath, report, compress, gzip_level, brotli_level)
+
+    REPORTS.append(report)
+    return report
+
+def print_report(reports=None):
+    """Таблица размеров и времени по артефактам"""
+    reports = REPORTS if reports is None else reports
+    if not reports:
+        return
+    print("\n📦 Артефакты:")
+    for r in reports:
+        line = f"  {r['file']:<36} {r['bytes'] / 1024:9.1f} КБ {r['seconds'] * 1000:7.1f} мс"
+        for fmt in SUPPORTED_FORMATS:
+            if f"{fmt}_bytes" in r:
+                ratio = r[f"{fmt}_bytes"] / r["bytes"] if r["bytes"] else 0
+                line += f" | {fmt}: {r[f'{fmt}_bytes'] / 1024:.1f} КБ ({ratio:.0%}, {r[f'{fmt}_seconds'] * 1000:.1f} мс)"
+        print(line)
@@ -2,25 +2,158 @@
 """
 Объединение всех собранных данных в единые файлы для приложения
 """
+import argparse
+import glob
+import hashlib
 import json
 import os
+import sys
+import time
 from datetime import datetime
 
+import article_index
+import board_index
+import charging_ic_rules
+import collect_ic_data
+import delta_patches
+import device_keys
+import device_pack
+import device_shards
+import exchange_prices
+import ic_cross_reference
+import json_cache
+import json_writer
+import price_matrix
+import records
+import run_manifest
+import schema_validator
+import stage_profiler
+
 OUTPUT_DIR = "/home/user/webapp/public/data"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Состояние инкрементальной сборки: хеши входов/выходов каждого этапа
+STATE_FILE = ".merge_state.json"
+
+# Модули, изменение которых инвалидирует все этапы
+BUILD_MODULES = [
+    "merge_all_data.py", "json_cache.py", "device_keys.py",
+    "charging_ic_rules.py", "collect_ic_data.py", "json_writer.py",
+    "device_pack.py", "device_shards.py", "delta_patches.py", "article_index.py",
+    "ic_cross_reference.py", "board_index.py", "exchange_prices.py",
+    "price_matrix.py", "schema_validator.py", "records.py"
+]
+
+# Входы вне каталога данных: прайс Exchange UA, таблицы цен в леях и
+# master-db.json с курсами (bench_scaling подменяет их синтетическими)
+EXCHANGE_DIR = exchange_prices.DEFAULT_DIR
+SHEETS_DIR = price_matrix.SHEETS_DIR
+MASTER_DB = price_matrix.MASTER_DB
+
+# Ключ входа-списка файлов в состоянии сборки: "glob:<абсолютная маска>"
+LISTING_PREFIX = "glob:"
+
+# Профилировщик прогона (--profile), None — замеры выключены
+PROFILER = None
+
+# Проверка схем в фоновом потоке (выключается --no-validate)
+VALIDATOR = None
+
+# Настройки записи артефактов (меняются флагами --compact/--compress)
+WRITE_OPTIONS = {
+    "compact": json_writer.DEFAULT_COMPACT,
+    "compress": json_writer.DEFAULT_COMPRESS,
+    "gzip_level": json_writer.DEFAULT_GZIP_LEVEL,
+    "brotli_level": json_writer.DEFAULT_BROTLI_LEVEL
+}
+
+# Входы/выходы текущего выполняемого этапа (заполняются load_json/save_json)
+_stage_inputs = None
+_stage_outputs = None
+
+# Счётчики текущего этапа для манифеста прогона (заполняются count)
+_stage_counts = None
+
+def sha256_bytes(raw):
+    """SHA-256 от содержимого"""
+    return hashlib.sha256(raw).hexdigest()
+
+def file_hash(filepath):
+    """SHA-256 файла или None, если файла нет"""
+    if not os.path.exists(filepath):
+        return None
+    with open(filepath, "rb") as f:
+        return sha256_bytes(f.read())
 
 def load_json(filename):
-    """Загрузить JSON файл"""
+    """Загрузить JSON файл (неизменяемое представление из общего кэша)"""
     filepath = os.path.join(OUTPUT_DIR, filename)
-    if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return None
+    if PROFILER:
+        hits = json_cache.DOCUMENT_CACHE.hits
+        started = time.perf_counter()
+    document, digest = json_cache.load(filepath)
+    if PROFILER and document is not None:
+        PROFILER.record_read(filepath, time.perf_counter() - started, json_cache.DOCUMENT_CACHE.hits > hits)
+    if _stage_inputs is not None:
+        _stage_inputs[filename] = digest
+    return document
+
+def track_input(filepath):
+    """Учесть в графе сборки вход не из OUTPUT_DIR (например, .xlsx прайс)"""
+    filepath = os.path.abspath(filepath)
+    if _stage_inputs is not None:
+        _stage_inputs[filepath] = file_hash(filepath)
+    if PROFILER and os.path.exists(filepath):
+        PROFILER.record_read(filepath, 0.0)
+    return filepath
+
+def listing_hash(pattern):
+    """SHA-256 списка файлов по маске: имена, mtime и размеры"""
+    listing = []
+    for filepath in sorted(glob.glob(pattern)):
+        stat = os.stat(filepath)
+        listing.append([os.path.basename(filepath), stat.st_mtime_ns, stat.st_size])
+    return sha256_bytes(json.dumps(listing).encode("utf-8"))
+
+def track_listing(pattern):
+    """Учесть в графе сборки состав каталога: новый или удалённый файл по
+    маске пересобирает этап, даже если прочитанные раньше файлы не менялись"""
+    pattern = os.path.abspath(pattern)
+    if _stage_inputs is not None:
+        _stage_inputs[LISTING_PREFIX + pattern] = listing_hash(pattern)
+    return pattern
+
+def count(**values):
+    """Записать счётчики этапа в манифест прогона (run_manifest)"""
+    if _stage_counts is not None:
+        _stage_counts.update(values)
 
 def save_json(data, filename):
     """Сохранить JSON файл"""
     filepath = os.path.join(OUTPUT_DIR, filename)
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Проверка идёт в фоне, пока документ сериализуется во временный файл;
+    # при ошибке схемы файл не переименовывается и прежний артефакт остаётся
+    pending = VALIDATOR.submit(filename, data) if VALIDATOR else None
+    before_replace = (lambda: VALIDATOR.result(pending)) if pending else None
+    started = time.perf_counter()
+    report = json_writer.write_json(data, filepath, default=json_cache.json_default,
+                                    before_replace=before_replace, **WRITE_OPTIONS)
+    if PROFILER:
+        PROFILER.record_write(report, time.perf_counter() - started)
+    json_cache.DOCUMENT_CACHE.invalidate(filepath)
+    if _stage_outputs is not None:
+        _stage_outputs[filename] = file_hash(filepath)
+    print(f"✅ Сохранено: {filename}")
+
+def save_binary(data, filename):
+    """Сохранить данные в компактном бинарном формате (device_pack)"""
+    filepath = os.path.join(OUTPUT_DIR, filename)
+    started = time.perf_counter()
+    report = device_pack.dump(data, filepath)
+    if PROFILER:
+        PROFILER.record_write(report, time.perf_counter() - started)
+    if _stage_outputs is not None:
+        _stage_outputs[filename] = file_hash(filepath)
     print(f"✅ Сохранено: {filename}")
 
 def merge_devices():
@@ -36,89 +169,60 @@ def merge_devices():
     
     devices = []
     
+    # Таблица контроллеров зарядки должна ссылаться на IC из каталога
+    for problem in charging_ic_rules.validate_rules(collect_ic_data.CHARGING_ICS):
+        print(f"  ⚠️ {problem}")
+    
+    # Индекс плат iPhone по каноническому ключу — строится один раз
+    iphone_boards, collisions = device_keys.build_index(boards.get("iphones", []) if boards else [])
+    for collision in collisions:
+        print(f"  ⚠️ Дубликат платы {collision['dropped']} (оставлена {collision['kept']})")
+    
+    # Индекс запчастей iPad/Mac по нормализованным признакам модели
+    parts_by_model = parts.get("parts_by_model", {}) if parts else {}
+    parts_index = device_keys.build_model_index(parts_by_model)
+    matched_parts = set()
+    
     # Начинаем с iFixit данных (iPhone)
     if ifixit:
         for iphone in ifixit.get("iphones", []):
             name = iphone.get("name", "")
-            device = {
-                "name": name,
-                "category": "iPhone",
-                "model": "",
-                "year": 0,
-                "ifixit_url": iphone.get("ifixit_url", ""),
-                "ifixit_image": iphone.get("image", ""),
-                "repairability": iphone.get("repairability"),
-                "guides_count": iphone.get("guides_count", 0),
-                "available_repairs": iphone.get("available_repairs", []),
-                "board_numbers": [],
-                "processor": "",
-                "charging_ic": {},
-                "official_service_prices": {},
-                "service_parts": {},
-                "common_issues": [],
-                "repair_difficulty": "Средняя",
-                "repair_time": "1-2 часа"
-            }
+            device = records.Device(name, "iPhone",
+                                    repair_difficulty="Средняя", repair_time="1-2 часа")
+            device.ifixit_url = iphone.get("ifixit_url", "")
+            device.ifixit_image = iphone.get("image", "")
+            device.repairability = iphone.get("repairability")
+            device.guides_count = iphone.get("guides_count", 0)
+            device.available_repairs = list(iphone.get("available_repairs", []))
             
             # Добавляем данные плат
-            if boards:
-                for board_info in boards.get("iphones", []):
-                    if board_info.get("name", "") in name or name in board_info.get("name", ""):
-                        device["model"] = board_info.get("model", "")
-                        device["year"] = board_info.get("year", 0)
-                        board_num = board_info.get("board")
-                        if isinstance(board_num, list):
-                            device["board_numbers"] = board_num
-                        else:
-                            device["board_numbers"] = [board_num] if board_num else []
-                        break
+            board_info = device_keys.lookup(iphone_boards, name)
+            if board_info:
+                device.model = board_info.get("model", "")
+                device.year = board_info.get("year", 0)
+                board_num = board_info.get("board")
+                if isinstance(board_num, (list, tuple)):
+                    device.board_numbers = list(board_num)
+                else:
+                    device.board_numbers = [board_num] if board_num else []
             
             # Добавляем артикулы и цены
-            if parts:
-                parts_data = parts.get("parts_by_model", {}).get(name, {})
-                if parts_data:
-                    for part_type, part_info in parts_data.items():
-                        device["official_service_prices"][part_type] = part_info.get("price_usd", 0)
-                        device["service_parts"][part_type] = {
-                            "article": part_info.get("article", ""),
-                            "description": part_info.get("description", ""),
-                            "price_usd": part_info.get("price_usd", 0)
-                        }
+            parts_data = parts_by_model.get(name)
+            if parts_data:
+                apply_service_parts(device, parts_data)
             
             # Добавляем IC данные
             if ic_data:
-                year = device.get("year", 0)
-                if year >= 2023:
-                    device["charging_ic"] = {"main": "SN2800", "designation": "USB-C Controller"}
-                    device["connector_type"] = "USB-C"
-                elif year >= 2020:
-                    device["charging_ic"] = {"main": "SN2611D0", "designation": "Tristar U3300"}
-                    device["connector_type"] = "Lightning"
-                elif year >= 2018:
-                    device["charging_ic"] = {"main": "SN2600B1", "designation": "Tigris"}
-                    device["connector_type"] = "Lightning"
-                elif year >= 2017:
-                    device["charging_ic"] = {"main": "SN2501", "designation": "Hydra U3300"}
-                    device["connector_type"] = "Lightning"
-                elif year >= 2016:
-                    device["charging_ic"] = {"main": "1612A1", "designation": "Hydra"}
-                    device["connector_type"] = "Lightning"
-                elif year >= 2015:
-                    device["charging_ic"] = {"main": "1610A3", "designation": "Tristar U2"}
-                    device["connector_type"] = "Lightning"
-                elif year >= 2014:
-                    device["charging_ic"] = {"main": "1610A2", "designation": "Tristar U2"}
-                    device["connector_type"] = "Lightning"
-                else:
-                    device["charging_ic"] = {"main": "1610A1", "designation": "Tristar U2"}
-                    device["connector_type"] = "Lightning"
+                charging_ic, connector = charging_ic_rules.resolve_charging_ic("iPhone", device.year)
+                device.charging_ic = records.ChargingIC.intern(charging_ic)
+                device.connector_type = connector
             
             # Типичные проблемы
-            device["common_issues"] = get_common_issues("iPhone", device.get("year", 0), name)
+            device.common_issues = get_common_issues("iPhone", device.year, name)
             
             # Сложность ремонта
-            device["repair_difficulty"] = get_repair_difficulty(name)
-            device["repair_time"] = get_repair_time(name)
+            device.repair_difficulty = get_repair_difficulty(name)
+            device.repair_time = get_repair_time(name)
             
             devices.append(device)
     
@@ -126,47 +230,26 @@ def merge_devices():
     if boards:
         for ipad in boards.get("ipads", []):
             name = ipad.get("name", "")
-            device = {
-                "name": name,
-                "category": "iPad",
-                "model": ipad.get("model", ""),
-                "year": ipad.get("year", 0),
-                "board_numbers": [ipad.get("board", "")] if ipad.get("board") else [],
-                "processor": "",
-                "charging_ic": {},
-                "official_service_prices": {},
-                "service_parts": {},
-                "common_issues": get_common_issues("iPad", ipad.get("year", 0), name),
-                "repair_difficulty": "Сложная",
-                "repair_time": "2-4 часа"
-            }
+            device = records.Device(
+                name, "iPad",
+                model=ipad.get("model", ""),
+                year=ipad.get("year", 0),
+                board_numbers=[ipad.get("board", "")] if ipad.get("board") else [],
+                common_issues=get_common_issues("iPad", ipad.get("year", 0), name),
+                repair_difficulty="Сложная",
+                repair_time="2-4 часа"
+            )
             
-            # iPad Pro с USB-C
-            if "Pro" in name and ipad.get("year", 0) >= 2018:
-                device["charging_ic"] = {"main": "SN2800", "designation": "USB-C Controller"}
-                device["connector_type"] = "USB-C"
-            elif "Air" in name and ipad.get("year", 0) >= 2020:
-                device["charging_ic"] = {"main": "SN2800", "designation": "USB-C Controller"}
-                device["connector_type"] = "USB-C"
-            elif "mini 6" in name or (ipad.get("year", 0) >= 2021 and "mini" in name.lower()):
-                device["charging_ic"] = {"main": "SN2800", "designation": "USB-C Controller"}
-                device["connector_type"] = "USB-C"
-            else:
-                device["charging_ic"] = {"main": "SN2611D0", "designation": "Tristar"}
-                device["connector_type"] = "Lightning"
+            # Контроллер зарядки по линейке и году
+            charging_ic, connector = charging_ic_rules.resolve_charging_ic("iPad", ipad.get("year", 0), name)
+            device.charging_ic = records.ChargingIC.intern(charging_ic)
+            device.connector_type = connector
             
             # Добавляем артикулы если есть
-            if parts:
-                for model_name, parts_data in parts.get("parts_by_model", {}).items():
-                    if "iPad" in model_name and (name in model_name or model_name in name):
-                        for part_type, part_info in parts_data.items():
-                            device["official_service_prices"][part_type] = part_info.get("price_usd", 0)
-                            device["service_parts"][part_type] = {
-                                "article": part_info.get("article", ""),
-                                "description": part_info.get("description", ""),
-                                "price_usd": part_info.get("price_usd", 0)
-                            }
-                        break
+            model_name = parts_index.lookup(name, ipad.get("year"))
+            if model_name:
+                apply_service_parts(device, parts_by_model[model_name])
+                matched_parts.add(model_name)
             
             devices.append(device)
     
@@ -174,45 +257,73 @@ def merge_devices():
     if boards:
         for mac in boards.get("macbooks", []):
             name = mac.get("name", "")
-            device = {
-                "name": name,
-                "category": "Mac",
-                "model": mac.get("model", ""),
-                "emc": mac.get("emc", ""),
-                "year": mac.get("year", 0),
-                "board_numbers": [mac.get("board", "")] if mac.get("board") else [],
-                "processor": mac.get("arch", ""),
-                "charging_ic": {"main": "USB-C PD Controller", "designation": "CD3217"},
-                "connector_type": "USB-C",
-                "official_service_prices": {},
-                "service_parts": {},
-                "common_issues": get_common_issues("Mac", mac.get("year", 0), name),
-                "repair_difficulty": "Сложная",
-                "repair_time": "2-6 часов"
-            }
+            device = records.Device(
+                name, "Mac",
+                model=mac.get("model", ""),
+                emc=mac.get("emc", ""),
+                year=mac.get("year", 0),
+                board_numbers=[mac.get("board", "")] if mac.get("board") else [],
+                processor=mac.get("arch", ""),
+                common_issues=get_common_issues("Mac", mac.get("year", 0), name),
+                repair_difficulty="Сложная",
+                repair_time="2-6 часов"
+            )
+            
+            charging_ic, connector = charging_ic_rules.resolve_charging_ic("Mac", mac.get("year", 0))
+            device.charging_ic = records.ChargingIC.intern(charging_ic)
+            device.connector_type = connector
             
             # Добавляем артикулы если есть
-            if parts:
-                for model_name, parts_data in parts.get("parts_by_model", {}).items():
-                    if "MacBook" in model_name and (name in model_name or model_name in name):
-                        for part_type, part_info in parts_data.items():
-                            device["official_service_prices"][part_type] = part_info.get("price_usd", 0)
-                            device["service_parts"][part_type] = {
-                                "article": part_info.get("article", ""),
-                                "description": part_info.get("description", ""),
-                                "price_usd": part_info.get("price_usd", 0)
-                            }
-                        break
+            model_name = parts_index.lookup(name, mac.get("year"))
+            if model_name:
+                apply_service_parts(device, parts_by_model[model_name])
+                matched_parts.add(model_name)
             
             devices.append(device)
     
-    print(f"  📱 iPhone: {len([d for d in devices if d['category'] == 'iPhone'])}")
-    print(f"  📱 iPad: {len([d for d in devices if d['category'] == 'iPad'])}")
-    print(f"  💻 Mac: {len([d for d in devices if d['category'] == 'Mac'])}")
+    save_parts_match_report(devices, parts_index, matched_parts)
+    
+    print(f"  📱 iPhone: {len([d for d in devices if d.category == 'iPhone'])}")
+    print(f"  📱 iPad: {len([d for d in devices if d.category == 'iPad'])}")
+    print(f"  💻 Mac: {len([d for d in devices if d.category == 'Mac'])}")
     print(f"  📊 Всего: {len(devices)}")
+    count(
+        total=len(devices),
+        iphone=len([d for d in devices if d.category == "iPhone"]),
+        ipad=len([d for d in devices if d.category == "iPad"]),
+        mac=len([d for d in devices if d.category == "Mac"]),
+        with_service_parts=len([d for d in devices if d.service_parts]),
+        with_board_numbers=len([d for d in devices if d.board_numbers])
+    )
     
     return devices
 
+def apply_service_parts(device, parts_data):
+    """Перенести артикулы и цены модели на устройство"""
+    for part_type, part_info in parts_data.items():
+        device.service_parts[part_type] = records.ServicePart(
+            part_info.get("article", ""),
+            part_info.get("description", ""),
+            part_info.get("price_usd", 0)
+        )
+
+def save_parts_match_report(devices, parts_index, matched_parts):
+    """Отчёт о несопоставленных моделях запчастей iPad/Mac — для ручной проверки"""
+    unmatched_parts = sorted(set(parts_index.signatures) - matched_parts)
+    unmatched_devices = sorted(
+        d.name for d in devices
+        if d.category in ("iPad", "Mac") and not d.service_parts
+    )
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "unmatched_parts_models": unmatched_parts,
+        "devices_without_parts": unmatched_devices,
+        "ambiguous_keys": sorted(device_keys.describe_key(key) for key in parts_index.ambiguous)
+    }
+    save_json(report, "parts_match_report.json")
+    if unmatched_parts:
+        print(f"  ⚠️ Модели запчастей без устройства: {len(unmatched_parts)} (см. parts_match_report.json)")
+
 def get_common_issues(category, year, name):
     """Получить типичные проблемы для устройства"""
     issues = []
@@ -324,6 +435,8 @@ def merge_error_codes():
         save_json(comprehensive, "error_codes.json")
         print(f"  📊 iTunes: {len(comprehensive.get('itunes_restore_errors', []))}")
         print(f"  📊 Mac: {len(comprehensive.get('mac_diagnostics', []))}")
+        count(itunes=len(comprehensive.get("itunes_restore_errors", [])),
+              mac=len(comprehensive.get("mac_diagnostics", [])))
         return comprehensive
     
     return None
@@ -345,10 +458,32 @@ def merge_ic_database():
         print(f"  📊 WiFi/BT: {stats.get('wifi_bt', 0)}")
         print(f"  📊 Biometric: {stats.get('biometric', 0)}")
         print(f"  📊 Всего: {stats.get('total', 0)}")
+        count(**stats)
         return comprehensive
     
     return None
 
+def merge_ic_cross_reference():
+    """Перекрёстный индекс IC ↔ устройства по всем семействам микросхем"""
+    print("\n🔗 Перекрёстный индекс IC ↔ устройства...")
+    
+    ic_data = load_json("ic_comprehensive.json")
+    devices = load_json("devices.json")
+    
+    if ic_data and devices:
+        xref = ic_cross_reference.build(ic_data, devices)
+        save_json(xref, "ic_cross_reference.json")
+        stats = xref["stats"]
+        print(f"  📊 IC: {stats['ics']}, устройств: {stats['devices']}, связей: {stats['links']}")
+        count(**stats)
+        if xref["uncatalogued"]:
+            print(f"  ⚠️ Вне каталога устройств: {', '.join(sorted(xref['uncatalogued']))}")
+        for item in xref["unresolved"]:
+            print(f"  ⚠️ Не распознано: {item['ic']}: {item['entry']}")
+        return xref
+    
+    return None
+
 def merge_logic_boards():
     """Объединить базу плат"""
     print("\n🔧 Объединение базы плат...")
@@ -389,6 +524,34 @@ def merge_logic_boards():
         print(f"  📊 Intel Mac: {len(result['intel_boards'])}")
         print(f"  📊 iPhone: {len(result['iphone_boards'])}")
         print(f"  📊 iPad: {len(result['ipad_boards'])}")
+        count(m_series=len(result["m_series_boards"]), intel=len(result["intel_boards"]),
+              iphone=len(result["iphone_boards"]), ipad=len(result["ipad_boards"]))
+        return result
+    
+    return None
+
+def merge_board_index():
+    """Обратный индекс: номер платы → устройства, модели, EMC, годы"""
+    print("\n🧭 Индекс номеров плат...")
+    
+    boards = load_json("board_numbers.json")
+    
+    if boards:
+        index = board_index.build(boards)
+        shared = sorted(board for board, record in index.items() if record["shared"])
+        result = {
+            "source": "board_numbers.json",
+            "boards": index,
+            "shared_boards": shared,
+            "stats": {
+                "boards": len(index),
+                "shared": len(shared),
+                "devices": sum(len(record["devices"]) for record in index.values())
+            }
+        }
+        save_json(result, "board_index.json")
+        print(f"  📊 Плат: {len(index)}, общих для нескольких устройств: {len(shared)}")
+        count(**result["stats"])
         return result
     
     return None
@@ -429,7 +592,13 @@ def merge_article_search():
         }
         
         save_json(result, "article_search_index.json")
+        
+        # Точный индекс, префиксное дерево и инвертированный индекс для поиска
+        structures = article_index.build(search_index)
+        save_json(structures, "article_search_lookup.json")
         print(f"  📊 Артикулов: {len(search_index)}")
+        print(f"  📊 Слов в индексе: {len(structures['tokens'])}")
+        count(articles=len(search_index), tokens=len(structures["tokens"]))
         return result
     
     return None
@@ -597,36 +766,20 @@ def merge_repair_knowledge():
                     "price_range": ic.get("price_range")
                 }
     
+    # Поколения контроллеров зарядки из общей таблицы правил
+    knowledge["tristar_hydra"]["ic_by_generation"] = charging_ic_rules.generations_table()
+    
     save_json(knowledge, "repair_knowledge.json")
     print(f"  📊 Разделов: {len(knowledge.keys())}")
+    count(sections=len(knowledge), ic_models=len(knowledge["tristar_hydra"]["ic_by_model"]))
     return knowledge
 
-def main():
-    print("=" * 60)
-    print("🔄 ОБЪЕДИНЕНИЕ ВСЕХ СОБРАННЫХ ДАННЫХ")
-    print("=" * 60)
+def merge_official_prices():
+    """Создать файл официальных цен"""
+    print("\n💲 Создание файла официальных цен...")
     
-    # 1. Объединяем устройства
-    devices = merge_devices()
-    save_json(devices, "devices.json")
-    
-    # 2. Объединяем коды ошибок
-    merge_error_codes()
-    
-    # 3. Объединяем базу IC
-    merge_ic_database()
-    
-    # 4. Объединяем базу плат
-    merge_logic_boards()
-    
-    # 5. Создаём поисковый индекс артикулов
-    merge_article_search()
-    
-    # 6. Создаём базу знаний
-    merge_repair_knowledge()
-    
-    # 7. Создаём файл официальных цен
     parts = load_json("apple_parts_comprehensive.json")
+    
     if parts:
         prices = {
             "title": "Apple Official Service Prices",
@@ -645,7 +798,331 @@ def main():
                 }
         
         save_json(prices, "official_service_prices.json")
-        print(f"\n📊 Официальных цен: {len(prices['prices'])} моделей")
+        print(f"  📊 Официальных цен: {len(prices['prices'])} моделей")
+        count(models=len(prices["prices"]), prices=sum(len(p) for p in prices["prices"].values()))
+        return prices
+    
+    return None
+
+def merge_device_list():
+    """Объединить устройства и сохранить devices.json"""
+    devices = merge_devices()
+    save_json(devices, "devices.json")
+    return devices
+
+def export_devices_binary():
+    """Бинарная копия devices.json для клиентов (меньше и без разбора текста)"""
+    print("\n📦 Экспорт devices.bin...")
+    devices = load_json("devices.json")
+    if devices is None:
+        return None
+    save_binary(devices, "devices.bin")
+    count(devices=len(devices))
+    return devices
+
+def export_device_shards():
+    """Шарды devices.json по категориям и семействам + манифест с хешами"""
+    print("\n🧩 Шарды устройств...")
+    devices = load_json("devices.json")
+    if devices is None:
+        return None
+    manifest, written, unchanged = device_shards.write_shards(
+        devices, OUTPUT_DIR,
+        previous=device_shards.load_manifest(OUTPUT_DIR),
+        default=json_cache.json_default,
+        **WRITE_OPTIONS
+    )
+    if _stage_outputs is not None:
+        for shards in manifest["shards"].values():
+            for entry in shards.values():
+                _stage_outputs[entry["file"]] = entry["sha256"]
+    save_json(manifest, device_shards.MANIFEST_FILE)
+    print(f"  📊 Шардов: {len(written) + len(unchanged)} (записано {len(written)}, без изменений {len(unchanged)})")
+    count(shards=len(written) + len(unchanged), written=len(written), unchanged=len(unchanged))
+    return manifest
+
+def publish_delta_patches():
+    """Новая версия данных и патчи k→latest для последних версий"""
+    print("\n🔀 Версия и дельта-патчи...")
+    devices = load_json("devices.json")
+    prices = load_json("official_service_prices.json")
+    if devices is None:
+        return None
+    document, collisions = delta_patches.build_document(json_cache.thaw(devices), json_cache.thaw(prices))
+    for collision in collisions:
+        print(f"  ⚠️ Ключ {collision['key']}: {collision['dropped']} не попал в патчи (совпал с {collision['kept']})")
+    previous_version = delta_patches.load_versions(OUTPUT_DIR)["version"]
+    versions, written = delta_patches.publish(document, OUTPUT_DIR, **WRITE_OPTIONS)
+    if _stage_outputs is not None:
+        for filename in written:
+            _stage_outputs[filename] = file_hash(os.path.join(OUTPUT_DIR, filename))
+    save_json(versions, delta_patches.VERSION_FILE)
+    if versions["version"] == previous_version:
+        print(f"  📊 Содержимое не изменилось, версия {versions['version']}")
+        count(version=versions["version"], patches=len(versions["patches"]), collisions=len(collisions))
+        return versions
+    for release in versions["stats"][-1:]:
+        if "patch_bytes" in release:
+            print(f"  📊 Версия {release['version']}: патч {release['patch_bytes'] / 1024:.1f} КБ "
+                  f"({release['patch_ops']} операций, {release['ratio']:.1%} от полного)")
+    print(f"  📊 Патчей до версии {versions['version']}: {len(versions['patches'])}")
+    count(version=versions["version"], patches=len(versions["patches"]), collisions=len(collisions))
+    return versions
+
+def merge_exchange_prices():
+    """Прайс Apple Exchange UA (.xlsx) → цены в гривнах для service_parts"""
+    print("\n🇺🇦 Прайс Apple Exchange UA...")
+    
+    # Выбор прайса зависит от всех .xlsx каталога (берётся самый свежий)
+    track_listing(os.path.join(EXCHANGE_DIR, "*"))
+    price_list = exchange_prices.find_price_list(EXCHANGE_DIR)
+    devices = load_json("devices.json")
+    
+    if price_list and devices is not None:
+        table, read_stats = exchange_prices.read_price_list(track_input(price_list))
+        joined, join_stats = exchange_prices.join_service_parts(devices, table)
+        result = {
+            "source": os.path.basename(price_list),
+            "currency": "UAH",
+            "devices": joined,
+            "stats": {**read_stats, **join_stats}
+        }
+        save_json(result, "exchange_ua_service_parts.json")
+        print(f"  📊 Строк прайса: {read_stats['rows']}, артикулов: {read_stats['articles']}")
+        print(f"  📊 Запчастей с ценой UA: {join_stats['matched']}, без цены: {join_stats['missing']}")
+        count(rows=read_stats["rows"], articles=read_stats["articles"],
+              matched=join_stats["matched"], missing=join_stats["missing"])
+        return result
+    
+    if not price_list:
+        print(f"  ⚠️ Нет .xlsx в {os.path.normpath(EXCHANGE_DIR)}")
+    return None
+
+def merge_price_matrix():
+    """Матрица цен устройство × тип запчасти во всех валютах конфига"""
+    print("\n💱 Матрица цен по валютам...")
+    
+    if price_matrix.np is None:
+        print("  ⚠️ numpy не установлен — матрица цен не строится")
+        return None
+    
+    devices = load_json("devices.json")
+    official = load_json("official_service_prices.json")
+    exchange = load_json("exchange_ua_service_parts.json")
+    master_db, _ = json_cache.load(track_input(MASTER_DB))
+    track_listing(os.path.join(SHEETS_DIR, price_matrix.SHEETS_GLOB))
+    sheets, sheet_files = price_matrix.read_sheet_prices(SHEETS_DIR)
+    for filepath in sheet_files:
+        track_input(filepath)
+    
+    if devices is not None:
+        rates = price_matrix.exchange_rates(master_db)
+        matrix = price_matrix.build(devices, {
+            "sheet_ron": sheets,
+            "official_usd": price_matrix.official_layer(official),
+            "exchange_uah": price_matrix.exchange_layer(exchange)
+        }, rates)
+        save_json(matrix, "price_matrix.json")
+        stats = matrix["stats"]
+        print(f"  📊 {stats['devices']} устройств × {stats['part_types']} типов, "
+              f"заполнено {stats['filled']} из {stats['cells']}")
+        print(f"  📊 Источники: {stats['by_source']}, валюты: {', '.join(matrix['currencies'])}")
+        count(**stats, currencies=len(matrix["currencies"]))
+        return matrix
+    
+    return None
+
+# Граф сборки: этапы в порядке выполнения. Зависимости между этапами
+# определяются автоматически — по файлам, прочитанным через load_json.
+STAGES = [
+    ("devices", merge_device_list),
+    ("devices_binary", export_devices_binary),
+    ("device_shards", export_device_shards),
+    ("exchange_prices", merge_exchange_prices),
+    ("error_codes", merge_error_codes),
+    ("ic_database", merge_ic_database),
+    ("ic_cross_reference", merge_ic_cross_reference),
+    ("logic_boards", merge_logic_boards),
+    ("board_index", merge_board_index),
+    ("article_search", merge_article_search),
+    ("repair_knowledge", merge_repair_knowledge),
+    ("official_prices", merge_official_prices),
+    ("price_matrix", merge_price_matrix),
+    ("delta_patches", publish_delta_patches),
+]
+
+def code_hash():
+    """Хеш исходников и настроек записи — при их изменении пересобирается всё"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(WRITE_OPTIONS, sort_keys=True, default=list).encode("utf-8"))
+    for module in BUILD_MODULES:
+        digest.update(module.encode("utf-8"))
+        digest.update((file_hash(os.path.join(SCRIPT_DIR, module)) or "").encode("utf-8"))
+    return digest.hexdigest()
+
+def load_build_state():
+    """Загрузить состояние предыдущей сборки"""
+    filepath = os.path.join(OUTPUT_DIR, STATE_FILE)
+    if os.path.exists(filepath):
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {"stages": {}}
+
+def save_build_state(state):
+    """Сохранить состояние сборки"""
+    json_writer.write_json(state, os.path.join(OUTPUT_DIR, STATE_FILE), compact=False, compress=(), track=False)
+
+def is_stage_fresh(record, current_code_hash):
+    """Этап актуален, если не изменились код, входы и выходы"""
+    if not record or record.get("code") != current_code_hash:
+        return False
+    for filename, digest in record.get("inputs", {}).items():
+        if filename.startswith(LISTING_PREFIX):
+            if listing_hash(filename[len(LISTING_PREFIX):]) != digest:
+                return False
+        elif file_hash(os.path.join(OUTPUT_DIR, filename)) != digest:
+            return False
+    outputs = record.get("outputs", {})
+    if not outputs:
+        return False
+    for filename, digest in outputs.items():
+        if file_hash(os.path.join(OUTPUT_DIR, filename)) != digest:
+            return False
+    return True
+
+def run_stage(name, func):
+    """Выполнить этап, записав хеши прочитанных и сохранённых файлов и счётчики"""
+    global _stage_inputs, _stage_outputs, _stage_counts
+    _stage_inputs, _stage_outputs, _stage_counts = {}, {}, {}
+    started = time.perf_counter()
+    try:
+        result = func()
+        record = {
+            "inputs": _stage_inputs,
+            "outputs": _stage_outputs,
+            "counts": _stage_counts,
+            "seconds": round(time.perf_counter() - started, 6)
+        }
+    finally:
+        _stage_inputs, _stage_outputs, _stage_counts = None, None, None
+    return result, record
+
+def record_stage(name, record, status, error=None):
+    """Запись этапа в манифест прогона; у пропущенного — счётчики прошлой сборки"""
+    artifacts = [run_manifest.artifact(os.path.join(OUTPUT_DIR, filename), digest)
+                 for filename, digest in sorted(record.get("outputs", {}).items())]
+    extra = {"built_at": record.get("built_at")}
+    if error:
+        extra["error"] = error
+    run_manifest.record(f"merge.{name}", "merge_stage", record.get("counts", {}),
+                        record.get("seconds", 0) if status == "ok" else 0,
+                        OUTPUT_DIR, artifacts=artifacts, status=status, extra=extra)
+
+def run_pipeline(force=False):
+    """Выполнить граф сборки, пропуская этапы с неизменёнными входами"""
+    state = {} if force else load_build_state()
+    previous = state.get("stages", {})
+    current_code_hash = code_hash()
+    
+    results = {}
+    executed = []
+    skipped = []
+    new_state = {"code": current_code_hash, "stages": {}}
+    
+    for name, func in STAGES:
+        record = previous.get(name)
+        if not force and is_stage_fresh(record, current_code_hash):
+            print(f"\n⏭️  {name}: входы не изменились, пропуск")
+            new_state["stages"][name] = record
+            skipped.append(name)
+            record_stage(name, record, "skipped")
+            if PROFILER:
+                PROFILER.skipped(name)
+            continue
+        
+        try:
+            if PROFILER:
+                with PROFILER.stage(name):
+                    results[name], record = run_stage(name, func)
+            else:
+                results[name], record = run_stage(name, func)
+        except schema_validator.SchemaError as e:
+            # Состояние не сохраняется: этап пересоберётся при следующем запуске
+            record_stage(name, {}, "failed", str(e))
+            e.stage = name
+            raise
+        record["code"] = current_code_hash
+        record["built_at"] = datetime.now().isoformat()
+        new_state["stages"][name] = record
+        executed.append(name)
+        record_stage(name, record, "ok")
+    
+    save_build_state(new_state)
+    return results, executed, skipped
+
+def main(argv=None):
+    global OUTPUT_DIR, PROFILER, VALIDATOR
+    parser = argparse.ArgumentParser(description="Объединение собранных данных")
+    parser.add_argument("--force", action="store_true",
+                        help="пересобрать все этапы, игнорируя сохранённые хеши")
+    parser.add_argument("--compact", action="store_true", default=json_writer.DEFAULT_COMPACT,
+                        help="писать JSON без отступов (production)")
+    parser.add_argument("--compress", default=",".join(json_writer.DEFAULT_COMPRESS),
+                        help="сжатые копии рядом с артефактами: gz, br или gz,br")
+    parser.add_argument("--gzip-level", type=int, default=json_writer.DEFAULT_GZIP_LEVEL)
+    parser.add_argument("--brotli-level", type=int, default=json_writer.DEFAULT_BROTLI_LEVEL)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                        help="каталог с входами сборщиков и артефактами (например, синтетические данные)")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="не проверять devices.json, ic_compatibility.json и error_codes.json по схемам")
+    parser.add_argument("--profile", action="store_true",
+                        help="замерять время, память и ввод-вывод каждого этапа, отчёт в JSON")
+    parser.add_argument("--profile-report",
+                        help=f"путь к отчёту профилирования (по умолчанию {stage_profiler.DEFAULT_REPORT} в каталоге данных)")
+    parser.add_argument("--cprofile-dir",
+                        help="каталог для дампов cProfile по этапам (<этап>.prof); включает --profile")
+    args = parser.parse_args(argv)
+    OUTPUT_DIR = args.output_dir
+    if not args.no_validate:
+        VALIDATOR = schema_validator.BackgroundValidator()
+    if args.profile or args.cprofile_dir:
+        try:
+            PROFILER = stage_profiler.RunProfiler(cprofile_dir=args.cprofile_dir)
+        except OSError as e:
+            parser.error(f"--cprofile-dir: {e}")
+    
+    compress = tuple(f for f in args.compress.split(",") if f)
+    unknown = set(compress) - set(json_writer.SUPPORTED_FORMATS)
+    if unknown:
+        parser.error(f"неизвестный формат сжатия: {', '.join(sorted(unknown))}")
+    if "br" in compress and json_writer.brotli is None:
+        print("⚠️ Модуль brotli не установлен — .br копии не создаются")
+    WRITE_OPTIONS.update(
+        compact=args.compact,
+        compress=compress,
+        gzip_level=args.gzip_level,
+        brotli_level=args.brotli_level
+    )
+    
+    print("=" * 60)
+    print("🔄 ОБЪЕДИНЕНИЕ ВСЕХ СОБРАННЫХ ДАННЫХ")
+    print("=" * 60)
+    
+    started = time.perf_counter()
+    try:
+        results, executed, skipped = run_pipeline(force=args.force)
+    except schema_validator.SchemaError as e:
+        print(f"\n❌ Этап {e.stage}: артефакт не соответствует схеме ({len(e.errors)} ошибок)")
+        for error in e.errors:
+            print(f"  • {error}")
+        run_manifest.assemble(OUTPUT_DIR)
+        sys.exit(1)
+    finally:
+        if VALIDATOR:
+            VALIDATOR.close()
     
     print("\n" + "=" * 60)
     print("✅ ОБЪЕДИНЕНИЕ ЗАВЕРШЕНО!")
@@ -653,8 +1130,38 @@ def main():
     
     # Итоговая статистика
     print("\n📊 ИТОГОВАЯ СТАТИСТИКА:")
-    print(f"  • Устройств: {len(devices)}")
-    print(f"  • Категории: iPhone, iPad, Mac")
+    devices = results.get("devices")
+    if devices is not None:
+        print(f"  • Устройств: {len(devices)}")
+        print(f"  • Категории: iPhone, iPad, Mac")
+    print(f"  • Выполнено этапов: {len(executed)}" + (f" ({', '.join(executed)})" if executed else ""))
+    print(f"  • Пропущено этапов: {len(skipped)}" + (f" ({', '.join(skipped)})" if skipped else ""))
+    
+    json_writer.print_report()
+    
+    cache = json_cache.stats()
+    print(f"  • Кэш JSON: {cache['hits']} попаданий, {cache['misses']} промахов, "
+          f"сэкономлено {cache['saved_seconds'] * 1000:.1f} мс разбора")
+    
+    if VALIDATOR:
+        print(f"  • Проверено по схемам: {VALIDATOR.checked} документов")
+    
+    run_manifest.record("merge_all_data", "merge", {
+        "executed": len(executed),
+        "validated": VALIDATOR.checked if VALIDATOR else 0,
+        "skipped": len(skipped),
+        "json_cache_hits": cache["hits"],
+        "json_cache_misses": cache["misses"]
+    }, time.perf_counter() - started, OUTPUT_DIR)
+    manifest = run_manifest.assemble(OUTPUT_DIR)
+    print(f"  📝 Манифест прогона: {len(manifest['components'])} компонентов → "
+          f"{os.path.join(OUTPUT_DIR, run_manifest.MANIFEST_FILE)}")
+    
+    if PROFILER:
+        report_path = args.profile_report or os.path.join(OUTPUT_DIR, stage_profiler.DEFAULT_REPORT)
+        report = PROFILER.save(report_path, argv, extra={"output_dir": OUTPUT_DIR, "json_cache": cache})
+        stage_profiler.print_summary(report)
+        print(f"  📝 Отчёт профилирования: {report_path}")
 
 if __name__ == "__main__":
     main()
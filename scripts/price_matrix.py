@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Матрица цен устройство × тип запчасти во всех валютах (price_matrix.json).
+
+Источники — слои одной формы (устройства × типы запчастей), цены в
+долларах, пропуски — NaN:
+  sheet_ron    — цены мастерской в леях (data/sheets-export/*_price.csv)
+  official_usd — официальные цены Apple (official_service_prices.json)
+  exchange_uah — цены Apple Exchange UA (exchange_ua_service_parts.json)
+
+Для каждой ячейки берётся первый слой, где цена есть (порядок как в
+калькуляторе: леи таблицы, затем официальная цена USD), и результат
+умножается на все курсы config.exchange_rates одной операцией над
+массивом. Калькулятор читает готовую цену, а не пересчитывает её.
+
+numpy необязателен: без него этап пропускается.
+"""
+import csv
+import glob
+import os
+
+try:
+    import numpy as np
+except ImportError:  # numpy необязателен: без него матрица не строится
+    np = None
+
+import device_keys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MASTER_DB = os.path.join(SCRIPT_DIR, "..", "public", "data", "master-db.json")
+SHEETS_DIR = os.path.join(SCRIPT_DIR, "..", "data", "sheets-export")
+SHEETS_GLOB = "*_price.csv"
+
+# Курсы к доллару по умолчанию (как в src/utils.ts); config.exchange_rates
+# из master-db.json их переопределяет. UAH в конфиге нет — без курса по
+# умолчанию слой exchange_uah нельзя было бы привести к доллару.
+DEFAULT_RATES = {
+    "USD": 1.0,
+    "EUR": 0.92,
+    "RON": 4.65,
+    "UAH": 41.5,
+}
+
+# Слои в порядке приоритета: (имя, валюта)
+SOURCES = [
+    ("sheet_ron", "RON"),
+    ("official_usd", "USD"),
+    ("exchange_uah", "UAH"),
+]
+
+# Заголовок CSV (RO/EN) → тип запчасти, как в import-sheets-prices-lei.cjs
+COLUMN_TO_KEY = {
+    "battery": ["battery", "baterie", "baterii"],
+    "display": ["display", "ecran", "screen", "ecrane", "дисплей"],
+    "charging_port": ["charging_port", "charging", "incarcare", "port", "încărcare", "port încărcare"],
+    "rear_camera": ["rear_camera", "camera", "cameră", "camera spate", "rear camera"],
+    "front_camera": ["front_camera", "front camera", "camera fata", "față"],
+    "speaker": ["speaker", "difuzor", "speaker/mic"],
+    "taptic_engine": ["taptic_engine", "taptic", "motor vibrații"],
+    "logic_board": ["logic_board", "motherboard", "placă", "placa", "logic board", "placa de baza"],
+    "keyboard": ["keyboard", "tastatura", "tastatură"],
+}
+MODEL_KEYS = ["model", "modelul", "модель"]
+
+def _normalize(text):
+    return " ".join(str(text or "").lower().split())
+
+def map_header(column):
+    """Тип запчасти по заголовку колонки CSV или None"""
+    name = _normalize(column)
+    if not name:
+        return None
+    if name in COLUMN_TO_KEY:
+        return name
+    for key, aliases in COLUMN_TO_KEY.items():
+        if any(name in alias or alias in name for alias in aliases):
+            return key
+    return None
+
+def _price(value):
+    """Число из ячейки или None (пусто/0/мусор)"""
+    try:
+        price = float(str(value).replace(" ", "").replace(",", "."))
+    except ValueError:
+        return None
+    return price if price > 0 else None
+
+def read_sheet_prices(directory=SHEETS_DIR):
+    """Цены в леях из *_price.csv: ({модель: {тип: цена}}, [файлы])"""
+    prices = {}
+    files = sorted(glob.glob(os.path.join(directory, SHEETS_GLOB)))
+    for filepath in files:
+        with open(filepath, "r", encoding="utf-8-sig", newline="") as f:
+            sample = f.readline()
+            f.seek(0)
+            delimiter = ";" if ";" in sample and '","' not in sample else ","
+            rows = csv.reader(f, delimiter=delimiter)
+            headers = next(rows, [])
+            model_col = next((i for i, h in enumerate(headers) if _normalize(h) in MODEL_KEYS), 0)
+            columns = [(i, map_header(h)) for i, h in enumerate(headers) if i != model_col]
+            for row in rows:
+                if len(row) <= model_col or not row[model_col].strip():
+                    continue
+                parts = prices.setdefault(row[model_col].strip(), {})
+                for i, key in columns:
+                    price = _price(row[i]) if key and i < len(row) else None
+                    if price is not None:
+                        parts[key] = price
+    return prices, files
+
+def exchange_rates(master_db):
+    """Курсы к доллару: умолчания, переопределённые config.exchange_rates"""
+    rates = dict(DEFAULT_RATES)
+    configured = ((master_db or {}).get("config") or {}).get("exchange_rates") or {}
+    for currency, rate in configured.items():
+        if isinstance(rate, (int, float)) and rate > 0:
+            rates[currency] = float(rate)
+    return rates
+
+def official_layer(official):
+    """{модель: {тип: цена USD}} из official_service_prices.json"""
+    return {
+        model: {t: p.get("price_usd") for t, p in parts.items() if p.get("price_usd")}
+        for model, parts in ((official or {}).get("prices") or {}).items()
+    }
+
+def exchange_layer(exchange):
+    """{модель: {тип: цена обмена UAH}} из exchange_ua_service_parts.json"""
+    return {
+        model: {t: p.get("price_exchange_uah") for t, p in parts.items() if p.get("price_exchange_uah")}
+        for model, parts in ((exchange or {}).get("devices") or {}).items()
+    }
+
+def build(devices, layers, rates):
+    """Матрица цен.
+
+    devices — список устройств (строки матрицы, сопоставление по
+    canonical_key), layers — {источник: {модель: {тип: цена}}} в валютах
+    SOURCES, rates — курсы к доллару.
+    """
+    if np is None:
+        raise RuntimeError("numpy не установлен")
+
+    keys = []
+    names = []
+    row_of = {}
+    row_of_name = {}
+    for device in devices:
+        name = device.get("name", "")
+        key = device_keys.canonical_key(name)
+        if key and key not in row_of:
+            row_of[key] = len(keys)
+            keys.append(key)
+            names.append(name)
+        if key:
+            row_of_name.setdefault(name, row_of[key])
+    part_types = sorted({t for layer in layers.values() for parts in layer.values() for t in parts})
+    col_of = {t: i for i, t in enumerate(part_types)}
+
+    # Слои источников: источник × устройство × тип, в долларах, NaN — нет цены
+    values = np.full((len(SOURCES), len(keys), len(part_types)), np.nan)
+    unmatched = {}
+    for s, (source, currency) in enumerate(SOURCES):
+        for model, parts in layers.get(source, {}).items():
+            # Точное имя из devices.json, иначе — по каноническому ключу
+            row = row_of_name.get(model)
+            if row is None:
+                row = row_of.get(device_keys.canonical_key(model))
+            if row is None:
+                unmatched.setdefault(source, []).append(model)
+                continue
+            for part_type, price in parts.items():
+                values[s, row, col_of[part_type]] = price
+        values[s] /= rates[currency]
+
+    # Первый слой с ценой для каждой ячейки
+    present = ~np.isnan(values)
+    has_price = present.any(axis=0)
+    source_index = present.argmax(axis=0)
+    usd = np.take_along_axis(values, source_index[None], axis=0)[0]
+
+    # Все валюты сразу: валюта × устройство × тип
+    currencies = sorted(rates, key=lambda c: (c != "USD", c))
+    factors = np.array([rates[c] for c in currencies])
+    converted = np.round(usd[None] * factors[:, None, None], 2)
+
+    def cells(matrix):
+        return np.where(has_price, matrix, None).tolist()
+
+    return {
+        "base": "USD",
+        "currencies": currencies,
+        "rates": {c: rates[c] for c in currencies},
+        "sources": [source for source, _ in SOURCES],
+        "devices": names,
+        "keys": keys,
+        "part_types": part_types,
+        "prices": {c: cells(converted[i]) for i, c in enumerate(currencies)},
+        "source": cells(source_index),
+        "unmatched": unmatched,
+        "stats": {
+            "devices": len(keys),
+            "part_types": len(part_types),
+            "cells": int(has_price.size),
+            "filled": int(has_price.sum()),
+            "by_source": {source: int((has_price & (source_index == s)).sum())
+                          for s, (source, _) in enumerate(SOURCES)}
+        }
+    }
+
+class MatrixIndex:
+    """Позиции строк и колонок price_matrix.json: цена — два обращения к словарю"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.rows = {key: i for i, key in enumerate(matrix["keys"])}
+        self.columns = {part_type: i for i, part_type in enumerate(matrix["part_types"])}
+
+    def lookup(self, device_name, part_type, currency="USD"):
+        """Готовая цена из матрицы или None"""
+        row = self.rows.get(device_keys.canonical_key(device_name))
+        column = self.columns.get(part_type)
+        if row is None or column is None:
+            return None
+        return self.matrix["prices"][currency][row][column]
+
+def build_index(matrix):
+    """Построить индекс матрицы (один раз на загруженную матрицу)"""
+    return MatrixIndex(matrix)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Записи объединения: устройство, запчасть, контроллер зарядки, плата.
+
+Классы со __slots__ вместо словарей: у словаря на ~17 ключей своя
+хеш-таблица (~650 байт), у записи — только массив ссылок. На 100k
+устройств это основная часть памяти merge_devices. Кроме того:
+  - official_service_prices не хранится, а выводится из service_parts
+    (цены в них одни и те же);
+  - ChargingIC неизменяем и один на правило таблицы charging_ic_rules,
+    устройства ссылаются на общий экземпляр.
+
+В словари записи превращаются только на границе — при сериализации
+(json_cache.json_default вызывает to_json) и проверке схемы. Порядок
+ключей в JSON тот же, что был у словарей, — артефакты не меняются.
+"""
+import abc
+
+class Record(abc.ABC):
+    """Общая база записей: to_json() → dict для JSON.
+
+    Подкласс без to_json не создаётся (TypeError при создании экземпляра),
+    а не падает посреди сериализации.
+    """
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def to_json(self):
+        """Запись в виде dict для JSON"""
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_json()!r})"
+
+class ServicePart(Record):
+    """Запчасть Apple Self Service Repair: артикул, описание, цена"""
+    __slots__ = ("article", "description", "price_usd")
+
+    def __init__(self, article="", description="", price_usd=0):
+        self.article = article
+        self.description = description
+        self.price_usd = price_usd
+
+    def to_json(self):
+        return {"article": self.article, "description": self.description, "price_usd": self.price_usd}
+
+class ChargingIC(Record):
+    """Контроллер зарядки; неизменяем, экземпляры общие (intern)"""
+    __slots__ = ("main", "designation")
+
+    _interned = {}
+
+    def __init__(self, main, designation):
+        object.__setattr__(self, "main", main)
+        object.__setattr__(self, "designation", designation)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ChargingIC неизменяем")
+
+    @classmethod
+    def intern(cls, value):
+        """Общий экземпляр для {"main", "designation"} (None — контроллер не определён)"""
+        if not value:
+            return None
+        key = (value["main"], value["designation"])
+        ic = cls._interned.get(key)
+        if ic is None:
+            ic = cls._interned[key] = cls(*key)
+        return ic
+
+    def to_json(self):
+        return {"main": self.main, "designation": self.designation}
+
+class BoardEntry(Record):
+    """Устройство в записи обратного индекса плат (board_index.json)"""
+    __slots__ = ("name", "key", "category", "model", "emc", "year")
+
+    def __init__(self, name, key, category, model="", emc="", year=0):
+        self.name = name
+        self.key = key
+        self.category = category
+        self.model = model
+        self.emc = emc
+        self.year = year
+
+    def to_json(self):
+        return {
+            "name": self.name,
+            "key": self.key,
+            "category": self.category,
+            "model": self.model,
+            "emc": self.emc,
+            "year": self.year
+        }
+
+# Поля устройства в JSON по категориям — в том порядке, в каком их
+# раньше заполнял merge_devices (iFixit-поля есть только у iPhone, emc — у Mac)
+DEVICE_FIELDS = {
+    "iPhone": ("name", "category", "model", "year", "ifixit_url", "ifixit_image",
+               "repairability", "guides_count", "available_repairs", "board_numbers",
+               "processor", "charging_ic", "official_service_prices", "service_parts",
+               "common_issues", "repair_difficulty", "repair_time", "connector_type"),
+    "iPad": ("name", "category", "model", "year", "board_numbers", "processor",
+             "charging_ic", "official_service_prices", "service_parts", "common_issues",
+             "repair_difficulty", "repair_time", "connector_type"),
+    "Mac": ("name", "category", "model", "emc", "year", "board_numbers", "processor",
+            "charging_ic", "connector_type", "official_service_prices", "service_parts",
+            "common_issues", "repair_difficulty", "repair_time"),
+}
+
+class Device(Record):
+    """Устройство devices.json"""
+    __slots__ = ("name", "category", "model", "emc", "year", "ifixit_url", "ifixit_image",
+                 "repairability", "guides_count", "available_repairs", "board_numbers",
+                 "processor", "charging_ic", "connector_type", "service_parts",
+                 "common_issues", "repair_difficulty", "repair_time")
+
+    def __init__(self, name, category, model="", year=0, board_numbers=None, processor="",
+                 repair_difficulty="", repair_time="", emc="", common_issues=None):
+        self.name = name
+        self.category = category
+        self.model = model
+        self.emc = emc
+        self.year = year
+        self.ifixit_url = ""
+        self.ifixit_image = ""
+        self.repairability = None
+        self.guides_count = 0
+        self.available_repairs = []
+        self.board_numbers = board_numbers if board_numbers is not None else []
+        self.processor = processor
+        self.charging_ic = None
+        self.connector_type = ""
+        self.service_parts = {}
+        self.common_issues = common_issues if common_issues is not None else []
+        self.repair_difficulty = repair_difficulty
+        self.repair_time = repair_time
+
+    @property
+    def official_service_prices(self):
+        """Цены USD по типам запчастей — из service_parts"""
+        return {part_type: part.price_usd for part_type, part in self.service_parts.items()}
+
+    def to_json(self):
+        result = {}
+        for field in DEVICE_FIELDS[self.category]:
+            value = getattr(self, field)
+            if field == "charging_ic":
+                value = value.to_json() if value else {}
+            elif field == "service_parts":
+                value = {part_type: part.to_json() for part_type, part in value.items()}
+            result[field] = value
+        return result
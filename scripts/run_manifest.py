@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Манифест прогона: структурированные итоги сборщиков и этапов объединения.
+
+Каждый сборщик и каждый этап merge_all_data.py пишет свою запись —
+счётчики записей, время, HTTP запросы и попадания в кэш, размеры и
+SHA-256 артефактов — в <каталог данных>/.manifest/<компонент>.json.
+Отдельные файлы, а не общий: сборщики работают в разных процессах
+(run_pipeline.py). merge_all_data.py в конце собирает все записи в
+.run_manifest.json.
+
+Два манифеста сравниваются командой diff: обвал счётчика (iFixit вернул
+0 гайдов), пропавший компонент или артефакт, замедление этапа — это
+тревоги, код выхода 1 (для cron/CI).
+
+Запуск: python run_manifest.py assemble
+        python run_manifest.py diff old.json new.json --collapse 0.5 --slowdown 1.5
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import json_writer
+
+OUTPUT_DIR = "/home/user/webapp/public/data"
+
+RECORD_DIR = ".manifest"
+MANIFEST_FILE = ".run_manifest.json"
+
+# Пороги сравнения: счётчик упал больше чем на долю COLLAPSE,
+# время выросло больше чем в SLOWDOWN раз и хотя бы на MIN_SLOWDOWN_SECONDS
+DEFAULT_COLLAPSE = 0.5
+DEFAULT_SLOWDOWN = 1.5
+MIN_SLOWDOWN_SECONDS = 1.0
+
+def artifact(filepath, digest=None):
+    """Размер и SHA-256 файла (или None, если файла нет)"""
+    if not os.path.exists(filepath):
+        return None
+    if digest is None:
+        with open(filepath, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+    return {"file": os.path.basename(filepath), "bytes": os.path.getsize(filepath), "sha256": digest}
+
+def _write(data, filepath):
+    # Служебный файл: без сжатых копий и без строки в таблице артефактов
+    json_writer.write_json(data, filepath, compact=False, compress=(), track=False)
+
+def record(component, kind, counts, seconds, output_dir=OUTPUT_DIR, http=None, artifacts=(), status="ok", extra=None):
+    """Записать итог компонента (сборщика или этапа) в .manifest/"""
+    entry = {
+        "component": component,
+        "kind": kind,
+        "status": status,
+        "recorded_at": datetime.now().isoformat(),
+        "seconds": round(seconds, 6),
+        "counts": counts,
+        "artifacts": [a for a in (artifact(p) if isinstance(p, str) else p for p in artifacts) if a]
+    }
+    if http is not None:
+        entry["http"] = http
+    if extra:
+        entry.update(extra)
+    _write(entry, os.path.join(output_dir, RECORD_DIR, f"{component}.json"))
+    return entry
+
+def assemble(output_dir=OUTPUT_DIR):
+    """Собрать записи компонентов в .run_manifest.json"""
+    components = {}
+    for filepath in sorted(glob.glob(os.path.join(output_dir, RECORD_DIR, "*.json"))):
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        components[entry.get("component") or os.path.basename(filepath)[:-5]] = entry
+    manifest = {
+        "generated_at": datetime.now().isoformat(),
+        "output_dir": output_dir,
+        "components": components
+    }
+    _write(manifest, os.path.join(output_dir, MANIFEST_FILE))
+    return manifest
+
+def flatten(counts, prefix=""):
+    """Вложенные счётчики в плоский вид: {"by_source": {"a": 1}} → {"by_source.a": 1}"""
+    flat = {}
+    for key, value in (counts or {}).items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def diff(old, new, collapse=DEFAULT_COLLAPSE, slowdown=DEFAULT_SLOWDOWN, min_seconds=MIN_SLOWDOWN_SECONDS):
+    """Отличия двух манифестов: [{"level": "alert"|"info", "component", "check", "message"}]"""
+    findings = []
+
+    def add(level, component, check, message):
+        findings.append({"level": level, "component": component, "check": check, "message": message})
+
+    old_components = old.get("components", {})
+    new_components = new.get("components", {})
+    for name in sorted(set(old_components) | set(new_components)):
+        before, after = old_components.get(name), new_components.get(name)
+        if after is None:
+            add("alert", name, "missing", "компонент пропал из манифеста")
+            continue
+        if before is None:
+            add("info", name, "new", "новый компонент")
+            continue
+        if after.get("status") == "failed" and before.get("status") != "failed":
+            add("alert", name, "failed", after.get("error", "компонент завершился с ошибкой"))
+
+        old_counts, new_counts = flatten(before.get("counts")), flatten(after.get("counts"))
+        for key in sorted(old_counts):
+            was, now = old_counts[key], new_counts.get(key)
+            if now is None:
+                add("alert", name, "collapse", f"{key}: счётчик пропал (было {was})")
+            elif was > 0 and now < was * (1 - collapse):
+                add("alert", name, "collapse", f"{key}: {was} → {now}")
+            elif now != was:
+                add("info", name, "count", f"{key}: {was} → {now}")
+
+        # Время сравнивается только у реально выполненных компонентов
+        if before.get("status") == "ok" and after.get("status") == "ok":
+            was, now = before.get("seconds", 0), after.get("seconds", 0)
+            if now > was * slowdown and now - was >= min_seconds:
+                add("alert", name, "slowdown", f"{was:.2f} с → {now:.2f} с (×{now / was if was else float('inf'):.1f})")
+
+        old_artifacts = {a["file"]: a for a in before.get("artifacts", [])}
+        new_artifacts = {a["file"]: a for a in after.get("artifacts", [])}
+        for filename in sorted(set(old_artifacts) | set(new_artifacts)):
+            was, now = old_artifacts.get(filename), new_artifacts.get(filename)
+            if now is None:
+                add("alert", name, "artifact", f"{filename}: артефакт пропал")
+            elif was is None:
+                add("info", name, "artifact", f"{filename}: новый артефакт")
+            elif was["bytes"] > 0 and now["bytes"] < was["bytes"] * (1 - collapse):
+                add("alert", name, "artifact", f"{filename}: {was['bytes']} → {now['bytes']} байт")
+            elif was["sha256"] != now["sha256"]:
+                add("info", name, "artifact", f"{filename}: содержимое изменилось ({was['bytes']} → {now['bytes']} байт)")
+
+    return findings
+
+def _load(filepath):
+    with open(filepath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Манифест прогона сборщиков и объединения")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    assemble_parser = commands.add_parser("assemble", help="собрать записи компонентов в манифест")
+    assemble_parser.add_argument("--output-dir", default=OUTPUT_DIR)
+
+    diff_parser = commands.add_parser("diff", help="сравнить два манифеста")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    diff_parser.add_argument("--collapse", type=float, default=DEFAULT_COLLAPSE,
+                             help="тревога, если счётчик упал больше чем на эту долю")
+    diff_parser.add_argument("--slowdown", type=float, default=DEFAULT_SLOWDOWN,
+                             help="тревога, если время выросло больше чем во столько раз")
+    diff_parser.add_argument("--min-seconds", type=float, default=MIN_SLOWDOWN_SECONDS,
+                             help="замедления меньше этого числа секунд не считаются")
+    diff_parser.add_argument("--json", action="store_true", help="вывести отличия в JSON")
+    diff_parser.add_argument("--all", action="store_true", help="показать и информационные отличия")
+    args = parser.parse_args(argv)
+
+    if args.command == "assemble":
+        manifest = assemble(args.output_dir)
+        print(f"✅ Манифест: {len(manifest['components'])} компонентов → "
+              f"{os.path.join(args.output_dir, MANIFEST_FILE)}")
+        return 0
+
+    findings = diff(_load(args.old), _load(args.new), args.collapse, args.slowdown, args.min_seconds)
+    alerts = [f for f in findings if f["level"] == "alert"]
+    if args.json:
+        print(json.dumps(findings, ensure_ascii=False, indent=2))
+    else:
+        for f in findings:
+            if f["level"] == "alert" or args.all:
+                icon = "🚨" if f["level"] == "alert" else "  "
+                print(f"{icon} {f['component']:<28} {f['check']:<10} {f['message']}")
+        print(f"\n{'🚨' if alerts else '✅'} Тревог: {len(alerts)}, всего отличий: {len(findings)}")
+    return 1 if alerts else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
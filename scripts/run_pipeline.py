@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Полный конвейер данных: все сборщики + объединение
+
+Статические сборщики (данные в коде) выполняются в пуле процессов,
+сетевые — одновременно как подпроцессы под asyncio. Объединение
+(merge_all_data) стартует, когда готовы все его входы. Время конвейера
+стремится ко времени самого медленного сетевого сборщика, а не к сумме.
+
+Запуск: python run_pipeline.py --jobs 4
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import merge_all_data
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Сборщики без сети — CPU/диск, идут в пул процессов
+STATIC_COLLECTORS = ["collect_ic_data", "collect_error_codes", "collect_apple_parts", "collect_repair_wiki"]
+
+# Сетевые сборщики — ждут ответов, идут одновременно под asyncio
+NETWORK_COLLECTORS = ["collect_ifixit", "collect_github_devices"]
+
+def run_static_collector(name):
+    """Выполнить статический сборщик в рабочем процессе"""
+    started = time.perf_counter()
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            importlib.import_module(name).main()
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "stage": name,
+        "kind": "static",
+        "seconds": time.perf_counter() - started,
+        "ok": error is None,
+        "error": error,
+        "output": output.getvalue()
+    }
+
+async def run_network_collector(name, extra_args):
+    """Выполнить сетевой сборщик как подпроцесс"""
+    started = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(SCRIPT_DIR, f"{name}.py"), *extra_args,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, cwd=SCRIPT_DIR
+    )
+    stdout, _ = await proc.communicate()
+    return {
+        "stage": name,
+        "kind": "network",
+        "seconds": time.perf_counter() - started,
+        "ok": proc.returncode == 0,
+        "error": None if proc.returncode == 0 else f"exit code {proc.returncode}",
+        "output": stdout.decode("utf-8", errors="replace")
+    }
+
+async def run_collectors(jobs, network_args, skip_network=False):
+    """Все сборщики: статические в пуле процессов, сетевые под asyncio"""
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        tasks = [loop.run_in_executor(pool, run_static_collector, name) for name in STATIC_COLLECTORS]
+        if not skip_network:
+            tasks += [run_network_collector(name, network_args) for name in NETWORK_COLLECTORS]
+        return await asyncio.gather(*tasks)
+
+def print_summary(stages, wall_seconds):
+    """Сводка по времени этапов"""
+    print("\n" + "=" * 60)
+    print("⏱️  ВРЕМЯ ЭТАПОВ")
+    print("=" * 60)
+    for stage in stages:
+        status = "✅" if stage["ok"] else "❌"
+        line = f"  {status} {stage['stage']:<24} {stage['kind']:<8} {stage['seconds']:8.2f} с"
+        if stage["error"]:
+            line += f"  ({stage['error']})"
+        print(line)
+    total = sum(s["seconds"] for s in stages)
+    print(f"\n  Сумма этапов: {total:.2f} с")
+    print(f"  Время конвейера: {wall_seconds:.2f} с")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сбор и объединение всех данных")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="процессов для статических сборщиков")
+    parser.add_argument("--offline", action="store_true",
+                        help="сетевые сборщики отвечают только из HTTP кэша")
+    parser.add_argument("--skip-network", action="store_true",
+                        help="не запускать сетевые сборщики (использовать прошлые данные)")
+    parser.add_argument("--force", action="store_true",
+                        help="пересобрать все этапы объединения")
+    parser.add_argument("--verbose", action="store_true",
+                        help="показать вывод сборщиков")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print(f"🚀 КОНВЕЙЕР ДАННЫХ (процессов: {args.jobs})")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    network_args = ["--offline"] if args.offline else []
+    stages = asyncio.run(run_collectors(args.jobs, network_args, args.skip_network))
+
+    for stage in stages:
+        if args.verbose or not stage["ok"]:
+            print(f"\n--- {stage['stage']} ---")
+            print(stage["output"].rstrip())
+        else:
+            print(f"✅ {stage['stage']}: {stage['seconds']:.2f} с")
+
+    failed = [s["stage"] for s in stages if not s["ok"]]
+    if failed:
+        print(f"\n⚠️ Не выполнены: {', '.join(failed)} — объединение возьмёт их прошлые данные")
+
+    # Объединение — после готовности всех входов
+    merge_started = time.perf_counter()
+    merge_all_data.main(["--force"] if args.force else [])
+    stages.append({
+        "stage": "merge_all_data",
+        "kind": "merge",
+        "seconds": time.perf_counter() - merge_started,
+        "ok": True,
+        "error": None,
+        "output": ""
+    })
+
+    print_summary(stages, time.perf_counter() - started)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Проверка структуры артефактов merge_all_data.py до публикации.
+
+Схемы устройств, микросхем и кодов ошибок описаны подмножеством JSON
+Schema (type, required, properties, additionalProperties, items, enum,
+minimum, maximum, minLength, pattern) и один раз, при импорте,
+компилируются в цепочки замыканий: при проверке нет разбора схемы,
+только вызовы готовых функций.
+
+BackgroundValidator проверяет документ в отдельном потоке, пока
+основной поток сериализует его во временный файл (json_writer пишет и
+делает fsync — на этом время GIL отпускается). Результат ждут до
+переименования временного файла: документ с ошибками не попадает на
+место прежнего артефакта. Ошибки — с точным путём до поля:
+devices.json[12].service_parts.battery.price_usd.
+
+validate-database.cjs остаётся проверкой master-db.json целиком; здесь
+ловится то, что сломал сам merge, до того как из devices.json
+пересоберут master-db.json.
+"""
+import re
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import records
+
+# Сколько ошибок собирать на документ: дальше они обычно повторяются
+MAX_ERRORS = 50
+
+STRING = {"type": "string"}
+NAME = {"type": "string", "minLength": 1}
+STRINGS = {"type": "array", "items": STRING}
+PRICE = {"type": "number", "minimum": 0}
+SEVERITY = {"type": "string", "enum": ["none", "low", "medium", "high", "critical"]}
+
+SERVICE_PART_SCHEMA = {
+    "type": "object",
+    "required": ["article", "price_usd"],
+    "properties": {
+        "article": {"type": "string", "pattern": r"^\d{3}-\d{5}$"},
+        "description": STRING,
+        "price_usd": PRICE
+    }
+}
+
+DEVICE_SCHEMA = {
+    "type": "object",
+    "required": ["name", "category", "model", "year", "board_numbers", "charging_ic",
+                 "official_service_prices", "service_parts", "common_issues",
+                 "repair_difficulty", "repair_time"],
+    "properties": {
+        "name": NAME,
+        "category": {"type": "string", "enum": ["iPhone", "iPad", "Mac"]},
+        "model": STRING,
+        "emc": STRING,
+        # 0 — год неизвестен (нет платы в board_numbers.json)
+        "year": {"type": "integer", "minimum": 0, "maximum": 2100},
+        "ifixit_url": STRING,
+        "ifixit_image": STRING,
+        "repairability": {"type": ["integer", "null"], "minimum": 0, "maximum": 10},
+        "guides_count": {"type": "integer", "minimum": 0},
+        "available_repairs": STRINGS,
+        "board_numbers": {"type": "array", "items": {"type": "string", "pattern": r"^820-\d{4,5}$"}},
+        "processor": STRING,
+        "charging_ic": {
+            "type": "object",
+            "properties": {"main": NAME, "designation": STRING}
+        },
+        "connector_type": STRING,
+        "official_service_prices": {"type": "object", "additionalProperties": PRICE},
+        "service_parts": {"type": "object", "additionalProperties": SERVICE_PART_SCHEMA},
+        "common_issues": STRINGS,
+        "repair_difficulty": NAME,
+        "repair_time": NAME
+    }
+}
+
+IC_SCHEMA = {
+    "type": "object",
+    "required": ["name", "designation", "compatible_devices"],
+    "properties": {
+        "name": NAME,
+        "designation": NAME,
+        "package": STRING,
+        "compatible_devices": {"type": "array", "items": NAME},
+        "functions": STRINGS,
+        "symptoms_when_faulty": STRINGS,
+        "diagnostics": {"type": "object"},
+        "price_range": STRING,
+        "difficulty": STRING,
+        "notes": STRING
+    }
+}
+
+ITUNES_ERROR_SCHEMA = {
+    "type": "object",
+    "required": ["code", "description", "severity"],
+    "properties": {
+        "code": {"type": "integer"},
+        "description": NAME,
+        "cause": STRING,
+        "solution": STRING,
+        "hardware": {"type": "boolean"},
+        "severity": SEVERITY
+    }
+}
+
+MAC_DIAGNOSTIC_SCHEMA = {
+    "type": "object",
+    "required": ["code", "description", "severity"],
+    "properties": {
+        "code": {"type": "string", "pattern": r"^[A-Z]{3}\d{3}$"},
+        "description": NAME,
+        "cause": STRING,
+        "solution": STRING,
+        "component": STRING,
+        "severity": SEVERITY
+    }
+}
+
+IC_SECTIONS = ["charging_ics", "power_ics", "audio_ics", "baseband_ics",
+               "nand_ics", "wifi_bt_ics", "biometric_ics"]
+
+# Артефакт → схема документа целиком
+SCHEMAS = {
+    "devices.json": {"type": "array", "items": DEVICE_SCHEMA},
+    "ic_compatibility.json": {
+        "type": "object",
+        "required": IC_SECTIONS,
+        "properties": {section: {"type": "array", "items": IC_SCHEMA} for section in IC_SECTIONS}
+    },
+    "error_codes.json": {
+        "type": "object",
+        "required": ["itunes_restore_errors", "mac_diagnostics"],
+        "properties": {
+            "itunes_restore_errors": {"type": "array", "items": ITUNES_ERROR_SCHEMA},
+            "mac_diagnostics": {"type": "array", "items": MAC_DIAGNOSTIC_SCHEMA}
+        }
+    }
+}
+
+class SchemaError(Exception):
+    """Артефакт не соответствует схеме; errors — ["путь: сообщение"]"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} ошибок схемы, первая: {errors[0]}")
+        self.errors = errors
+
+class _TooManyErrors(Exception):
+    pass
+
+# Типы JSON → проверка значения Python (документы из json_cache —
+# MappingProxyType и tuple, поэтому Mapping и tuple наравне с dict и list;
+# записи records.Record перед проверкой переводятся в dict)
+TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, Mapping),
+    "array": lambda v: isinstance(v, (list, tuple)),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+def _report(errors, path, message):
+    errors.append(f"{path}: {message}")
+    if len(errors) >= MAX_ERRORS:
+        raise _TooManyErrors()
+
+def compile_schema(schema):
+    """Схема → функция check(value, path, errors)"""
+    checks = []
+
+    types = schema.get("type")
+    if types is not None:
+        names = [types] if isinstance(types, str) else list(types)
+        type_checks = [TYPE_CHECKS[name] for name in names]
+        expected = " или ".join(names)
+
+        def check_type(value, path, errors):
+            if not any(check(value) for check in type_checks):
+                _report(errors, path, f"ожидался {expected}, получено {type(value).__name__}")
+                return False
+            return True
+    else:
+        def check_type(value, path, errors):
+            return True
+
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                _report(errors, path, f"{value!r} не из {sorted(allowed)}")
+        checks.append(check_enum)
+
+    if "minimum" in schema or "maximum" in schema:
+        low, high = schema.get("minimum"), schema.get("maximum")
+        def check_range(value, path, errors):
+            if value is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+                return
+            if low is not None and value < low:
+                _report(errors, path, f"{value} меньше {low}")
+            elif high is not None and value > high:
+                _report(errors, path, f"{value} больше {high}")
+        checks.append(check_range)
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+        def check_length(value, path, errors):
+            if isinstance(value, str) and len(value) < min_length:
+                _report(errors, path, "пустая строка" if min_length == 1 else f"короче {min_length}")
+        checks.append(check_length)
+
+    if "pattern" in schema:
+        match = re.compile(schema["pattern"]).search
+        pattern = schema["pattern"]
+        def check_pattern(value, path, errors):
+            if isinstance(value, str) and not match(value):
+                _report(errors, path, f"{value!r} не соответствует {pattern}")
+        checks.append(check_pattern)
+
+    if "required" in schema or "properties" in schema or "additionalProperties" in schema:
+        required = list(schema.get("required", []))
+        properties = {key: compile_schema(sub) for key, sub in schema.get("properties", {}).items()}
+        additional = schema.get("additionalProperties")
+        additional = compile_schema(additional) if isinstance(additional, dict) else None
+
+        def check_object(value, path, errors):
+            if not isinstance(value, Mapping):
+                return
+            for key in required:
+                if key not in value:
+                    _report(errors, f"{path}.{key}", "отсутствует обязательное поле")
+            for key, item in value.items():
+                check = properties.get(key, additional)
+                if check is not None:
+                    check(item, f"{path}.{key}", errors)
+        checks.append(check_object)
+
+    if "items" in schema:
+        check_item = compile_schema(schema["items"])
+        def check_items(value, path, errors):
+            if not isinstance(value, (list, tuple)):
+                return
+            for i, item in enumerate(value):
+                check_item(item, f"{path}[{i}]", errors)
+        checks.append(check_items)
+
+    converts = types == "object" or (not isinstance(types, str) and "object" in (types or ()))
+
+    def check(value, path, errors):
+        # Записи (records.Device и др.) проверяются в том виде, в каком попадут в JSON
+        if converts and isinstance(value, records.Record):
+            value = value.to_json()
+        if not check_type(value, path, errors):
+            return
+        for step in checks:
+            step(value, path, errors)
+
+    return check
+
+# Компилируются один раз при импорте
+VALIDATORS = {filename: compile_schema(schema) for filename, schema in SCHEMAS.items()}
+
+def validate(filename, data):
+    """Ошибки документа ["путь: сообщение"] (пусто — документ корректен)"""
+    check = VALIDATORS.get(filename)
+    errors = []
+    if check is None:
+        return errors
+    try:
+        check(data, filename, errors)
+    except _TooManyErrors:
+        errors.append(f"{filename}: ... показаны первые {MAX_ERRORS} ошибок")
+    return errors
+
+class BackgroundValidator:
+    """Проверка документов в отдельном потоке параллельно с их записью"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="schema")
+        self.checked = 0
+
+    def submit(self, filename, data):
+        """Поставить документ в очередь; None — для файла нет схемы.
+
+        Документ не должен меняться до result(): merge сохраняет готовые данные.
+        """
+        if filename not in VALIDATORS:
+            return None
+        return self.executor.submit(validate, filename, data)
+
+    def result(self, future):
+        """Дождаться проверки; SchemaError, если документ не соответствует схеме"""
+        errors = future.result()
+        self.checked += 1
+        if errors:
+            raise SchemaError(errors)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
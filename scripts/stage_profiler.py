@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Профилирование этапов merge_all_data.py (флаг --profile).
+
+Для каждого этапа — время (настенное и CPU), пик памяти tracemalloc,
+прочитанные и записанные байты и, по желанию, дамп cProfile
+(<каталог>/<этап>.prof, смотреть через python -m pstats или snakeviz).
+Чтения и записи отмечаются из load_json/track_input/save_json; всё,
+что этап записал через json_writer (шарды, патчи, сжатые копии), берётся
+из json_writer.REPORTS. Итог — один JSON отчёт о прогоне.
+
+tracemalloc замедляет Python-код в 2–3 раза: сравнивать время стоит
+между прогонами с --profile, а не с обычной сборкой.
+"""
+import contextlib
+import cProfile
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import json_writer
+
+DEFAULT_REPORT = ".merge_profile.json"
+
+def _report_bytes(report):
+    """Байты артефакта json_writer вместе со сжатыми копиями"""
+    return report["bytes"] + sum(report.get(f"{fmt}_bytes", 0) for fmt in json_writer.SUPPORTED_FORMATS)
+
+class RunProfiler:
+    """Замеры этапов одного прогона"""
+
+    def __init__(self, cprofile_dir=None):
+        # Каталог создаётся сразу: ошибка пути — до первого этапа, а не после него
+        if cprofile_dir:
+            os.makedirs(cprofile_dir, exist_ok=True)
+        self.cprofile_dir = cprofile_dir
+        self.started_at = datetime.now().isoformat()
+        self.started = time.perf_counter()
+        self.stages = []
+        self.current = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Обернуть выполнение этапа"""
+        record = {
+            "stage": name,
+            "status": "executed",
+            "reads": [],
+            "writes": []
+        }
+        self.current = record
+        reports_before = len(json_writer.REPORTS)
+        profiler = cProfile.Profile() if self.cprofile_dir else None
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record["status"] = "failed"
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            record["wall_seconds"] = round(time.perf_counter() - started, 6)
+            record["cpu_seconds"] = round(time.process_time() - cpu_started, 6)
+            record["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+            if not tracing:
+                tracemalloc.stop()
+
+            artifacts = json_writer.REPORTS[reports_before:]
+            record["bytes_read"] = sum(r["bytes"] or 0 for r in record["reads"])
+            record["bytes_written"] = sum(_report_bytes(r) for r in artifacts)
+            record["artifacts"] = len(artifacts)
+            if profiler:
+                path = os.path.join(self.cprofile_dir, f"{name}.prof")
+                profiler.dump_stats(path)
+                record["cprofile"] = path
+            self.stages.append(record)
+            self.current = None
+
+    def skipped(self, name):
+        """Этап пропущен графом сборки (входы не изменились)"""
+        self.stages.append({"stage": name, "status": "skipped"})
+
+    def record_read(self, filepath, seconds, cache_hit=None):
+        """Чтение входа текущим этапом"""
+        if self.current is None:
+            return
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            size = None
+        entry = {"file": os.path.basename(filepath), "bytes": size, "seconds": round(seconds, 6)}
+        if cache_hit is not None:
+            entry["cache_hit"] = cache_hit
+        self.current["reads"].append(entry)
+
+    def record_write(self, report, seconds):
+        """Запись артефакта текущим этапом (report — отчёт json_writer)"""
+        if self.current is None:
+            return
+        self.current["writes"].append({
+            "file": report["file"],
+            "bytes": _report_bytes(report),
+            "seconds": round(seconds, 6)
+        })
+
+    def report(self, argv=None, extra=None):
+        """Отчёт о прогоне"""
+        executed = [s for s in self.stages if s["status"] != "skipped"]
+        return {
+            "started_at": self.started_at,
+            "finished_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "argv": list(sys.argv[1:] if argv is None else argv),
+            "wall_seconds": round(time.perf_counter() - self.started, 6),
+            "stages": self.stages,
+            "totals": {
+                "executed": len(executed),
+                "skipped": len(self.stages) - len(executed),
+                "wall_seconds": round(sum(s["wall_seconds"] for s in executed), 6),
+                "cpu_seconds": round(sum(s["cpu_seconds"] for s in executed), 6),
+                "bytes_read": sum(s["bytes_read"] for s in executed),
+                "bytes_written": sum(s["bytes_written"] for s in executed),
+                "tracemalloc_peak_mb": max((s["tracemalloc_peak_mb"] for s in executed), default=0)
+            },
+            **(extra or {})
+        }
+
+    def save(self, filepath, argv=None, extra=None):
+        """Записать отчёт (атомарно, без сжатых копий и без строки в REPORTS)"""
+        report = self.report(argv, extra)
+        json_writer.write_json(report, filepath, compact=False, compress=(), track=False)
+        return report
+
+def print_summary(report):
+    """Таблица этапов: время, память, ввод-вывод"""
+    print("\n⏱️  Профиль этапов:")
+    print(f"  {'этап':<20} {'время':>9} {'CPU':>9} {'пик памяти':>11} {'прочитано':>11} {'записано':>11}")
+    for s in report["stages"]:
+        if s["status"] == "skipped":
+            print(f"  {s['stage']:<20} {'пропуск':>9}")
+            continue
+        print(f"  {s['stage']:<20} {s['wall_seconds']:>8.3f}с {s['cpu_seconds']:>8.3f}с "
+              f"{s['tracemalloc_peak_mb']:>8.1f} МБ {s['bytes_read'] / 1024:>8.0f} КБ "
+              f"{s['bytes_written'] / 1024:>8.0f} КБ")
+    slowest = max((s for s in report["stages"] if s["status"] != "skipped"),
+                  key=lambda s: s["wall_seconds"], default=None)
+    if slowest:
+        print(f"  🐢 Самый долгий этап: {slowest['stage']} ({slowest['wall_seconds']:.3f} с)")
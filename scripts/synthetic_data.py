@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетических входов merge_all_data.py для нагрузочных тестов.
+
+Пишет ifixit_data.json, board_numbers.json, apple_parts_comprehensive.json
+и ic_comprehensive.json той же структуры, что выдают сборщики
+(collect_ifixit.py, collect_repair_wiki.py, collect_apple_parts.py,
+collect_ic_data.py), на заданное число устройств. Имена уникальны и
+сопоставляются между файлами так же, как настоящие: iPhone — по
+каноническому ключу, iPad/Mac — по точному имени в parts_by_model.
+
+Для этапов exchange_prices и price_matrix, которые читают входы вне
+каталога данных, рядом пишутся их синтетические версии того же
+масштаба: прайс Exchange UA (exchange-ua/*.xlsx, ~70% артикулов из
+apple_parts плюс чужие), таблица цен в леях (sheets-export/*_price.csv
+на долю устройств) и master-db.json с курсами валют.
+
+Запуск: python synthetic_data.py --devices 10000 --output /tmp/nexx-10k
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+# Доли категорий среди устройств
+CATEGORY_SHARES = [
+    ("iphones", 0.5),
+    ("ipads", 0.25),
+    ("macbooks", 0.25),
+]
+
+IPHONE_VARIANTS = ["", " Plus", " Pro", " Pro Max", " mini"]
+IPAD_LINES = ["iPad", "iPad Air", "iPad mini", "iPad Pro"]
+MAC_LINES = [("MacBook Air", ["13", "15"]), ("MacBook Pro", ["13", "14", "16"])]
+MAC_ARCHS = ["Apple M1", "Apple M2", "Apple M3", "Intel Core i5", "Intel Core i7", "Intel Core i9"]
+
+PART_TYPES = {
+    "iphones": ["battery", "display", "rear_camera", "front_camera", "speaker", "taptic_engine", "logic_board"],
+    "ipads": ["battery", "display", "charging_port", "logic_board"],
+    "macbooks": ["battery", "display", "keyboard", "logic_board", "charging_port"],
+}
+PART_DESCRIPTIONS = {
+    "battery": "Battery",
+    "display": "Display Assembly",
+    "rear_camera": "Rear Camera System",
+    "front_camera": "TrueDepth Camera",
+    "speaker": "Speaker Module",
+    "taptic_engine": "Taptic Engine",
+    "logic_board": "Logic Board",
+    "charging_port": "Charging Port Flex",
+    "keyboard": "Top Case with Keyboard",
+}
+PRICES = [49.0, 59.0, 99.0, 129.0, 169.0, 249.0, 399.0, 599.0]
+
+# Семейства IC: ключ ic_comprehensive.json → (ключ в stats, обозначение)
+IC_SECTIONS = [
+    ("charging_ics", "charging", "U2 / Tristar"),
+    ("power_ics", "power", "PMU"),
+    ("audio_ics", "audio", "Audio Codec"),
+    ("baseband_ics", "baseband", "Baseband Modem"),
+    ("nand_ics", "nand", "NAND Flash"),
+    ("wifi_bt_ics", "wifi_bt", "WiFi/BT Module"),
+    ("biometric_ics", "biometric", "Secure Enclave"),
+]
+
+# Устройств на одну IC (в реальной базе ~4 на каждую)
+DEVICES_PER_IC = 40
+
+# Входы этапов exchange_prices и price_matrix (относительно каталога данных)
+EXCHANGE_DIR = "exchange-ua"
+PRICE_LIST_FILE = os.path.join(EXCHANGE_DIR, "synthetic_price_list.xlsx")
+SHEETS_DIR = "sheets-export"
+SHEET_FILE = os.path.join(SHEETS_DIR, "synthetic_price.csv")
+MASTER_DB_FILE = "master-db.json"
+
+# Доля артикулов apple_parts в прайсе Exchange UA и доля устройств в таблице цен
+EXCHANGE_COVERAGE = 0.7
+SHEET_COVERAGE = 0.2
+SHEET_COLUMNS = ["Battery", "Display", "Charging Port", "Rear Camera"]
+
+REPAIRS = ["battery", "display", "rear_camera", "charging_port", "speaker"]
+SYMPTOMS = ["Not charging", "No power", "Boot loop", "No audio", "No service", "Overheating"]
+
+def category_counts(devices):
+    """Число устройств каждой категории (в сумме ровно devices)"""
+    counts = {section: int(devices * share) for section, share in CATEGORY_SHARES}
+    counts[CATEGORY_SHARES[0][0]] += devices - sum(counts.values())
+    return counts
+
+def iphone_names(count):
+    """Уникальные имена iPhone: поколение × вариант ("iPhone 105 Pro Max")"""
+    return [f"iPhone {100 + i // len(IPHONE_VARIANTS)}{IPHONE_VARIANTS[i % len(IPHONE_VARIANTS)]}"
+            for i in range(count)]
+
+def _board(n):
+    # Номер платы 820-xxxxx; после 100 000 номера повторяются (общие платы)
+    return f"820-{n % 100000:05d}"
+
+def board_numbers(counts, rng):
+    """board_numbers.json: платы iPhone, iPad и MacBook"""
+    serial = 0
+    iphones = []
+    generations = max(1, counts["iphones"] // len(IPHONE_VARIANTS))
+    for i, name in enumerate(iphone_names(counts["iphones"])):
+        iphones.append({
+            "name": name,
+            "model": f"A{rng.randint(1000, 9999)}/A{rng.randint(1000, 9999)}",
+            "board": _board(serial),
+            # Год растёт с поколением — диапазоны "iPhone X - iPhone Y" упорядочены;
+            # поколения распределены по 2007–2025 (схема не пропускает годы из будущего)
+            "year": 2007 + i // len(IPHONE_VARIANTS) * 19 // generations
+        })
+        serial += 1
+
+    ipads = []
+    for i in range(counts["ipads"]):
+        ipads.append({
+            "name": f"{IPAD_LINES[i % len(IPAD_LINES)]} {100 + i // len(IPAD_LINES)}",
+            "model": f"A{rng.randint(1000, 9999)}/A{rng.randint(1000, 9999)}",
+            "board": _board(serial),
+            "year": 2010 + serial % 16
+        })
+        serial += 1
+
+    macbooks = []
+    for i in range(counts["macbooks"]):
+        line, sizes = MAC_LINES[i % len(MAC_LINES)]
+        year = 2008 + i % 18
+        macbooks.append({
+            "name": f'{line} {sizes[i % len(sizes)]}" {year} ({i})',
+            "model": f"A{rng.randint(1000, 9999)}",
+            "emc": f"EMC {1000 + i}",
+            "board": _board(serial),
+            "year": year,
+            "arch": MAC_ARCHS[i % len(MAC_ARCHS)]
+        })
+        serial += 1
+
+    return {
+        "source": "synthetic",
+        "collected_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "macbooks": macbooks,
+        "iphones": iphones,
+        "ipads": ipads,
+        "stats": {
+            "macbooks": len(macbooks),
+            "iphones": len(iphones),
+            "ipads": len(ipads),
+            "total": len(macbooks) + len(iphones) + len(ipads)
+        }
+    }
+
+def ifixit_data(boards, rng):
+    """ifixit_data.json: iPhone из board_numbers с гайдами и ремонтопригодностью"""
+    iphones = []
+    # iFixit перечисляет модели от новых к старым
+    for board in reversed(boards["iphones"]):
+        name = board["name"]
+        iphones.append({
+            "name": name,
+            "ifixit_url": f"https://www.ifixit.com/Device/{name.replace(' ', '_')}",
+            "image": f"https://guide-images.cdn.ifixit.com/igi/{rng.getrandbits(32):08x}.standard.jpg",
+            "summary": f"Repair guides for the {name}",
+            "repairability": rng.randint(1, 10),
+            "parts": [],
+            "guides_count": rng.randint(0, 40),
+            "available_repairs": rng.sample(REPAIRS, 3)
+        })
+    return {
+        "source": "iFixit API",
+        "iphones": iphones,
+        "ipads": [],
+        "macs": [],
+        "stats": {"iphones": len(iphones), "ipads": 0, "macs": 0}
+    }
+
+def apple_parts(boards, rng, coverage=0.8):
+    """apple_parts_comprehensive.json: артикулы и цены для доли моделей"""
+    parts_by_model = {}
+    serial = 0
+    for section in ("iphones", "ipads", "macbooks"):
+        for board in boards[section]:
+            if rng.random() >= coverage:
+                continue
+            model_parts = {}
+            for part_type in PART_TYPES[section]:
+                model_parts[part_type] = {
+                    # Артикул 661-xxxxx; после 100 000 номера повторяются
+                    "article": f"661-{serial % 100000:05d}",
+                    "description": PART_DESCRIPTIONS[part_type],
+                    "price_usd": rng.choice(PRICES)
+                }
+                serial += 1
+            parts_by_model[board["name"]] = model_parts
+
+    tools = {
+        f"923-{i:05d}": {"name": f"Tool {i}", "description": "Инструмент для ремонта", "rental_usd": 49.0}
+        for i in range(11)
+    }
+    return {
+        "source": "synthetic",
+        "collected_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "currency": "USD",
+        "parts_by_model": parts_by_model,
+        "tools": tools,
+        "stats": {"models": len(parts_by_model), "total_parts": serial, "tools": len(tools)}
+    }
+
+def _compatible_devices(names, rng):
+    """Записи совместимости в тех же формах, что в collect_ic_data.py:
+    точные имена, серии, диапазоны и фильтры "(non-Pro)" """
+    kind = rng.random()
+    start = rng.randrange(len(names))
+    if kind < 0.5:
+        return names[start:start + rng.randint(2, 6)]
+    generation = names[start].split(" ")[1]
+    if kind < 0.75:
+        return [f"iPhone {generation} series"]
+    if kind < 0.9:
+        end = names[min(len(names) - 1, start + rng.randint(5, 25))].split(" ")[1]
+        return [f"iPhone {generation} - iPhone {end} series"]
+    return [f"iPhone {generation} series (non-Pro)"]
+
+def ic_comprehensive(boards, rng):
+    """ic_comprehensive.json: семейства IC со ссылками на синтетические iPhone"""
+    names = [board["name"] for board in boards["iphones"]] or ["iPhone 100"]
+    per_family = max(1, len(names) * 2 // DEVICES_PER_IC // len(IC_SECTIONS))
+    result = {
+        "source": "synthetic",
+        "collected_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    stats = {}
+    serial = 0
+    for section, family, designation in IC_SECTIONS:
+        ics = []
+        for _ in range(per_family):
+            ics.append({
+                "name": f"338S{serial:05d}",
+                "designation": designation,
+                "package": "BGA",
+                "compatible_devices": _compatible_devices(names, rng),
+                "functions": [designation],
+                "symptoms_when_faulty": rng.sample(SYMPTOMS, 2),
+                "price_range": f"${rng.randint(2, 20)}-{rng.randint(21, 60)}",
+                "difficulty": rng.choice(["Advanced", "Expert"])
+            })
+            serial += 1
+        result[section] = ics
+        stats[family] = len(ics)
+    stats["total"] = sum(stats.values())
+    result["stats"] = stats
+    return result
+
+XLSX_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        f'<?xml version="1.0" encoding="UTF-8"?><workbook xmlns="{XLSX_NS}" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+def write_price_list(filepath, rows):
+    """Прайс Exchange UA в .xlsx; rows — [(артикул, описание, скидка, цена склада)]"""
+    headers = ["Article", "Part Description", "Discount", "Stock UAH", "Exchange UAH"]
+    with zipfile.ZipFile(filepath, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        # Общие строки: заголовки, затем пары артикул/описание по порядку строк
+        with archive.open("xl/sharedStrings.xml", "w") as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8"?><sst xmlns="{XLSX_NS}">'.encode())
+            for text in headers:
+                f.write(f"<si><t>{text}</t></si>".encode())
+            for article, description, _, _ in rows:
+                f.write(f"<si><t>{escape(article)}</t></si><si><t>{escape(description)}</t></si>".encode())
+            f.write(b"</sst>")
+        with archive.open("xl/worksheets/sheet1.xml", "w") as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8"?><worksheet xmlns="{XLSX_NS}"><sheetData>'.encode())
+            f.write(('<row r="1">' + "".join(
+                f'<c r="{chr(65 + i)}1" t="s"><v>{i}</v></c>' for i in range(len(headers))) + "</row>").encode())
+            for i, (_, _, discount, stock) in enumerate(rows):
+                r = i + 2
+                f.write((f'<row r="{r}"><c r="A{r}" t="s"><v>{5 + 2 * i}</v></c><c r="B{r}" t="s"><v>{6 + 2 * i}</v></c>'
+                         f'<c r="C{r}"><v>{discount}</v></c><c r="D{r}"><v>{stock}</v></c>'
+                         f'<c r="E{r}"><v>{stock - stock * discount}</v></c></row>').encode())
+            f.write(b"</sheetData></worksheet>")
+
+def exchange_rows(parts, rng, coverage=EXCHANGE_COVERAGE):
+    """Строки прайса: доля артикулов apple_parts и ещё четверть от их числа — чужие"""
+    known = [(part["article"], f"{part['description']}, {model}")
+             for model, model_parts in parts["parts_by_model"].items() for part in model_parts.values()]
+    rows = []
+    for article, description in known:
+        if rng.random() < coverage:
+            stock = rng.randint(200, 40000) + 0.25
+            rows.append((article, description, rng.choice([0, 0, 0.124, 0.305]), stock))
+    for i in range(len(known) // 4):
+        rows.append((f"662-{i % 100000:05d}", "Other part", 0, rng.randint(200, 40000) + 0.25))
+    return rows
+
+def write_sheet(filepath, boards, rng, coverage=SHEET_COVERAGE):
+    """Таблица цен мастерской в леях (как *_price.csv из Google Sheets)"""
+    with open(filepath, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Model"] + SHEET_COLUMNS)
+        for section in ("iphones", "ipads", "macbooks"):
+            for board in boards[section]:
+                if rng.random() < coverage:
+                    writer.writerow([board["name"]] + [rng.randint(150, 3000) for _ in SHEET_COLUMNS])
+
+def generate(output_dir, devices, seed=42):
+    """Записать входы сборщиков и прайсов в output_dir; вернуть {файл: байты}"""
+    rng = random.Random(seed)
+    boards = board_numbers(category_counts(devices), rng)
+    documents = {
+        "board_numbers.json": boards,
+        "ifixit_data.json": ifixit_data(boards, rng),
+        "apple_parts_comprehensive.json": apple_parts(boards, rng),
+        "ic_comprehensive.json": ic_comprehensive(boards, rng),
+        MASTER_DB_FILE: {"config": {"exchange_rates": {"USD": 1, "EUR": 0.92, "RON": 4.65, "UAH": 41.5}}},
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    sizes = {}
+    for filename, document in documents.items():
+        filepath = os.path.join(output_dir, filename)
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        sizes[filename] = os.path.getsize(filepath)
+
+    for directory in (EXCHANGE_DIR, SHEETS_DIR):
+        os.makedirs(os.path.join(output_dir, directory), exist_ok=True)
+    write_price_list(os.path.join(output_dir, PRICE_LIST_FILE),
+                     exchange_rows(documents["apple_parts_comprehensive.json"], rng))
+    write_sheet(os.path.join(output_dir, SHEET_FILE), boards, rng)
+    for filename in (PRICE_LIST_FILE, SHEET_FILE):
+        sizes[filename] = os.path.getsize(os.path.join(output_dir, filename))
+    return sizes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Синтетические входы для merge_all_data.py")
+    parser.add_argument("--devices", type=int, default=10000, help="число устройств")
+    parser.add_argument("--output", required=True, help="каталог для JSON файлов")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    sizes = generate(args.output, args.devices, args.seed)
+    for filename, size in sizes.items():
+        print(f"✅ {filename}: {size / 1024:.1f} KB")
+
+if __name__ == "__main__":
+    main()